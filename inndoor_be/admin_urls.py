@@ -0,0 +1,12 @@
+"""
+Admin URLconf for LAZY_LOADING mode.
+
+Imported by the URL resolver on the first /admin/ request (or the first
+reverse()), so the ModelAdmin modules are discovered then rather than when
+the worker boots.
+"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+urlpatterns = admin.site.urls[0]
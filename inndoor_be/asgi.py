@@ -2,6 +2,9 @@
 ASGI config for inndoor_be project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server, e.g. ``uvicorn inndoor_be.asgi:application``,
+so the async read endpoints under /api/user/async/ don't hold a thread per
+request.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -0,0 +1,193 @@
+"""
+Primary/replica database routing with read-your-writes stickiness.
+
+Enabled when DATABASE_REPLICA_URLS is set. ``ReplicaRoutingMiddleware`` records
+the current request in a context variable; ``PrimaryReplicaRouter`` sends reads
+from safe-method requests to a replica and everything else (writes, unsafe
+requests, management commands, users who wrote recently) to ``default``.
+Batched sub-requests (users/batch.py) are routed one by one with
+``subrequest()``, so a batch of GETs reads replicas like separate GETs would.
+
+The pins live in the default cache, which must be shared by every worker
+(REDIS_URL): with a per-process cache, a user whose write was handled by one
+worker reads a stale replica on the next. Outside DEBUG the middleware
+refuses to start without one.
+"""
+import contextlib
+import contextvars
+import logging
+import random
+
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'default'
+# Cache backends that keep their data inside one process.
+_PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+_current = contextvars.ContextVar('db_routing_state', default=None)
+
+
+def _pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Keep ``user_id``'s reads on the primary for DATABASE_REPLICA_PIN_SECONDS."""
+    cache.set(_pin_key(user_id), True, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+class _RequestState:
+    def __init__(self, request, parent=None):
+        self.request = request
+        self.parent = parent
+        # A sub-request after one that wrote must see the write.
+        self.use_primary = request.method not in SAFE_METHODS or (parent is not None and parent.use_primary)
+        self._pinned = None
+
+    def pinned(self):
+        if self.parent is not None:
+            # Same caller, same pin: looked up once per batch.
+            return self.parent.pinned()
+        # Resolved lazily and without touching request.user: evaluating the
+        # session-backed user would itself run a query through the router.
+        if self._pinned is None:
+            self._pinned = self._check_pinned()
+        return self._pinned
+
+    def _check_pinned(self):
+        if settings.SESSION_COOKIE_NAME in self.request.COOKIES:
+            # Session (admin) traffic is low volume; keep it on the primary.
+            return True
+        user_id = self.token_user_id()
+        return user_id is not None and bool(cache.get(_pin_key(user_id)))
+
+    def token_user_id(self):
+        auth = JWTAuthentication()
+        header = auth.get_header(self.request)
+        if header is None:
+            return None
+        raw_token = auth.get_raw_token(header)
+        if raw_token is None:
+            return None
+        try:
+            token = auth.get_validated_token(raw_token)
+        except (InvalidToken, TokenError):
+            return None
+        return token.get(jwt_settings.USER_ID_CLAIM)
+
+
+def route_by_subrequests():
+    """Route the current request by the sub-requests it runs, not its own method.
+
+    For a POST that only carries other requests: its reads and its
+    read-your-writes pin follow whether a sub-request actually wrote.
+    """
+    state = _current.get()
+    if state is not None:
+        state.use_primary = False
+
+
+@contextlib.contextmanager
+def subrequest(request):
+    """Route the block's queries as for ``request``, a sub-request of the current one.
+
+    A sub-request that writes (or uses an unsafe method) marks the outer
+    request as a writer, so later sub-requests read the primary and the user
+    is pinned afterwards.
+    """
+    outer = _current.get()
+    if outer is None:
+        yield
+        return
+    state = _RequestState(request, parent=outer)
+    token = _current.set(state)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+        if state.use_primary:
+            outer.use_primary = True
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'DATABASE_REPLICAS', None):
+            raise MiddlewareNotUsed
+        if settings.CACHES['default']['BACKEND'] in _PROCESS_LOCAL_CACHES:
+            message = (
+                'DATABASE_REPLICA_URLS is set but the default cache is not shared between workers; '
+                'set REDIS_URL so read-your-writes pins are seen by every worker.'
+            )
+            if not settings.DEBUG:
+                raise ImproperlyConfigured(message)
+            logger.warning(message)
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = _RequestState(request)
+        token = _current.set(state)
+        try:
+            response = self.get_response(request)
+            if state.use_primary:
+                self._pin_writer(request)
+            return response
+        finally:
+            _current.reset(token)
+
+    async def __acall__(self, request):
+        state = _RequestState(request)
+        token = _current.set(state)
+        try:
+            response = await self.get_response(request)
+            if state.use_primary:
+                # request.user may be a lazy session lookup, which is sync-only.
+                await sync_to_async(self._pin_writer)(request)
+            return response
+        finally:
+            _current.reset(token)
+
+    @staticmethod
+    def _pin_writer(request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if state is None or state.use_primary or state.pinned():
+            return PRIMARY
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            # Anything read later in this request must see the write.
+            state.use_primary = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data, so cross-alias relations are fine.
+        return True
@@ -0,0 +1,16 @@
+from django.urls import path, re_path
+
+from .schema import schema_document, schema_view
+
+urlpatterns = [
+    # the spec is generated once and served from memory (see inndoor_be/schema.py)
+    re_path(r'^docs(?P<format>\.json|\.yaml)$',
+            schema_document,
+            name='schema-json'),
+    path('docs/',
+         schema_view.with_ui('swagger', cache_timeout=0),
+         name='schema-swagger-ui'),
+    path('redoc/',
+         schema_view.with_ui('redoc', cache_timeout=0),
+         name='schema-redoc'),
+]
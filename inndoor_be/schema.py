@@ -0,0 +1,138 @@
+"""
+OpenAPI schema, generated once and served from memory.
+
+drf_yasg introspects every viewset and serializer on each spec request.
+Instead, `python manage.py build_schema` (or the first request in a worker)
+generates the spec once, writes content-addressed JSON/YAML files to
+SCHEMA_DIR, and every request is answered from the stored bytes with an
+ETag, so clients and doc portals can revalidate with a 304. The manifest
+records a fingerprint of the code the spec was generated from; a stored spec
+from another deploy is ignored and regenerated.
+
+With DEBUG on, the spec is always regenerated per process so schema changes
+show up after the dev server reloads.
+"""
+import hashlib
+import json
+import threading
+
+import drf_yasg
+import rest_framework
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import condition, require_GET
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+API_INFO = openapi.Info(
+    title="Inndoor Backend API",
+    default_version='v1',
+    description="API documentation for Inndoor platform",
+    contact=openapi.Contact(email="support@inndoor.co"),
+)
+
+# Only used for the swagger/redoc HTML pages, which build an empty schema and
+# load the spec itself from SWAGGER_SETTINGS['SPEC_URL'] (the stored schema).
+schema_view = get_schema_view(
+    API_INFO,
+    public=True,
+    permission_classes=(permissions.AllowAny,),
+)
+
+MEDIA_TYPES = {
+    'json': 'application/json',
+    'yaml': 'application/yaml',
+}
+
+# Directories (under BASE_DIR) whose Python sources define the API.
+SOURCE_DIRS = ('inndoor_be', 'users')
+SKIPPED_DIRS = {'tests', 'migrations', 'management'}
+
+_lock = threading.Lock()
+_stored = None
+
+
+def fingerprint():
+    """Hash of the API's Python sources and the versions of DRF and drf_yasg."""
+    digest = hashlib.sha256(f'{rest_framework.VERSION} {drf_yasg.__version__}'.encode())
+    base_dir = settings.BASE_DIR
+    for directory in SOURCE_DIRS:
+        for path in sorted((base_dir / directory).rglob('*.py')):
+            relative = path.relative_to(base_dir)
+            if SKIPPED_DIRS.isdisjoint(relative.parts):
+                digest.update(str(relative).encode())
+                digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def generate():
+    """Generate the spec and return {'etag': ..., 'json': bytes, 'yaml': bytes}."""
+    spec = OpenAPISchemaGenerator(API_INFO).get_schema(request=None, public=True)
+    encoded = {
+        'json': OpenAPICodecJson(validators=[]).encode(spec),
+        'yaml': OpenAPICodecYaml(validators=[]).encode(spec),
+    }
+    encoded['etag'] = hashlib.sha256(encoded['json']).hexdigest()[:16]
+    return encoded
+
+
+def write(encoded):
+    """Write versioned spec files plus a manifest pointing at the current ones."""
+    schema_dir = settings.SCHEMA_DIR
+    schema_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {'etag': encoded['etag'], 'fingerprint': fingerprint()}
+    for fmt in MEDIA_TYPES:
+        name = f"openapi-{encoded['etag']}.{fmt}"
+        (schema_dir / name).write_bytes(encoded[fmt])
+        manifest[fmt] = name
+    (schema_dir / 'manifest.json').write_text(json.dumps(manifest))
+    return manifest
+
+
+def _read():
+    schema_dir = settings.SCHEMA_DIR
+    try:
+        manifest = json.loads((schema_dir / 'manifest.json').read_text())
+        if manifest.get('fingerprint') != fingerprint():
+            return None
+        return {
+            'etag': manifest['etag'],
+            **{fmt: (schema_dir / manifest[fmt]).read_bytes() for fmt in MEDIA_TYPES},
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def stored():
+    global _stored
+    if _stored is None:
+        with _lock:
+            if _stored is None:
+                encoded = None if settings.DEBUG else _read()
+                if encoded is None:
+                    encoded = generate()
+                    if not settings.DEBUG:
+                        try:
+                            write(encoded)
+                        except OSError:
+                            pass
+                _stored = encoded
+    return _stored
+
+
+def _etag(request, *args, **kwargs):
+    return stored()['etag']
+
+
+@require_GET
+@condition(etag_func=_etag)
+def schema_document(request, format):
+    fmt = format.lstrip('.')
+    if fmt not in MEDIA_TYPES:
+        raise Http404
+    response = HttpResponse(stored()[fmt], content_type=MEDIA_TYPES[fmt])
+    response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+    return response
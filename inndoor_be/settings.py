@@ -14,11 +14,12 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
-load_dotenv()
-
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# An explicit path skips python-dotenv's stack-inspecting search for the file.
+load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -34,8 +35,15 @@ ALLOWED_HOSTS = []
 
 # Application definition
 
+# Lazy loading for worker boot (see `python manage.py startup_profile`): the
+# admin and the OpenAPI docs are imported on their first request instead of
+# at startup.
+LAZY_LOADING = os.getenv('LAZY_LOADING', 'False') == 'True'
+
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # SimpleAdminConfig skips admin.autodiscover(); inndoor_be/admin_urls.py
+    # runs it on the first /admin/ request.
+    'django.contrib.admin.apps.SimpleAdminConfig' if LAZY_LOADING else 'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -50,6 +58,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'inndoor_be.db_router.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -57,18 +66,116 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'users.profiling.SamplingProfilerMiddleware',
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# JSON responses are encoded with orjson when it is installed
+# (users/renderers.py); FAST_JSON=False switches back to the stdlib encoder.
+FAST_JSON = os.getenv('FAST_JSON', 'True') == 'True'
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'users.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    # Token buckets for login/register (users/throttling.py): a burst of N,
+    # refilled at N per period, per client IP and per submitted username.
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': os.getenv('AUTH_THROTTLE_IP', '20/min'),
+        'auth_username': os.getenv('AUTH_THROTTLE_USERNAME', '5/min'),
+    },
+    # Adds 503 responses for a saturated password hash pool.
+    'EXCEPTION_HANDLER': 'users.exceptions.exception_handler',
 }
 
+# Near-duplicate listings (users/dedup.py): a new listing is flagged against
+# an existing one when their estimated text similarity (MinHash Jaccard)
+# reaches DEDUP_SIMILARITY or their SimHash fingerprints differ in at most
+# DEDUP_SIMHASH_DISTANCE bits. Sign existing rows with
+# `python manage.py sign_properties`.
+DEDUP_SIMILARITY = float(os.getenv('DEDUP_SIMILARITY', '0.7'))
+DEDUP_SIMHASH_DISTANCE = int(os.getenv('DEDUP_SIMHASH_DISTANCE', '3'))
+
+# Listing analytics (users/analytics.py): events are buffered per worker and
+# written in one INSERT, by a background thread, once ANALYTICS_BUFFER_SIZE
+# are waiting or the oldest is ANALYTICS_FLUSH_SECONDS old. `python manage.py rollup_analytics` (cron,
+# every few minutes) rolls them into the dashboard at /api/user/analytics/.
+# It waits at a gap in the event ids for up to ANALYTICS_ROLLUP_GAP_SECONDS,
+# in case the missing insert is still to commit; keep it above the longest
+# transaction that writes events.
+ANALYTICS_BUFFER_SIZE = int(os.getenv('ANALYTICS_BUFFER_SIZE', '200'))
+ANALYTICS_FLUSH_SECONDS = float(os.getenv('ANALYTICS_FLUSH_SECONDS', '10'))
+ANALYTICS_ROLLUP_GAP_SECONDS = float(os.getenv('ANALYTICS_ROLLUP_GAP_SECONDS', '120'))
+
+# Agents (users/agents.py): the directory and auto-assignment consider agents
+# whose service areas (`python manage.py build_agent_areas`, nightly) are in
+# the listing's city or within AGENT_SEARCH_RADIUS_KM of it. New inspections
+# without an agent get the best-ranked agent with fewer than
+# AGENT_MAX_DAILY_INSPECTIONS pending/confirmed inspections that day, on a
+# background thread once the request has committed.
+AGENT_SEARCH_RADIUS_KM = float(os.getenv('AGENT_SEARCH_RADIUS_KM', '25'))
+AGENT_MAX_DAILY_INSPECTIONS = int(os.getenv('AGENT_MAX_DAILY_INSPECTIONS', '6'))
+INSPECTION_AUTO_ASSIGN = os.getenv('INSPECTION_AUTO_ASSIGN', 'True') == 'True'
+
+# Rent guides at /api/user/market-stats/ (users/market_stats.py) cover listings
+# created in the last MARKET_STATS_MONTHS months. They are cached and
+# recomputed on a background thread when older than
+# MARKET_STATS_REFRESH_SECONDS (the old ones are served meanwhile), or ahead of
+# time by `python manage.py build_market_stats` from cron. With nothing
+# cached, one request recomputes them and the others wait up to
+# MARKET_STATS_WAIT_SECONDS for it, then get a 503.
+MARKET_STATS_MONTHS = int(os.getenv('MARKET_STATS_MONTHS', '12'))
+MARKET_STATS_REFRESH_SECONDS = int(os.getenv('MARKET_STATS_REFRESH_SECONDS', '3600'))
+MARKET_STATS_WAIT_SECONDS = float(os.getenv('MARKET_STATS_WAIT_SECONDS', '5'))
+
+# POST /api/user/batch/: at most BATCH_MAX_REQUESTS sub-requests, consecutive
+# GETs run on a pool of BATCH_WORKERS threads per process, and a sub-response
+# larger than BATCH_MAX_RESPONSE_BYTES is replaced by a 413 entry.
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '20'))
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '4'))
+BATCH_MAX_RESPONSE_BYTES = int(os.getenv('BATCH_MAX_RESPONSE_BYTES', str(1024 * 1024)))
+
+# Sampling profiler for hot endpoints (off by default). When enabled, a
+# fraction of requests to PROFILING_ENDPOINTS ("ViewSet.action" names) is
+# profiled and aggregated in memory; staff can download the results from
+# /api/user/profiling/.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0.01'))
+PROFILING_ENDPOINTS = [
+    name.strip()
+    for name in os.getenv('PROFILING_ENDPOINTS', 'PropertyViewSet.list,MessageViewSet.list').split(',')
+    if name.strip()
+]
+# 'cprofile' (pstats output) or 'sample' (statistical sampler, collapsed stacks)
+PROFILING_MODE = os.getenv('PROFILING_MODE', 'cprofile')
+PROFILING_SAMPLE_INTERVAL = float(os.getenv('PROFILING_SAMPLE_INTERVAL', '0.005'))
+
+# Listings without a move_out_date expire this many days after available_from
+# (see `python manage.py expire_listings`).
+LISTING_TTL_DAYS = int(os.getenv('LISTING_TTL_DAYS', '90'))
+
+# Retention (see `python manage.py archive_history`): read notifications and
+# messages older than these many days move to the archive tables.
+NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', '30'))
+MESSAGE_RETENTION_DAYS = int(os.getenv('MESSAGE_RETENTION_DAYS', '180'))
+
 ROOT_URLCONF = 'inndoor_be.urls'
 
+# Generated OpenAPI spec files (`python manage.py build_schema`). The docs UIs
+# load the stored spec instead of regenerating it.
+SCHEMA_DIR = Path(os.getenv('SCHEMA_DIR', BASE_DIR / 'schema'))
+SWAGGER_SETTINGS = {
+    'SPEC_URL': ('schema-json', {'format': '.json'}),
+}
+REDOC_SETTINGS = {
+    'SPEC_URL': ('schema-json', {'format': '.json'}),
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -97,10 +204,51 @@ import urllib.parse as _urlparse
 # parse and use it. Otherwise fall back to the default SQLite database used for local dev.
 DATABASE_URL = os.getenv('DATABASE_URL')
 
-if DATABASE_URL:
-    parsed_url = _urlparse.urlparse(DATABASE_URL)
+# Optional comma-separated read replica URLs, parsed the same way as DATABASE_URL.
+# Safe-method API reads are routed to them (see inndoor_be/db_router.py).
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+
+
+# SQLite mode for small deployments: WAL, tuned pragmas and BEGIN IMMEDIATE
+# for write_atomic() blocks (see inndoor_be/db_backends/sqlite3/base.py). Set
+# SQLITE_TUNED=False to use Django's stock SQLite backend.
+SQLITE_TUNED = os.getenv('SQLITE_TUNED', 'True') == 'True'
+SQLITE_ENGINE = 'inndoor_be.db_backends.sqlite3' if SQLITE_TUNED else 'django.db.backends.sqlite3'
+SQLITE_PRAGMAS = {
+    pragma: os.getenv(env_var)
+    for pragma, env_var in (
+        ('mmap_size', 'SQLITE_MMAP_SIZE'),
+        ('cache_size', 'SQLITE_CACHE_SIZE'),
+        ('busy_timeout', 'SQLITE_BUSY_TIMEOUT'),
+        ('synchronous', 'SQLITE_SYNCHRONOUS'),
+    )
+    if os.getenv(env_var)
+}
+
+# Query parameters on a database URL that configure the connection pool; any
+# other parameters (eg. sslmode=require) are passed through as OPTIONS.
+_POOL_PARAMS = {
+    'pool_size': 'SIZE',
+    'pool_timeout': 'TIMEOUT',
+    'pool_max_lifetime': 'MAX_LIFETIME',
+    'pool_health_check_after': 'HEALTH_CHECK_AFTER',
+}
+# Driver options that must be integers (MySQL drivers reject strings); the
+# rest are passed as the strings they are in the URL.
+_INTEGER_OPTIONS = {
+    'connect_timeout', 'read_timeout', 'write_timeout', 'client_flag', 'local_infile',
+    'keepalives', 'keepalives_idle', 'keepalives_interval', 'keepalives_count', 'tcp_user_timeout',
+}
+
+
+def _database_from_url(url):
+    parsed_url = _urlparse.urlparse(url)
     scheme = parsed_url.scheme
     db_name = parsed_url.path[1:]
+    query = dict(_urlparse.parse_qsl(parsed_url.query))
+    pooled = query.pop('pool', 'false').lower() in ('1', 'true', 'yes')
+    pool_options = {_POOL_PARAMS[key]: query.pop(key) for key in list(query) if key in _POOL_PARAMS}
+    options = {key: int(value) if key in _INTEGER_OPTIONS else value for key, value in query.items()}
 
     if scheme.startswith('postgres') or scheme.startswith('postgresql'):
         engine = 'django.db.backends.postgresql'
@@ -110,23 +258,76 @@ if DATABASE_URL:
         # default to sqlite if unknown scheme
         engine = 'django.db.backends.sqlite3'
 
+    database = {
+        'ENGINE': engine,
+        'NAME': db_name if engine != 'django.db.backends.sqlite3' else BASE_DIR / db_name,
+        'USER': parsed_url.username,
+        'PASSWORD': parsed_url.password,
+        'HOST': parsed_url.hostname,
+        'PORT': parsed_url.port or '',
+        'OPTIONS': options,
+        # persistent connections (seconds). Adjust as needed.
+        'CONN_MAX_AGE': 600,
+        # ping reused connections once per request before trusting them
+        'CONN_HEALTH_CHECKS': True,
+    }
+
+    if engine == 'django.db.backends.sqlite3':
+        database['ENGINE'] = SQLITE_ENGINE
+        database['PRAGMAS'] = SQLITE_PRAGMAS
+    elif pooled:
+        # Pooled backends share connections across threads (and so across
+        # ASGI requests); Django hands each one back at the end of a request.
+        database['ENGINE'] = 'inndoor_be.db_backends.' + engine.rsplit('.', 1)[1]
+        database['CONN_MAX_AGE'] = 0
+        database['POOL'] = pool_options
+
+    return database
+
+
+if DATABASE_URL:
     DATABASES = {
-        'default': {
-            'ENGINE': engine,
-            'NAME': db_name if engine != 'django.db.backends.sqlite3' else BASE_DIR / db_name,
-            'USER': parsed_url.username,
-            'PASSWORD': parsed_url.password,
-            'HOST': parsed_url.hostname,
-            'PORT': parsed_url.port or '',
-            # persistent connections (seconds). Adjust as needed.
-            'CONN_MAX_AGE': 600,
-        }
+        'default': _database_from_url(DATABASE_URL),
     }
 else:
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
+            'ENGINE': SQLITE_ENGINE,
             'NAME': BASE_DIR / 'db.sqlite3',
+            'PRAGMAS': SQLITE_PRAGMAS,
+        }
+    }
+
+DATABASE_REPLICAS = []
+for _index, _url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    _alias = f'replica_{_index}'
+    DATABASES[_alias] = _database_from_url(_url)
+    # Tests run against the primary only; replicas mirror it.
+    DATABASES[_alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(_alias)
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['inndoor_be.db_router.PrimaryReplicaRouter']
+
+# After a user writes, their reads stay on the primary for this many seconds so
+# they never see replication lag on their own changes.
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('DATABASE_REPLICA_PIN_SECONDS', '5'))
+
+# Cache (shared across workers when REDIS_URL is set; used for replica pinning,
+# so REDIS_URL is required with DATABASE_REPLICA_URLS outside DEBUG).
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         }
     }
 
@@ -149,6 +350,20 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hashing runs on a bounded per-process thread pool (users/hashing.py); calls
+# beyond PASSWORD_HASH_WORKERS running plus PASSWORD_HASH_QUEUE waiting are
+# rejected with HashingUnavailable, which the API answers with a 503.
+PASSWORD_HASHERS = [
+    'users.hashing.OffloadedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', '8'))
+PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '5'))
+
 
 
 
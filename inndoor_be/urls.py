@@ -1,33 +1,22 @@
+from django.conf import settings
 from django.contrib import admin
-from django.urls import include, path, re_path
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
-from rest_framework import permissions
+from django.urls import URLResolver, include, path
+from django.urls.resolvers import RegexPattern, RoutePattern
 
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Inndoor Backend API",
-      default_version='v1',
-      description="API documentation for user authentication (register, login, logout)",
-      contact=openapi.Contact(email="support@inndoor.co"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
+if settings.LAZY_LOADING:
+    # A URLResolver given a module path imports it the first time a request
+    # reaches it, so drf_yasg and the ModelAdmins load on first use.
+    admin_urls = URLResolver(RoutePattern('admin/'), 'inndoor_be.admin_urls', app_name='admin', namespace='admin')
+    # Lookahead so only docs/redoc requests (not every 404) trigger the import.
+    docs_urls = URLResolver(RegexPattern(r'^(?=docs|redoc)'), 'inndoor_be.docs_urls')
+else:
+    admin_urls = path('admin/', admin.site.urls)
+    docs_urls = path('', include('inndoor_be.docs_urls'))
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    admin_urls,
    # use singular `user` base path for auth endpoints (e.g. /api/user/register/)
    path('api/user/', include('users.urls')),
 
-
-    re_path(r'^docs(?P<format>\.json|\.yaml)$',
-            schema_view.without_ui(cache_timeout=0),
-            name='schema-json'),
-    path('docs/',
-         schema_view.with_ui('swagger', cache_timeout=0),
-         name='schema-swagger-ui'),
-    path('redoc/',
-         schema_view.with_ui('redoc', cache_timeout=0),
-         name='schema-redoc'),
+    docs_urls,
 ]
@@ -0,0 +1,61 @@
+"""
+Per-process state under forking servers.
+
+A server that forks after importing the app (gunicorn --preload, uWSGI
+without lazy-apps) copies module globals into every worker, but not the
+threads behind them, and sockets and locks copied mid-use must not be
+shared. Modules holding such state rebuild it in the child with
+``@reset_after_fork``.
+
+``BackgroundExecutor`` is the thread pool for work moved off the request
+path: it starts on first use, so importing a module costs no threads, and
+a forked child starts its own.
+"""
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+
+def reset_after_fork(function):
+    """Call ``function`` in the child after every fork; returns it unchanged."""
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=function)
+    return function
+
+
+_background_executors = weakref.WeakSet()
+
+
+class BackgroundExecutor:
+    """A ThreadPoolExecutor created on the first ``submit()``.
+
+    ``max_workers`` is a count, or a callable returning one when the pool
+    starts (e.g. to read it from settings).
+    """
+
+    def __init__(self, max_workers, thread_name_prefix):
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._lock = threading.Lock()
+        self._executor = None
+        _background_executors.add(self)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    workers = self.max_workers() if callable(self.max_workers) else self.max_workers
+                    self._executor = ThreadPoolExecutor(workers, thread_name_prefix=self.thread_name_prefix)
+        return self._executor
+
+    def submit(self, fn, /, *args, **kwargs):
+        return self._get_executor().submit(fn, *args, **kwargs)
+
+
+@reset_after_fork
+def _reset_background_executors():
+    # Pool threads do not survive fork; the child starts its own on first use.
+    for executor in list(_background_executors):
+        executor._lock = threading.Lock()
+        executor._executor = None
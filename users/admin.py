@@ -1,3 +1,279 @@
+"""
+Admin for the users app, built for tables with millions of rows.
+
+- Changelists show an estimated total for unfiltered tables, taken from the
+  database's table statistics instead of a COUNT(*) scan.
+- Foreign keys to users and properties use raw id widgets, so a change form
+  never renders a <select> of every user.
+- Changelists select_related what they display.
+- list_display names columns explicitly instead of ``__str__``, because the
+  Review, Message, Inspection and similar ``__str__`` methods follow foreign
+  keys and would query once per row.
+- list_filter and search only use indexed columns. Search matches
+  ``=field`` exactly and ``^field`` by prefix, both case-sensitive (see
+  LargeTableAdmin.get_search_results); the stock admin's iexact and
+  istartswith wrap the column in UPPER() or LIKE, which no index serves.
+"""
 from django.contrib import admin
+from django.contrib.admin.utils import (get_fields_from_path,
+                                        lookup_spawns_duplicates)
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.text import smart_split, unescape_string_literal
+
+from .models import (AgentServiceArea, ArchivedMessage, ArchivedNotification,
+                     Deal, Inspection, JobWatermark, ListingEvent,
+                     ListingStats, Message, Notification, Property,
+                     PropertyDuplicate, PropertyImage, PropertySignature,
+                     PropertySignatureBand, Review, SavedProperty,
+                     SavedSearch, UserProfile)
+
+
+def estimated_count(model, using):
+    """Approximate row count of ``model``'s table from database statistics, or None."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [connection.ops.quote_name(table)])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s',
+                [table],
+            )
+        elif connection.vendor == 'sqlite' and model._meta.pk.get_internal_type() in ('AutoField', 'BigAutoField'):
+            # The integer primary key is the rowid, so MAX() is one b-tree
+            # probe; deleted rows make it an overestimate.
+            cursor.execute(f'SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}')
+        else:
+            return None
+        row = cursor.fetchone()
+    # Postgres reports -1 for tables that have never been analyzed.
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Uses the table estimate for unfiltered changelists over EXACT_BELOW rows."""
+    EXACT_BELOW = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.EXACT_BELOW:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Skip the second, unfiltered COUNT(*) shown next to filtered results.
+    show_full_result_count = False
+    list_per_page = 50
+    # Newest first by primary key, which is always indexed (Meta.ordering is
+    # often an unindexed created_at).
+    ordering = ('-pk',)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Match each word against the ``=`` (exact) and ``^`` (prefix) search fields.
+
+        A word a field cannot hold, like a username against ``=id``, skips
+        that field instead of casting the column.
+        """
+        search_fields = self.get_search_fields(request)
+        if not search_fields or not search_term:
+            return queryset, False
+        paths = [field_name.lstrip('=^') for field_name in search_fields]
+        for bit in smart_split(search_term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            lookups = [self._search_lookup(field_name, bit) for field_name in search_fields]
+            lookups = [lookup for lookup in lookups if lookup is not None]
+            if not lookups:
+                return queryset.none(), False
+            queryset = queryset.filter(Q(*lookups, _connector=Q.OR))
+        return queryset, any(lookup_spawns_duplicates(self.opts, path) for path in paths)
+
+    def _search_lookup(self, field_name, term):
+        path = field_name.lstrip('=^')
+        field = get_fields_from_path(self.model, path)[-1]
+        try:
+            value = field.to_python(term)
+            field.run_validators(value)
+        except ValidationError:
+            return None
+        if isinstance(value, int) and not -2 ** 63 <= value < 2 ** 63:
+            # Outside any integer column; SQLite would raise OverflowError.
+            return None
+        if field_name.startswith('^') and value:
+            # A range, not LIKE: SQLite's LIKE ignores case and PostgreSQL's
+            # needs a pattern_ops index, so neither would use the column's.
+            return Q(**{f'{path}__gte': value, f'{path}__lt': value[:-1] + chr(ord(value[-1]) + 1)})
+        return Q(**{path: value})
+
+
+class ReadOnlyAdmin(LargeTableAdmin):
+    """For rows written only by background jobs."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(UserProfile)
+class UserProfileAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'role', 'verification_status', 'is_verified', 'rating', 'total_listings', 'created_at')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    search_fields = ('=user__username',)
+
+
+class PropertyImageInline(admin.TabularInline):
+    model = PropertyImage
+    extra = 0
+
+
+@admin.register(Property)
+class PropertyAdmin(LargeTableAdmin):
+    list_display = ('id', 'title', 'owner', 'city', 'property_type', 'price', 'status', 'is_verified', 'created_at')
+    list_select_related = ('owner',)
+    list_filter = ('status',)
+    raw_id_fields = ('owner', 'verified_by')
+    search_fields = ('=id', '^city', '=owner__username')
+    readonly_fields = ('views_count', 'expires_on', 'created_at', 'updated_at')
+    inlines = [PropertyImageInline]
+
+
+@admin.register(PropertyImage)
+class PropertyImageAdmin(LargeTableAdmin):
+    list_display = ('id', 'property', 'caption', 'is_primary', 'order', 'uploaded_at')
+    list_select_related = ('property',)
+    raw_id_fields = ('property',)
+    search_fields = ('=property__id',)
+
+
+@admin.register(Inspection)
+class InspectionAdmin(LargeTableAdmin):
+    list_display = ('id', 'property', 'requester', 'agent', 'preferred_date', 'status', 'created_at')
+    list_select_related = ('property', 'requester', 'agent')
+    list_filter = ('status',)
+    raw_id_fields = ('property', 'requester', 'agent')
+    search_fields = ('=id', '=property__id', '=requester__username')
+
+
+@admin.register(Deal)
+class DealAdmin(LargeTableAdmin):
+    list_display = ('id', 'property', 'tenant', 'owner', 'agent', 'rent_amount', 'status', 'created_at')
+    list_select_related = ('property', 'tenant', 'owner', 'agent')
+    list_filter = ('status',)
+    raw_id_fields = ('property', 'tenant', 'owner', 'agent')
+    search_fields = ('=id', '=tenant__username', '=owner__username')
+
+
+@admin.register(Review)
+class ReviewAdmin(LargeTableAdmin):
+    list_display = ('id', 'reviewer', 'review_type', 'property_id', 'reviewed_user_id', 'rating', 'moderation_status', 'spam_score', 'created_at')
+    list_select_related = ('reviewer',)
+    list_filter = ('moderation_status',)
+    raw_id_fields = ('reviewer', 'property', 'reviewed_user', 'moderated_by')
+    search_fields = ('=id', '=reviewer__username')
+    readonly_fields = ('spam_score', 'scored_at', 'moderated_by', 'moderated_at')
+
+
+@admin.register(Message)
+class MessageAdmin(LargeTableAdmin):
+    list_display = ('id', 'sender', 'recipient', 'property_id', 'is_read', 'created_at')
+    list_select_related = ('sender', 'recipient')
+    raw_id_fields = ('sender', 'recipient', 'property')
+    search_fields = ('=id', '=sender__username', '=recipient__username')
+
+
+@admin.register(Notification)
+class NotificationAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'notification_type', 'title', 'is_read', 'created_at')
+    list_select_related = ('user',)
+    list_filter = ('is_read',)
+    raw_id_fields = ('user', 'related_property', 'related_inspection', 'related_deal')
+    search_fields = ('=id', '=user__username')
+
+
+@admin.register(SavedProperty)
+class SavedPropertyAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'property_id', 'created_at')
+    list_select_related = ('user',)
+    raw_id_fields = ('user', 'property')
+    search_fields = ('=user__username', '=property__id')
+
+
+@admin.register(SavedSearch)
+class SavedSearchAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'name', 'city', 'property_type', 'is_active', 'last_notified_at')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    search_fields = ('=user__username', '^city')
+
+
+@admin.register(JobWatermark)
+class JobWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('name', 'value', 'updated_at')
+
+
+@admin.register(ArchivedMessage)
+class ArchivedMessageAdmin(ReadOnlyAdmin):
+    list_display = ('id', 'sender', 'recipient', 'property_id', 'created_at', 'archived_at')
+    list_select_related = ('sender', 'recipient')
+    raw_id_fields = ('sender', 'recipient')
+    search_fields = ('=id', '=sender__username', '=recipient__username')
+
+
+@admin.register(ArchivedNotification)
+class ArchivedNotificationAdmin(ReadOnlyAdmin):
+    list_display = ('id', 'user', 'notification_type', 'title', 'created_at', 'archived_at')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    search_fields = ('=id', '=user__username')
+
+
+@admin.register(PropertySignature)
+class PropertySignatureAdmin(ReadOnlyAdmin):
+    list_display = ('property_id', 'content_hash', 'simhash', 'updated_at')
+    search_fields = ('=property__id',)
+    exclude = ('minhash',)
+
+
+@admin.register(PropertySignatureBand)
+class PropertySignatureBandAdmin(ReadOnlyAdmin):
+    list_display = ('id', 'property_id', 'band', 'bucket')
+    search_fields = ('=property__id', '=bucket')
+
+
+@admin.register(PropertyDuplicate)
+class PropertyDuplicateAdmin(LargeTableAdmin):
+    list_display = ('id', 'property_id', 'duplicate_of_id', 'similarity', 'simhash_distance', 'created_at')
+    raw_id_fields = ('property', 'duplicate_of')
+    search_fields = ('=property__id', '=duplicate_of__id')
+
+
+@admin.register(ListingEvent)
+class ListingEventAdmin(ReadOnlyAdmin):
+    # The log has no secondary indexes, so no filters or search.
+    list_display = ('id', 'property_id', 'event_type', 'created_at')
+
+
+@admin.register(ListingStats)
+class ListingStatsAdmin(ReadOnlyAdmin):
+    list_display = ('id', 'property_id', 'granularity', 'bucket_start', 'views', 'saves', 'inspection_requests', 'messages')
+    search_fields = ('=property__id',)
+
 
-# Register your models here.
+@admin.register(AgentServiceArea)
+class AgentServiceAreaAdmin(ReadOnlyAdmin):
+    list_display = ('id', 'agent', 'city', 'state', 'jobs', 'latitude', 'longitude', 'updated_at')
+    list_select_related = ('agent',)
+    search_fields = ('=agent__username', '=city_key')
@@ -0,0 +1,243 @@
+"""
+Agent directory and inspection auto-assignment.
+
+An agent's service areas are the cities where they have handled
+inspections or deals. Each area stores the centre of those listings and the
+number of jobs. ``manage.py build_agent_areas`` recomputes every area, and
+every agent's ``total_inspections`` (completed inspections), in a few
+set-based queries; run it nightly. AgentServiceArea is indexed by city and
+by (latitude, longitude). Both the directory and auto-assignment therefore
+start from an index range, never from every AGENT/BOTH profile.
+
+Agents are ranked in SQL by
+
+    RATING_WEIGHT * rating / 5
+    + EXPERIENCE_WEIGHT * min(total_inspections, EXPERIENCE_CAP) / EXPERIENCE_CAP
+    + PROXIMITY_WEIGHT * proximity
+
+Proximity is 1 in the listing's city. Elsewhere it falls linearly to 0 at
+AGENT_SEARCH_RADIUS_KM. Distance is equirectangular, which is accurate
+to well under 1% at city scale and needs only arithmetic and SQRT.
+
+New inspections are assigned by ``assign_later()`` on a background thread,
+after the request that created them has committed and returned.
+``assign()`` locks the chosen agent's profile row and checks their bookings
+again before taking the slot, so concurrent assignments cannot overbook an
+agent.
+"""
+import logging
+import math
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import (Avg, Case, Count, Exists, F, FloatField, Max,
+                              Min, OuterRef, Q, Subquery, Value, When)
+from django.db.models.functions import (Cast, Coalesce, Greatest, Least,
+                                        Lower, Sqrt, Trim)
+
+from inndoor_be.db_backends.sqlite3.base import write_atomic
+from inndoor_be.workers import BackgroundExecutor
+
+from .models import (AgentServiceArea, Deal, Inspection, Notification,
+                     UserProfile)
+
+logger = logging.getLogger(__name__)
+
+AGENT_ROLES = (UserProfile.Roles.AGENT, UserProfile.Roles.BOTH)
+ACTIVE_INSPECTIONS = (Inspection.Status.PENDING, Inspection.Status.CONFIRMED)
+KM_PER_DEGREE = 111.32
+RATING_WEIGHT = 0.5
+EXPERIENCE_WEIGHT = 0.2
+PROXIMITY_WEIGHT = 0.3
+EXPERIENCE_CAP = 50
+# Agents tried by one assignment when the best ones are taken meanwhile.
+ASSIGN_ATTEMPTS = 3
+
+# One thread: assignments in a process run one at a time.
+_executor = BackgroundExecutor(1, thread_name_prefix='assign')
+
+
+def city_key(city):
+    return (city or '').strip().lower()
+
+
+def _jobs_by_city(model):
+    return (
+        model.objects.filter(agent__isnull=False).exclude(property__city='')
+        .values('agent_id', key=Lower(Trim('property__city')))
+        .annotate(
+            jobs=Count('id'), located=Count('property__latitude'),
+            city=Max('property__city'), state=Max('property__state'),
+            latitude=Avg('property__latitude'), longitude=Avg('property__longitude'),
+        )
+    )
+
+
+def build_service_areas():
+    """Recompute every agent's service areas and total_inspections; returns the number of areas."""
+    areas = {}
+    for model in (Inspection, Deal):
+        for row in _jobs_by_city(model):
+            area = areas.setdefault(
+                (row['agent_id'], row['key']),
+                {'city': row['city'].strip(), 'state': row['state'], 'jobs': 0, 'located': 0, 'latitude': 0.0, 'longitude': 0.0},
+            )
+            area['jobs'] += row['jobs']
+            if row['located']:
+                # Weighted so the centre covers every located listing once.
+                area['latitude'] += float(row['latitude']) * row['located']
+                area['longitude'] += float(row['longitude']) * row['located']
+                area['located'] += row['located']
+    rows = [
+        AgentServiceArea(
+            agent_id=agent_id, city_key=key, city=area['city'], state=area['state'], jobs=area['jobs'],
+            latitude=area['latitude'] / area['located'] if area['located'] else None,
+            longitude=area['longitude'] / area['located'] if area['located'] else None,
+        )
+        for (agent_id, key), area in areas.items()
+    ]
+    completed = (
+        Inspection.objects.filter(agent=OuterRef('user_id'), status=Inspection.Status.COMPLETED)
+        .order_by().values('agent').annotate(total=Count('id')).values('total')
+    )
+    with transaction.atomic():
+        AgentServiceArea.objects.all().delete()
+        AgentServiceArea.objects.bulk_create(rows, batch_size=1000)
+        UserProfile.objects.filter(role__in=AGENT_ROLES).update(total_inspections=Coalesce(Subquery(completed), 0))
+    return len(rows)
+
+
+def _score(profile, proximity):
+    rating = Cast(f'{profile}rating', FloatField()) / 5.0
+    experience = Least(Cast(f'{profile}total_inspections', FloatField()), Value(float(EXPERIENCE_CAP))) / EXPERIENCE_CAP
+    return RATING_WEIGHT * rating + EXPERIENCE_WEIGHT * experience + PROXIMITY_WEIGHT * proximity
+
+
+def ranked(city=None, latitude=None, longitude=None, areas=None):
+    """Agents with a service area near the location, best first, as values() rows.
+
+    Returns None when neither a city nor coordinates are given.
+    """
+    key = city_key(city)
+    near = Q(city_key=key) if key else Q()
+    in_city = Case(When(city_key=key, then=Value(1.0)), default=Value(0.0)) if key else Value(0.0)
+    proximity, distance = in_city, Value(None, output_field=FloatField())
+    if latitude is not None and longitude is not None:
+        lat, lng = float(latitude), float(longitude)
+        radius = settings.AGENT_SEARCH_RADIUS_KM
+        lng_scale = KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01)
+        near |= Q(
+            latitude__range=(lat - radius / KM_PER_DEGREE, lat + radius / KM_PER_DEGREE),
+            longitude__range=(lng - radius / lng_scale, lng + radius / lng_scale),
+        )
+        dy = (F('latitude') - lat) * KM_PER_DEGREE
+        dx = (F('longitude') - lng) * lng_scale
+        distance = Sqrt(dx * dx + dy * dy)
+        proximity = Greatest(in_city, Coalesce(Greatest(Value(0.0), Value(1.0) - distance / radius), Value(0.0)))
+    if not near:
+        return None
+    areas = AgentServiceArea.objects.all() if areas is None else areas
+    return (
+        areas.filter(near, agent__is_active=True, agent__profile__role__in=AGENT_ROLES)
+        .values(
+            'agent_id', username=F('agent__username'), rating=F('agent__profile__rating'),
+            total_inspections=F('agent__profile__total_inspections'), is_verified=F('agent__profile__is_verified'),
+        )
+        .annotate(proximity=Max(proximity, output_field=FloatField()), distance_km=Min(distance))
+        .annotate(score=_score('agent__profile__', F('proximity')))
+        .order_by('-score', 'agent_id')
+    )
+
+
+def directory(city=None, latitude=None, longitude=None, limit=20):
+    """Agents for the directory: ranked near a location, or by rating then experience."""
+    rows = ranked(city, latitude, longitude)
+    if rows is None:
+        # No location: the (role, -rating, -total_inspections) index order.
+        rows = (
+            UserProfile.objects.filter(role__in=AGENT_ROLES, user__is_active=True)
+            .order_by('-rating', '-total_inspections', 'user_id')
+            .values(
+                'rating', 'total_inspections', 'is_verified', agent_id=F('user_id'), username=F('user__username'),
+            )
+            .annotate(distance_km=Value(None, output_field=FloatField()), score=_score('', Value(0.0)))
+        )
+    return list(rows[:limit])
+
+
+def _booked(inspection):
+    """The other pending/confirmed inspections on the inspection's date."""
+    return Inspection.objects.filter(
+        preferred_date=inspection.preferred_date, status__in=ACTIVE_INSPECTIONS,
+    ).exclude(pk=inspection.pk)
+
+
+def best_available_agent(inspection, exclude=()):
+    """The best-ranked agent free on the inspection's date and time, in one query; None if nobody is."""
+    prop = inspection.property
+    booked = _booked(inspection).filter(agent=OuterRef('agent_id'))
+    day_load = booked.order_by().values('agent').annotate(total=Count('id')).values('total')
+    available = (
+        AgentServiceArea.objects.exclude(agent_id__in=[inspection.requester_id, prop.owner_id, *exclude])
+        .alias(day_load=Coalesce(Subquery(day_load), 0))
+        .filter(day_load__lt=settings.AGENT_MAX_DAILY_INSPECTIONS)
+        .exclude(Exists(booked.filter(preferred_time=inspection.preferred_time)))
+    )
+    rows = ranked(prop.city, prop.latitude, prop.longitude, areas=available)
+    best = rows.first() if rows is not None else None
+    return best['agent_id'] if best else None
+
+
+def _has_slot(agent_id, inspection):
+    times = list(_booked(inspection).filter(agent_id=agent_id).values_list('preferred_time', flat=True))
+    return len(times) < settings.AGENT_MAX_DAILY_INSPECTIONS and inspection.preferred_time not in times
+
+
+def assign(inspection):
+    """Assign the best available agent to an unassigned inspection; returns the agent's id or None.
+
+    The ranking query runs unlocked. The chosen agent's profile row is then
+    locked while their day is checked again, so assignments to one agent run
+    one at a time; if the slot went meanwhile, the next agent is tried.
+    """
+    taken = set()
+    for _attempt in range(ASSIGN_ATTEMPTS):
+        agent_id = best_available_agent(inspection, exclude=taken)
+        if agent_id is None:
+            return None
+        with write_atomic():
+            list(UserProfile.objects.select_for_update().filter(user_id=agent_id).values_list('pk', flat=True))
+            if not _has_slot(agent_id, inspection):
+                taken.add(agent_id)
+                continue
+            if not Inspection.objects.filter(pk=inspection.pk, agent__isnull=True).update(agent_id=agent_id):
+                return None
+            Notification.objects.create(
+                user_id=agent_id,
+                notification_type=Notification.NotificationType.INSPECTION_REQUEST,
+                title='New inspection assigned',
+                message=f"Inspection of {inspection.property.title} on {inspection.preferred_date} at {inspection.preferred_time}.",
+                related_property_id=inspection.property_id,
+                related_inspection_id=inspection.pk,
+            )
+        inspection.agent_id = agent_id
+        return agent_id
+    return None
+
+
+def _assign_in_thread(inspection_id):
+    close_old_connections()
+    try:
+        inspection = Inspection.objects.select_related('property').filter(pk=inspection_id, agent__isnull=True).first()
+        return assign(inspection) if inspection is not None else None
+    except DatabaseError:
+        # The owner can still assign from the inspection.
+        logger.exception('Could not assign an agent to inspection %s', inspection_id)
+        return None
+    finally:
+        close_old_connections()
+
+
+def assign_later(inspection_id):
+    """Assign an agent to the inspection on a background thread; returns the Future."""
+    return _executor.submit(_assign_in_thread, inspection_id)
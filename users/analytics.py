@@ -0,0 +1,290 @@
+"""
+Listing analytics: an append-only event log rolled up into time buckets.
+
+``record()`` logs a view, save, inspection request or message for a listing
+once the surrounding transaction commits. Events are buffered per process
+and written with one bulk INSERT by a background thread, as soon as
+ANALYTICS_BUFFER_SIZE events are waiting and otherwise once the oldest is
+ANALYTICS_FLUSH_SECONDS old, and at exit. Requests only append to the
+buffer, so analytics never slow down or fail the request that produced
+them. A failed flush puts its events back to be retried after another
+ANALYTICS_FLUSH_SECONDS, keeping at most MAX_BUFFERED_BATCHES batches'
+worth; past that the oldest are dropped and logged.
+
+``rollup()`` (``manage.py rollup_analytics``) reads events past its
+JobWatermark in id order, a chunk at a time. It adds their counts to the
+hourly and daily ListingStats rows in the same transaction that advances
+the watermark, so each event is counted exactly once. Ids are handed out
+when a row is inserted but become visible when its transaction commits, so
+a missing id may be an insert that has not committed yet: the rollup stops
+at the first gap in the ids and only steps over it once it has been there
+for ANALYTICS_ROLLUP_GAP_SECONDS (rolled-back and dropped inserts leave
+gaps that never fill). Run one rollup at a time, e.g. from cron every few
+minutes. The owner dashboard reads only ListingStats.
+"""
+import atexit
+import datetime
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import (DatabaseError, close_old_connections, connections,
+                       router, transaction)
+from django.utils import timezone
+
+from inndoor_be.db_backends.sqlite3.base import write_atomic
+from inndoor_be.workers import reset_after_fork
+
+from .models import JobWatermark, ListingEvent, ListingStats, Property
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_JOB = 'rollup_analytics'
+# The first id after the gap the rollup is waiting on; updated_at is when it was first seen.
+GAP_JOB = 'rollup_analytics:gap'
+COUNTERS = {
+    ListingEvent.EventType.VIEW: 'views',
+    ListingEvent.EventType.SAVE: 'saves',
+    ListingEvent.EventType.INSPECTION_REQUEST: 'inspection_requests',
+    ListingEvent.EventType.MESSAGE: 'messages',
+}
+# Events kept through failed flushes, in batches of ANALYTICS_BUFFER_SIZE.
+MAX_BUFFERED_BATCHES = 10
+
+
+class EventBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._oldest = None
+        # After a failed flush, the next attempt waits until then.
+        self._retry_at = 0.0
+        # Set when the flusher should look at the buffer again.
+        self._wake = threading.Event()
+        self._flusher = None
+
+    def add(self, event):
+        with self._lock:
+            self._events.append(event)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            elif len(self._events) < settings.ANALYTICS_BUFFER_SIZE:
+                return
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_when_due, name='analytics-flush', daemon=True)
+                self._flusher.start()
+        self._wake.set()
+
+    def _due_in(self):
+        """Seconds until the buffer should be written, or None while it is empty."""
+        with self._lock:
+            if self._oldest is None:
+                return None
+            now = time.monotonic()
+            if len(self._events) >= settings.ANALYTICS_BUFFER_SIZE:
+                due_in = 0.0
+            else:
+                due_in = self._oldest + settings.ANALYTICS_FLUSH_SECONDS - now
+            return max(due_in, self._retry_at - now)
+
+    def _flush_when_due(self):
+        while True:
+            # Cleared before reading the buffer, so an add() after the read
+            # wakes the wait below.
+            self._wake.clear()
+            due_in = self._due_in()
+            if due_in is not None and due_in <= 0:
+                close_old_connections()
+                try:
+                    self.flush()
+                finally:
+                    close_old_connections()
+                continue
+            self._wake.wait(due_in)
+
+    def flush(self):
+        with self._lock:
+            events, oldest = self._events, self._oldest
+            self._events, self._oldest = [], None
+        if not events:
+            return 0
+        try:
+            ListingEvent.objects.bulk_create(events, batch_size=500)
+        except DatabaseError:
+            logger.exception('Could not write %d listing events; will retry', len(events))
+            self._requeue(events, oldest)
+            return 0
+        return len(events)
+
+    def _requeue(self, events, oldest):
+        limit = MAX_BUFFERED_BATCHES * settings.ANALYTICS_BUFFER_SIZE
+        with self._lock:
+            # Ahead of anything added meanwhile, which is newer.
+            self._events[:0] = events
+            self._oldest = oldest
+            self._retry_at = time.monotonic() + settings.ANALYTICS_FLUSH_SECONDS
+            dropped = len(self._events) - limit
+            if dropped > 0:
+                del self._events[:dropped]
+        if dropped > 0:
+            logger.error('Dropped %d listing events', dropped)
+
+    def pending(self):
+        with self._lock:
+            return len(self._events)
+
+
+buffer = EventBuffer()
+
+
+@atexit.register
+def _flush_at_exit():
+    buffer.flush()
+
+
+@reset_after_fork
+def _reset_after_fork():
+    # The parent flushes what it buffered; the child starts empty, with no
+    # flusher thread until its first event.
+    global buffer
+    buffer = EventBuffer()
+
+
+def record(property_id, event_type):
+    """Log ``event_type`` for a listing when the current transaction commits."""
+    if property_id is None:
+        return
+    event = ListingEvent(property_id=property_id, event_type=event_type, created_at=timezone.now())
+    transaction.on_commit(lambda: buffer.add(event))
+
+
+def bucket_start(moment, granularity, tz=None):
+    """Start of the hour or day containing ``moment``, in TIME_ZONE unless ``tz`` is given."""
+    moment = moment.astimezone(tz or timezone.get_default_timezone()).replace(minute=0, second=0, microsecond=0)
+    if granularity == ListingStats.Granularity.DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def _apply(granularity, counts):
+    """Add ``{(property_id, bucket_start): Counter(counter=n)}`` to stored buckets."""
+    existing = {
+        (row[0], row[1]): row[2:]
+        for row in ListingStats.objects.select_for_update().filter(
+            granularity=granularity,
+            property_id__in={property_id for property_id, _start in counts},
+            bucket_start__in={start for _property_id, start in counts},
+        ).values_list('property_id', 'bucket_start', *COUNTERS.values())
+    }
+    rows = []
+    for (property_id, start), added in counts.items():
+        stored = dict(zip(COUNTERS.values(), existing.get((property_id, start), ())))
+        totals = {counter: stored.get(counter, 0) + added[counter] for counter in COUNTERS.values()}
+        rows.append(ListingStats(property_id=property_id, granularity=granularity, bucket_start=start, **totals))
+    # One upsert instead of bulk_update's per-row CASE expressions. MySQL's
+    # ON DUPLICATE KEY UPDATE takes no conflict target and rejects one.
+    conflict = {}
+    if connections[router.db_for_write(ListingStats)].features.supports_update_conflicts_with_target:
+        conflict['unique_fields'] = ['property', 'granularity', 'bucket_start']
+    ListingStats.objects.bulk_create(
+        rows, batch_size=500, update_conflicts=True, update_fields=list(COUNTERS.values()), **conflict,
+    )
+
+
+def _ready(last_id, events):
+    """How many of ``events`` (in id order) can be rolled up: those before the first gap that may still fill."""
+    previous = last_id
+    for position, (pk, *_fields) in enumerate(events):
+        if pk != previous + 1 and not _gap_expired(pk):
+            return position
+        previous = pk
+    return len(events)
+
+
+def _gap_expired(next_id):
+    """Whether the gap before ``next_id`` has been there long enough to step over."""
+    gap, _ = JobWatermark.objects.get_or_create(name=GAP_JOB)
+    if gap.value != str(next_id):
+        gap.value = str(next_id)
+        gap.save(update_fields=['value', 'updated_at'])
+        return False
+    return (timezone.now() - gap.updated_at).total_seconds() >= settings.ANALYTICS_ROLLUP_GAP_SECONDS
+
+
+def rollup(batch_size=5000, max_batches=None):
+    """Add new events to the hourly and daily buckets; returns the number of events read."""
+    watermark, _ = JobWatermark.objects.get_or_create(name=ROLLUP_JOB)
+    last_id = int(watermark.value or 0)
+    tz = timezone.get_default_timezone()
+    rolled = batches = 0
+    while max_batches is None or batches < max_batches:
+        events = list(
+            ListingEvent.objects.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', 'property_id', 'event_type', 'created_at')[:batch_size]
+        )
+        if not events:
+            break
+        # Stop before an id that may still commit; what follows is read next time.
+        ready = _ready(last_id, events)
+        waiting = ready < len(events)
+        events = events[:ready]
+        if not events:
+            break
+        # Events of deleted listings stay in the log but are not counted.
+        live = set(Property.objects.filter(pk__in={event[1] for event in events}).values_list('pk', flat=True))
+        hourly, daily = defaultdict(Counter), defaultdict(Counter)
+        for _pk, property_id, event_type, created_at in events:
+            if property_id not in live:
+                continue
+            counter = COUNTERS[event_type]
+            hour = bucket_start(created_at, ListingStats.Granularity.HOUR, tz)
+            hourly[property_id, hour][counter] += 1
+            daily[property_id, hour.replace(hour=0)][counter] += 1
+
+        last_id = events[-1][0]
+        with write_atomic():
+            if hourly:
+                _apply(ListingStats.Granularity.HOUR, hourly)
+                _apply(ListingStats.Granularity.DAY, daily)
+            watermark.value = str(last_id)
+            watermark.save(update_fields=['value', 'updated_at'])
+        rolled += len(events)
+        batches += 1
+        if waiting:
+            break
+    return rolled
+
+
+def dashboard(properties, granularity, since):
+    """Totals and bucket series for each listing in ``properties`` from ``since`` on."""
+    titles = dict(properties.values_list('pk', 'title'))
+    rows = (
+        ListingStats.objects.filter(property_id__in=list(titles), granularity=granularity, bucket_start__gte=since)
+        .order_by('property_id', 'bucket_start')
+        .values_list('property_id', 'bucket_start', *COUNTERS.values())
+    )
+    series = defaultdict(list)
+    for property_id, start, *counts in rows:
+        series[property_id].append({'bucket_start': start, **dict(zip(COUNTERS.values(), counts))})
+
+    listings = []
+    for property_id, title in sorted(titles.items()):
+        totals = dict.fromkeys(COUNTERS.values(), 0)
+        for bucket in series[property_id]:
+            for counter in totals:
+                totals[counter] += bucket[counter]
+        listings.append({'property': property_id, 'title': title, 'totals': totals, 'series': series[property_id]})
+    return {
+        'granularity': granularity,
+        'since': since,
+        'totals': {counter: sum(listing['totals'][counter] for listing in listings) for counter in COUNTERS.values()},
+        'properties': listings,
+    }
+
+
+def window_start(granularity, periods, now=None):
+    """Start of the bucket ``periods - 1`` hours/days before the current one."""
+    step = datetime.timedelta(hours=1) if granularity == ListingStats.Granularity.HOUR else datetime.timedelta(days=1)
+    return bucket_start((now or timezone.now()) - step * (periods - 1), granularity)
@@ -0,0 +1,141 @@
+"""
+Async variants of the hot read endpoints for the ASGI deployment.
+
+These are plain Django async views rather than DRF views, so a slow client
+holds a coroutine instead of a worker thread. They reuse the DRF viewsets'
+filter backends so responses match the sync endpoints. The async ORM runs
+each query on the request's one database thread, so a view's queries (count,
+facets, page) are simply awaited in turn. Pages are built by the
+``.values()`` serializers in users/read_serializers.py, which fetch their
+rows with async queries, so no sync queries happen on the event loop.
+"""
+from functools import wraps
+
+from django.db.models import Count, Q
+from django.http import HttpResponse, HttpResponseNotAllowed
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import Message, Notification, Property, User
+from .read_serializers import (MessageReadSerializer,
+                               NotificationReadSerializer,
+                               PropertyReadSerializer)
+from .renderers import dumps
+from .serializers import PropertySerializer
+from .views import PropertyViewSet
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def _json(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+async def _authenticate(request):
+    """Return the JWT user for ``request``, or None for anonymous requests.
+
+    Raises InvalidToken for a bad or expired token, like JWTAuthentication.
+    """
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    if header is None:
+        return None
+    raw_token = auth.get_raw_token(header)
+    if raw_token is None:
+        return None
+    token = auth.get_validated_token(raw_token)
+    try:
+        return await User.objects.aget(
+            is_active=True, **{jwt_settings.USER_ID_FIELD: token[jwt_settings.USER_ID_CLAIM]}
+        )
+    except (KeyError, User.DoesNotExist):
+        raise InvalidToken('User not found')
+
+
+def async_get(login_required=False):
+    """Restrict an async view to GET and attach ``request.api_user``."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return HttpResponseNotAllowed(['GET'])
+            try:
+                request.api_user = await _authenticate(request)
+            except (InvalidToken, TokenError) as exc:
+                return _json({'detail': str(exc)}, status=401)
+            if login_required and request.api_user is None:
+                return _json({'detail': 'Authentication credentials were not provided.'}, status=401)
+            try:
+                return await view(request, *args, **kwargs)
+            except ValidationError as exc:
+                return _json(exc.detail, status=400)
+        return wrapper
+    return decorator
+
+
+def _page_bounds(request):
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        offset = max(int(request.GET.get('offset', 0)), 0)
+    except ValueError:
+        raise ValidationError({'detail': 'limit and offset must be integers.'})
+    return offset, offset + limit
+
+
+async def _property_type_facets(queryset):
+    rows = queryset.order_by().values('property_type').annotate(count=Count('id'))
+    return {row['property_type']: row['count'] async for row in rows.aiterator()}
+
+
+@async_get()
+async def property_list(request):
+    drf_request = Request(request)
+    view = PropertyViewSet()
+    queryset = Property.objects.all()
+    for backend in PropertyViewSet.filter_backends:
+        queryset = backend().filter_queryset(drf_request, queryset, view)
+
+    start, end = _page_bounds(request)
+    return _json({
+        'count': await queryset.acount(),
+        'facets': {'property_type': await _property_type_facets(queryset)},
+        'results': await PropertyReadSerializer(queryset[start:end], context={'request': request}).adata(),
+    })
+
+
+@async_get()
+async def property_detail(request, pk):
+    try:
+        prop = await Property.objects.select_related('owner', 'verified_by').prefetch_related('images').aget(pk=pk)
+    except Property.DoesNotExist:
+        return _json({'detail': 'Not found.'}, status=404)
+    return _json(PropertySerializer(prop, context={'request': request}).data)
+
+
+@async_get(login_required=True)
+async def notification_list(request):
+    queryset = Notification.objects.filter(user=request.api_user).order_by('-created_at')
+    start, end = _page_bounds(request)
+    return _json({
+        'count': await queryset.acount(),
+        'unread': await queryset.filter(is_read=False).acount(),
+        'results': await NotificationReadSerializer(queryset[start:end], context={'request': request}).adata(),
+    })
+
+
+@async_get(login_required=True)
+async def message_list(request):
+    user = request.api_user
+    queryset = Message.objects.filter(Q(sender=user) | Q(recipient=user))
+    start, end = _page_bounds(request)
+    return _json({
+        'count': await queryset.acount(),
+        'unread': await queryset.filter(recipient=user, is_read=False).acount(),
+        'results': await MessageReadSerializer(
+            queryset.order_by('-created_at')[start:end], context={'request': request},
+        ).adata(),
+    })
@@ -0,0 +1,148 @@
+"""
+In-memory prefix index for the location autocomplete endpoint.
+
+The distinct cities, states and landmarks of active listings are kept as
+sorted lists of normalised keys, one per kind, next to their listing counts.
+A keystroke is two ``bisect`` calls to find the keys with the typed prefix
+and a top-k pick of their counts; no query touches the database. Answers are
+cached per prefix until the index next changes, so the wide one- and
+two-letter prefixes are only ranked once; saves that leave a listing's
+locations and status alone (a view count, a price) keep the cache.
+Building, background refreshes and signal updates are
+``users.indexes.PropertyIndex``'s, as for ``users.similarity``.
+"""
+import bisect
+import heapq
+from collections import Counter
+
+from inndoor_be.workers import reset_after_fork
+
+from .indexes import PropertyIndex
+from .models import Property
+
+# Answers cached per prefix; the endpoint's largest limit.
+CACHED_RESULTS = 20
+
+KINDS = ('city', 'state', 'landmark')
+FIELDS = ('id', *KINDS, 'status', 'updated_at')
+# Sorts after every key that starts with a given prefix.
+_AFTER_PREFIX = chr(0x10FFFF)
+
+
+def normalise(value):
+    return ' '.join((value or '').split()).lower()
+
+
+def _entries(values):
+    """``(kind, key, spelling)`` for each non-blank location among ``values``."""
+    entries = []
+    for kind, value in zip(KINDS, values):
+        key = normalise(value)
+        if key:
+            entries.append((kind, key, ' '.join(value.split())))
+    return entries
+
+
+class AutocompleteIndex(PropertyIndex):
+    name = 'autocomplete'
+    FIELDS = FIELDS
+    # Swapped in as a whole by build().
+    _state = ('keys', 'totals', 'spellings', 'listings', 'results', 'watermark')
+
+    def _reset(self):
+        super()._reset()
+        # Per kind, ``keys`` holds the sorted normalised values with at least
+        # one active listing and ``totals`` their listing counts, position for
+        # position. ``spellings`` counts the original spellings behind each
+        # (kind, key) so the most common one is shown; ``listings`` records
+        # what each active listing contributed, so an update can take it back
+        # out. ``results`` caches answers until the next change.
+        self.keys = {kind: [] for kind in KINDS}
+        self.totals = {kind: [] for kind in KINDS}
+        self.spellings = {}
+        self.listings = {}
+        self.results = {}
+
+    def load(self, rows):
+        for pk, *values, _status, _updated_at in rows:
+            entries = self.listings[pk] = _entries(values)
+            for kind, key, spelling in entries:
+                self.spellings.setdefault((kind, key), Counter())[spelling] += 1
+        # Sorting once beats inserting one key at a time.
+        for (kind, key), counts in sorted(self.spellings.items()):
+            self.keys[kind].append(key)
+            self.totals[kind].append(sum(counts.values()))
+
+    def _upsert_row(self, row):
+        pk, city, state, landmark, status, _updated_at = row
+        entries = _entries((city, state, landmark)) if status == Property.Status.ACTIVE else None
+        if self.listings.get(pk) == entries:
+            # Nothing the index shows changed; keep the cached answers.
+            return
+        self._discard(pk)
+        if entries is not None:
+            for kind, key, spelling in entries:
+                self._count(kind, key, spelling, 1)
+            self.listings[pk] = entries
+
+    def _discard(self, pk):
+        for kind, key, spelling in self.listings.pop(pk, ()):
+            self._count(kind, key, spelling, -1)
+
+    def _count(self, kind, key, spelling, delta):
+        keys, totals = self.keys[kind], self.totals[kind]
+        position = bisect.bisect_left(keys, key)
+        counts = self.spellings.get((kind, key))
+        if counts is None:
+            counts = self.spellings[kind, key] = Counter()
+            keys.insert(position, key)
+            totals.insert(position, 0)
+        counts[spelling] += delta
+        if counts[spelling] <= 0:
+            del counts[spelling]
+        totals[position] += delta
+        if totals[position] <= 0:
+            del self.spellings[kind, key], keys[position], totals[position]
+        self.results.clear()
+
+    def complete(self, prefix, kind=None, limit=10):
+        """Up to ``limit`` matches for ``prefix``, most listings first.
+
+        Each match is a dict of ``kind``, ``value`` and ``count``.
+        """
+        self.ensure_fresh()
+        prefix = normalise(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            if limit > CACHED_RESULTS:
+                return self._matches(prefix, kind, limit)
+            matches = self.results.get((prefix, kind))
+            if matches is None:
+                matches = self.results[prefix, kind] = self._matches(prefix, kind, CACHED_RESULTS)
+            return matches[:limit]
+
+    def _matches(self, prefix, kind, limit):
+        candidates = []
+        for column in KINDS if kind is None else (kind,):
+            keys, totals = self.keys[column], self.totals[column]
+            low = bisect.bisect_left(keys, prefix)
+            high = bisect.bisect_left(keys, prefix + _AFTER_PREFIX, low)
+            # nlargest keeps ties in key order.
+            for position in heapq.nlargest(limit, range(low, high), key=totals.__getitem__):
+                candidates.append((-totals[position], column, keys[position]))
+        candidates.sort()
+        return [
+            {'kind': column, 'value': self.spellings[column, key].most_common(1)[0][0], 'count': -count}
+            for count, column, key in candidates[:limit]
+        ]
+
+
+index = AutocompleteIndex()
+
+
+@reset_after_fork
+def _reset_after_fork():
+    # The refresh thread does not survive fork; the child builds its own.
+    global index
+    index = AutocompleteIndex()
@@ -0,0 +1,153 @@
+"""
+Batch endpoint: several API calls in one round trip.
+
+The mobile home screen needs /me/, /profiles/, /notifications/,
+/saved-properties/ and /properties/; over a slow network each separate call
+costs a round trip plus JWT decoding and the middleware stack. POST /batch/
+takes a list of sub-requests against the routes in users/urls.py. It
+authenticates the caller once and passes that user to each sub-request.
+Each sub-request's status and body are returned in order.
+
+Consecutive GETs run concurrently on a per-process pool of BATCH_WORKERS
+threads, which keep their database connections between batches like request
+threads do. Any other method waits for the requests before it and runs
+alone, so a write is visible to the reads that follow it. Sub-requests are
+not wrapped in one transaction: each succeeds or fails on its own, exactly
+as if it had been sent separately. With read replicas each sub-request is
+routed by its own method, so a batch of GETs reads replicas, and only a
+batch that wrote pins the caller to the primary.
+"""
+import contextvars
+import io
+import json
+import logging
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections
+from django.http import Http404
+from django.urls import Resolver404, resolve
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from inndoor_be import db_router
+from inndoor_be.workers import BackgroundExecutor
+
+from .serializers import BatchSerializer
+
+logger = logging.getLogger(__name__)
+
+# Environ keys describing the outer request's own query and body.
+_BODY_META = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'QUERY_STRING', 'wsgi.input')
+
+_executor = BackgroundExecutor(lambda: settings.BATCH_WORKERS, thread_name_prefix='batch')
+
+
+def _error(status, detail):
+    return {'status': status, 'body': {'detail': detail}}
+
+
+class BatchView(APIView):
+    permission_classes = [permissions.AllowAny]
+    serializer_class = BatchSerializer
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        subrequests = serializer.validated_data['requests']
+        db_router.route_by_subrequests()
+
+        # Sub-request paths may be given in full (/api/user/me/) or relative
+        # to the API root (me/).
+        self.prefix = request.path[:-len('batch/')]
+        results = []
+        group = []
+        for sub in subrequests:
+            if sub['method'] == 'GET':
+                group.append(sub)
+                continue
+            results.extend(self._run_concurrently(request, group))
+            group = []
+            results.append(self._run(request, sub))
+        results.extend(self._run_concurrently(request, group))
+        return Response({'responses': results})
+
+    def _run_concurrently(self, request, group):
+        if len(group) <= 1:
+            return [self._run(request, sub) for sub in group]
+        # copy_context keeps per-request state (e.g. the replica router's
+        # primary pin) visible in the worker threads.
+        futures = [
+            _executor.submit(contextvars.copy_context().run, self._run_in_thread, request, sub)
+            for sub in group
+        ]
+        return [future.result() for future in futures]
+
+    def _run_in_thread(self, request, sub):
+        # What request_started/request_finished do for a request thread:
+        # reuse the connection within CONN_MAX_AGE, drop it if it broke.
+        close_old_connections()
+        try:
+            return self._run(request, sub)
+        finally:
+            close_old_connections()
+
+    def _run(self, request, sub):
+        path = sub['path']
+        if path.startswith(self.prefix):
+            path = path[len(self.prefix):]
+        path = path.lstrip('/')
+        try:
+            match = resolve('/' + path, urlconf='users.urls')
+        except Resolver404:
+            return _error(404, 'Not found.')
+        if getattr(match.func, 'view_class', None) is BatchView:
+            return _error(400, 'Batch requests cannot be nested.')
+
+        try:
+            response = self._dispatch(request, match, sub, self.prefix + path)
+        except Http404:
+            return _error(404, 'Not found.')
+        except Exception:
+            logger.exception('Batch sub-request %s %s failed', sub['method'], sub['path'])
+            return _error(500, 'Internal server error.')
+
+        if hasattr(response, 'render'):
+            response.render()
+        content = response.content
+        if len(content) > settings.BATCH_MAX_RESPONSE_BYTES:
+            return _error(413, f'Response exceeds {settings.BATCH_MAX_RESPONSE_BYTES} bytes; request it separately.')
+        if response.get('Content-Type', '').startswith('application/json') and content:
+            body = json.loads(content)
+        else:
+            body = content.decode(response.charset or 'utf-8', errors='replace') or None
+        return {'status': response.status_code, 'body': body}
+
+    def _dispatch(self, request, match, sub, path):
+        body = json.dumps(sub['body']).encode() if sub.get('body') is not None else b''
+        environ = {key: value for key, value in request.META.items() if key not in _BODY_META}
+        environ.update({
+            'REQUEST_METHOD': sub['method'],
+            'PATH_INFO': path,
+            'QUERY_STRING': urlencode(sub.get('query') or {}, doseq=True),
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body),
+        })
+        environ.setdefault('wsgi.url_scheme', request.scheme)
+        subrequest = WSGIRequest(environ)
+        if request.user.is_authenticated:
+            # Authenticate once: DRF uses the forced user/token instead of
+            # decoding the JWT again.
+            subrequest.user = request.user
+            subrequest._force_auth_user = request.user
+            subrequest._force_auth_token = request.auth
+
+        view = match.func
+        if iscoroutinefunction(view):
+            view = async_to_sync(view)
+        with db_router.subrequest(subrequest):
+            return view(subrequest, *match.args, **match.kwargs)
@@ -0,0 +1,278 @@
+"""
+Near-duplicate listing detection.
+
+The same flat is often posted several times with a slightly different
+title. Each listing's title, description and normalized address are signed
+twice:
+
+- A MinHash over character shingles (NUM_PERM values), cut into BANDS bands
+  of ROWS values. Each band hashes to a bucket stored in
+  PropertySignatureBand. Two listings that share any bucket become
+  candidates, so a new listing needs only an indexed ``bucket IN (...)``
+  lookup, however many listings exist. With 16 bands of 4 rows, pairs
+  above about 0.5 Jaccard similarity almost always share a bucket.
+- A 64-bit SimHash over words. It ignores word order and catches
+  reshuffled text that MinHash scores lower.
+
+A candidate is flagged (PropertyDuplicate) when the MinHash estimate
+reaches DEDUP_SIMILARITY or the SimHash distance is at most
+DEDUP_SIMHASH_DISTANCE.
+
+Hash coefficients are derived from SEED, so signatures are stable across
+processes and releases. Changing SEED, SHINGLE_SIZE, NUM_PERM or BANDS
+invalidates stored signatures; re-sign with
+``manage.py sign_properties --all``.
+"""
+import hashlib
+import re
+import unicodedata
+import zlib
+from collections import Counter, defaultdict, namedtuple
+from itertools import combinations
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Property, PropertyDuplicate, PropertySignature, PropertySignatureBand
+
+SEED = b'inndoor-dedup-v1'
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Most candidates verified per new listing, best band overlap first.
+MAX_CANDIDATES = 50
+# Buckets shared by more listings than this (boilerplate text) are skipped,
+# both when looking up a new listing's candidates and by the backfill's
+# pairwise pass.
+MAX_BUCKET_SIZE = 100
+
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_MASK64 = (1 << 64) - 1
+
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def _coefficients(name):
+    return np.array(
+        [_hash64(SEED + f':{name}:{i}'.encode()) & 0xFFFFFFFF or 1 for i in range(NUM_PERM)],
+        dtype=np.uint64,
+    )
+
+
+# Universal hashes (a * x + b) mod p over 32-bit shingle hashes; a, b < 2**32
+# keeps every intermediate within uint64.
+_A = _coefficients('a')
+_B = _coefficients('b')
+
+_WORD = re.compile(r'[a-z0-9]+')
+ADDRESS_ABBREVIATIONS = {
+    'street': 'st', 'road': 'rd', 'avenue': 'ave', 'close': 'cl', 'crescent': 'cres',
+    'estate': 'est', 'drive': 'dr', 'lane': 'ln', 'number': 'no', 'opposite': 'opp',
+    'junction': 'jct', 'phase': 'ph', 'block': 'blk',
+}
+
+Signature = namedtuple('Signature', ['content_hash', 'minhash', 'simhash', 'buckets'])
+
+
+def _words(text):
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+    return _WORD.findall(text)
+
+
+def normalize_address(address):
+    return [ADDRESS_ABBREVIATIONS.get(word, word) for word in _words(address)]
+
+
+def _signed(value):
+    # BigIntegerField is signed 64-bit.
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def minhash(text):
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(len(text) - SHINGLE_SIZE + 1, 1))}
+    # crc32 is only the 32-bit input to the universal hashes below.
+    hashes = np.fromiter((zlib.crc32(shingle.encode()) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+    values = (np.outer(_A, hashes) + _B[:, None]) % _PRIME
+    return values.min(axis=1).astype(np.uint32)
+
+
+def simhash(words):
+    weights = Counter(words)
+    if not weights:
+        return 0
+    hashes = np.array([_hash64(word.encode()) for word in weights], dtype=np.uint64)
+    bits = (hashes[:, None] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)
+    votes = np.array(list(weights.values()))[:, None] * (bits.astype(np.int64) * 2 - 1)
+    return sum(1 << int(bit) for bit in np.flatnonzero(votes.sum(axis=0) > 0))
+
+
+def sign(title, description, address):
+    words = _words(title) + _words(description) + normalize_address(address)
+    text = ' '.join(words)
+    signature = minhash(text)
+    buckets = [
+        _signed(_hash64(bytes([band]) + signature[band * ROWS:(band + 1) * ROWS].tobytes()))
+        for band in range(BANDS)
+    ]
+    return Signature(
+        content_hash=hashlib.blake2b(text.encode(), digest_size=16).hexdigest(),
+        minhash=signature,
+        simhash=simhash(words),
+        buckets=buckets,
+    )
+
+
+def similarity(minhash_a, minhash_b):
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return float(np.count_nonzero(minhash_a == minhash_b)) / NUM_PERM
+
+
+def simhash_distance(simhash_a, simhash_b):
+    return bin((simhash_a ^ simhash_b) & _MASK64).count('1')
+
+
+def _is_duplicate(score, distance):
+    return score >= settings.DEDUP_SIMILARITY or distance <= settings.DEDUP_SIMHASH_DISTANCE
+
+
+def _flag(property_id, other_id, score, distance):
+    # The newer listing is flagged as the duplicate of the older one.
+    return PropertyDuplicate(
+        property_id=max(property_id, other_id),
+        duplicate_of_id=min(property_id, other_id),
+        similarity=round(score, 4),
+        simhash_distance=distance,
+    )
+
+
+def _signature_rows(property_id, signature):
+    return (
+        PropertySignature(
+            property_id=property_id,
+            content_hash=signature.content_hash,
+            minhash=signature.minhash.tobytes(),
+            simhash=_signed(signature.simhash),
+        ),
+        [
+            PropertySignatureBand(property_id=property_id, band=band, bucket=bucket)
+            for band, bucket in enumerate(signature.buckets)
+        ],
+    )
+
+
+def find_duplicates(property_id, signature):
+    """Return PropertyDuplicate flags (unsaved) for stored listings matching ``signature``."""
+    others = PropertySignatureBand.objects.exclude(property_id=property_id)
+    # One count per bucket over the bucket index, so a crowded bucket is
+    # never grouped by listing below.
+    buckets = [
+        bucket for bucket, members in (
+            others.filter(bucket__in=signature.buckets).values('bucket')
+            .annotate(members=Count('id')).values_list('bucket', 'members')
+        )
+        if members <= MAX_BUCKET_SIZE
+    ]
+    if not buckets:
+        return []
+    candidates = (
+        others.filter(bucket__in=buckets)
+        .values('property_id')
+        .annotate(hits=Count('id'))
+        .order_by('-hits')
+        .values_list('property_id', flat=True)[:MAX_CANDIDATES]
+    )
+    flags = []
+    rows = PropertySignature.objects.filter(property_id__in=list(candidates)).values_list('property_id', 'minhash', 'simhash')
+    for other_id, other_minhash, other_simhash in rows:
+        score = similarity(signature.minhash, np.frombuffer(other_minhash, dtype=np.uint32))
+        distance = simhash_distance(signature.simhash, other_simhash)
+        if _is_duplicate(score, distance):
+            flags.append(_flag(property_id, other_id, score, distance))
+    return flags
+
+
+def sign_and_flag(prop):
+    """(Re)sign ``prop`` and flag its near-duplicates; returns the new flags."""
+    signature = sign(prop.title, prop.description, prop.address)
+    stored = PropertySignature.objects.filter(property_id=prop.pk).values_list('content_hash', flat=True).first()
+    if stored == signature.content_hash:
+        return []
+    row, bands = _signature_rows(prop.pk, signature)
+    with transaction.atomic():
+        PropertySignatureBand.objects.filter(property_id=prop.pk).delete()
+        row.save()
+        PropertySignatureBand.objects.bulk_create(bands)
+        flags = find_duplicates(prop.pk, signature)
+        PropertyDuplicate.objects.bulk_create(flags, ignore_conflicts=True)
+    return flags
+
+
+def sign_existing(batch_size=1000, resign=False):
+    """Sign listings in bulk (only unsigned ones unless ``resign``); returns the count."""
+    queryset = Property.objects.order_by('pk')
+    if not resign:
+        queryset = queryset.filter(signature__isnull=True)
+    signed = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).values_list('pk', 'title', 'description', 'address')[:batch_size])
+        if not batch:
+            return signed
+        signatures, bands = [], []
+        for pk, title, description, address in batch:
+            row, row_bands = _signature_rows(pk, sign(title, description, address))
+            signatures.append(row)
+            bands.extend(row_bands)
+        ids = [row[0] for row in batch]
+        with transaction.atomic():
+            PropertySignatureBand.objects.filter(property_id__in=ids).delete()
+            PropertySignature.objects.filter(property_id__in=ids).delete()
+            PropertySignature.objects.bulk_create(signatures)
+            PropertySignatureBand.objects.bulk_create(bands)
+        signed += len(batch)
+        last_pk = ids[-1]
+
+
+def flag_all():
+    """Flag every near-duplicate pair among signed listings; returns the number of new flags.
+
+    Pairs come from the band buckets shared by more than one listing, so the
+    work grows with the number of collisions rather than with n squared.
+    """
+    shared = (
+        PropertySignatureBand.objects.values('bucket')
+        .annotate(members=Count('id'))
+        .filter(members__gt=1, members__lte=MAX_BUCKET_SIZE)
+        .values('bucket')
+    )
+    groups = defaultdict(list)
+    for bucket, property_id in (
+        PropertySignatureBand.objects.filter(bucket__in=shared).values_list('bucket', 'property_id').iterator()
+    ):
+        groups[bucket].append(property_id)
+    pairs = {pair for members in groups.values() for pair in combinations(sorted(members), 2)}
+    if not pairs:
+        return 0
+
+    involved = sorted({pk for pair in pairs for pk in pair})
+    signatures = {}
+    for start in range(0, len(involved), 1000):
+        rows = PropertySignature.objects.filter(property_id__in=involved[start:start + 1000])
+        for pk, stored_minhash, stored_simhash in rows.values_list('property_id', 'minhash', 'simhash'):
+            signatures[pk] = (np.frombuffer(stored_minhash, dtype=np.uint32), stored_simhash)
+
+    flags = []
+    for first, second in pairs:
+        (minhash_a, simhash_a), (minhash_b, simhash_b) = signatures[first], signatures[second]
+        score = similarity(minhash_a, minhash_b)
+        distance = simhash_distance(simhash_a, simhash_b)
+        if _is_duplicate(score, distance):
+            flags.append(_flag(first, second, score, distance))
+    existing = PropertyDuplicate.objects.count()
+    PropertyDuplicate.objects.bulk_create(flags, batch_size=1000, ignore_conflicts=True)
+    return PropertyDuplicate.objects.count() - existing
@@ -0,0 +1,20 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.views import exception_handler as drf_exception_handler
+
+from .hashing import HashingUnavailable
+
+
+class ServiceBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-in requests are being processed, try again shortly.'
+    default_code = 'hashing_unavailable'
+    # Sent as Retry-After by DRF's exception handler.
+    wait = 1
+
+
+def exception_handler(exc, context):
+    """DRF's handler, plus a 503 for a saturated password hash pool (users/hashing.py)."""
+    if isinstance(exc, HashingUnavailable):
+        exc = ServiceBusy()
+    return drf_exception_handler(exc, context)
@@ -0,0 +1,107 @@
+"""
+Password hashing on a small, bounded thread pool.
+
+PBKDF2 costs a few hundred milliseconds of CPU per call. Run inline, a burst
+of logins or credential-stuffing attempts occupies every request thread and
+starves listing traffic. OffloadedPBKDF2PasswordHasher (first in
+PASSWORD_HASHERS, so every hash and verify goes through it) instead runs the
+hash on PASSWORD_HASH_WORKERS threads. hashlib releases the GIL while
+hashing, so the pool bounds the CPU spent on hashing per process. Once
+PASSWORD_HASH_QUEUE calls are waiting, further calls raise
+HashingUnavailable straight away rather than queueing behind them; the API's
+exception handler (users/exceptions.py) answers those with a 503.
+
+The encoded format and algorithm name are unchanged, so existing password
+hashes keep verifying.
+"""
+import concurrent.futures
+import threading
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+from inndoor_be.workers import reset_after_fork
+
+
+class HashingUnavailable(Exception):
+    """The hash pool is full or a queued hash timed out."""
+
+
+class HashPool:
+    def __init__(self, workers, max_queue, timeout):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self):
+        return self.workers + self.max_queue
+
+    def load(self):
+        """Fraction of the pool (running plus queued hashes) in use, 0.0 to 1.0."""
+        return min(self._pending / self.capacity, 1.0)
+
+    def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.capacity:
+                self.rejected += 1
+                raise HashingUnavailable()
+            self._pending += 1
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+            executor = self._executor
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._done(None)
+            raise
+        # Released when the hash actually finishes, not when the caller gives
+        # up waiting, so the queue depth reflects real work.
+        future.add_done_callback(self._done)
+        try:
+            return future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            # Not the builtin TimeoutError before Python 3.11.
+            future.cancel()
+            with self._lock:
+                self.rejected += 1
+            raise HashingUnavailable()
+
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+            if future is not None and not future.cancelled():
+                self.completed += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'pending': self._pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
+
+pool = HashPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE,
+    timeout=settings.PASSWORD_HASH_TIMEOUT,
+)
+
+
+@reset_after_fork
+def _reset_after_fork():
+    # Executor threads do not survive fork; the child starts a fresh pool.
+    global pool
+    pool = HashPool(pool.workers, pool.max_queue, pool.timeout)
+
+class OffloadedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    def encode(self, password, salt, iterations=None):
+        return pool.run(super().encode, password, salt, iterations)
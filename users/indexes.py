@@ -0,0 +1,143 @@
+"""
+Per-process in-memory indexes over listings.
+
+``PropertyIndex`` is the shared machinery behind ``users.similarity`` and
+``users.autocomplete``. An index is built lazily, by the first request that
+needs it, and kept current by the Property signals in ``users/signals.py``.
+Changes made by other workers are picked up by polling ``updated_at`` every
+REFRESH_SECONDS, and a full rebuild every REBUILD_SECONDS drops listings they
+deleted. Both run on a background thread while requests keep reading the
+current index; a rebuild loads into a fresh one and swaps it in.
+
+Subclasses name the Property ``FIELDS`` they read (ending with ``status``
+and ``updated_at``) and the attributes in ``_state`` a rebuild swaps, and
+implement ``_reset()``, the ``load()`` hook filling a fresh index from every
+active listing, and ``_upsert_row()``/``_discard()`` for single listings.
+``apply_changes()`` applies the rows a poll read.
+"""
+import datetime
+import logging
+import threading
+import time
+
+from django.db import DatabaseError, connection
+
+from .models import Property
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SECONDS = 30
+REBUILD_SECONDS = 600
+LOAD_CHUNK_SIZE = 5000
+# Polls re-read rows this far behind the newest updated_at seen, for saves
+# whose transaction committed after a later one was polled.
+WATERMARK_OVERLAP = datetime.timedelta(seconds=5)
+
+
+class PropertyIndex:
+    # Names the background thread and the log messages.
+    name = 'property'
+    FIELDS = ('id', 'status', 'updated_at')
+    # Swapped in as a whole by build().
+    _state = ('watermark',)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held for a whole build, so only one runs at a time.
+        self._build_lock = threading.RLock()
+        self._worker = None
+        self.built = False
+        self.last_refresh = self.last_build = 0.0
+        self._reset()
+
+    def _reset(self):
+        # Newest updated_at read from the database; local saves leave it
+        # alone, so a poll never skips another worker's earlier change.
+        self.watermark = None
+
+    def build(self):
+        """Load every active listing into a fresh index, then swap it in."""
+        with self._build_lock:
+            fresh = type(self)()
+            queryset = Property.objects.filter(status=Property.Status.ACTIVE)
+            fresh.load(fresh._noting(queryset.values_list(*self.FIELDS).iterator(chunk_size=LOAD_CHUNK_SIZE)))
+            with self._lock:
+                for name in self._state:
+                    setattr(self, name, getattr(fresh, name))
+                self.built = True
+                self.last_refresh = self.last_build = time.monotonic()
+
+    def load(self, rows):
+        """Fill this fresh, not yet shared, index from the active listings' ``FIELDS`` rows."""
+        for row in rows:
+            self._upsert_row(row)
+
+    def ensure_fresh(self):
+        """Build on first use; afterwards catch up in the background when due."""
+        if not self.built:
+            with self._build_lock:
+                # Concurrent first requests wait for one build.
+                if not self.built:
+                    self.build()
+            return
+        with self._lock:
+            if time.monotonic() - self.last_refresh < REFRESH_SECONDS:
+                return
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self.last_refresh = time.monotonic()
+            self._worker = threading.Thread(target=self._catch_up, name=f'{self.name}-refresh', daemon=True)
+            self._worker.start()
+
+    def _catch_up(self):
+        try:
+            if time.monotonic() - self.last_build >= REBUILD_SECONDS:
+                self.build()
+            else:
+                self.refresh()
+        except DatabaseError:
+            logger.exception('Refreshing the %s index failed', self.name)
+        finally:
+            connection.close()
+
+    def refresh(self):
+        """Apply rows changed since the last build/refresh (e.g. by other workers)."""
+        with self._lock:
+            watermark = self.watermark
+        queryset = Property.objects.all()
+        if watermark is not None:
+            queryset = queryset.filter(updated_at__gte=watermark - WATERMARK_OVERLAP)
+        # Read before taking the lock, so queries never wait on the database.
+        rows = list(queryset.values_list(*self.FIELDS).iterator(chunk_size=LOAD_CHUNK_SIZE))
+        with self._lock:
+            self.apply_changes(self._noting(rows))
+            self.last_refresh = time.monotonic()
+
+    def apply_changes(self, rows):
+        """Apply polled rows, which may be inactive or unchanged; called under the lock."""
+        for row in rows:
+            self._upsert_row(row)
+
+    def upsert(self, prop):
+        if not self.built:
+            return
+        with self._lock:
+            self._upsert_row(tuple(getattr(prop, field) for field in self.FIELDS))
+
+    def remove(self, pk):
+        if not self.built:
+            return
+        with self._lock:
+            self._discard(pk)
+
+    def _noting(self, rows):
+        for row in rows:
+            if self.watermark is None or row[-1] > self.watermark:
+                self.watermark = row[-1]
+            yield row
+
+    def _upsert_row(self, row):
+        raise NotImplementedError
+
+    def _discard(self, pk):
+        raise NotImplementedError
@@ -0,0 +1,85 @@
+"""
+Listing lifecycle: moves ACTIVE listings past their ``expires_on`` to EXPIRED.
+
+Work is done in short keyset-paginated batches over the
+(status, expires_on) index, one transaction per batch, so the job never
+holds locks on more than ``batch_size`` rows. Rows locked by another
+transaction are skipped rather than waited for. A JobWatermark records the
+cutoff date and start time of the last complete run, one that left nothing
+due behind; when nothing new is due since then a rerun costs two index
+probes, so the job is cheap to schedule every minute.
+"""
+import json
+import time
+
+from django.db.models import Q
+from django.utils import timezone
+
+from inndoor_be.db_backends.sqlite3.base import write_atomic
+
+from .models import JobWatermark, Notification, Property
+
+EXPIRE_JOB = 'expire_listings'
+
+
+def _due(today):
+    return Property.objects.filter(status=Property.Status.ACTIVE, expires_on__lt=today)
+
+
+def expire_listings(batch_size=500, today=None, pause=0.0, max_batches=None, force=False):
+    """Expire due listings and notify their owners; returns the number expired."""
+    today = today or timezone.localdate()
+    started = timezone.now()
+    watermark, _ = JobWatermark.objects.get_or_create(name=EXPIRE_JOB)
+    state = json.loads(watermark.value) if watermark.value else {}
+
+    if not force and state.get('cutoff') == today.isoformat():
+        # Same cutoff as the last complete run: only listings changed since
+        # then (e.g. re-activated with a past move-out date) can be due.
+        if not _due(today).filter(updated_at__gte=state['started']).exists():
+            return 0
+
+    expired = batches = 0
+    cursor = None
+    while max_batches is None or batches < max_batches:
+        queryset = _due(today).order_by('expires_on', 'pk')
+        if cursor is not None:
+            queryset = queryset.filter(Q(expires_on__gt=cursor[0]) | Q(expires_on=cursor[0], pk__gt=cursor[1]))
+
+        with write_atomic():
+            batch = list(
+                queryset.select_for_update(skip_locked=True)
+                .values_list('pk', 'expires_on', 'owner_id', 'title')[:batch_size]
+            )
+            if not batch:
+                break
+            ids = [row[0] for row in batch]
+            Property.objects.filter(pk__in=ids).update(status=Property.Status.EXPIRED, updated_at=timezone.now())
+            Notification.objects.bulk_create([
+                Notification(
+                    user_id=owner_id,
+                    notification_type=Notification.NotificationType.LISTING_EXPIRED,
+                    title='Your listing has expired',
+                    message=f"{title} is no longer shown to tenants. Update its dates to list it again.",
+                    related_property_id=pk,
+                )
+                for pk, _expires_on, owner_id, title in batch
+            ])
+
+        expired += len(batch)
+        batches += 1
+        cursor = (batch[-1][1], batch[-1][0])
+        if pause:
+            time.sleep(pause)
+    else:
+        # Stopped by max_batches; leave the watermark so the next run resumes.
+        return expired
+
+    if _due(today).exists():
+        # Rows skipped while locked elsewhere; they may not have changed since
+        # ``started``, so only a full run is sure to see them again.
+        return expired
+
+    watermark.value = json.dumps({'cutoff': today.isoformat(), 'started': started.isoformat()})
+    watermark.save(update_fields=['value', 'updated_at'])
+    return expired
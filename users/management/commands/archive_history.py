@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from users.retention import archive_messages, archive_notifications
+
+
+class Command(BaseCommand):
+    help = 'Move read notifications and old messages into the archive tables, in chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-batches', type=int, default=None, help='Per table.')
+
+    def handle(self, *args, **options):
+        for label, archive in (('notifications', archive_notifications), ('messages', archive_messages)):
+            result = archive(batch_size=options['batch_size'], max_batches=options['max_batches'])
+            self.stdout.write(f"Archived {result['rows']} {label} (~{result['bytes']} bytes reclaimed).")
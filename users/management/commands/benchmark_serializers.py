@@ -0,0 +1,98 @@
+import json
+import statistics
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from users.models import Property, PropertyImage
+from users.read_serializers import PropertyReadSerializer
+from users.renderers import FastJSONRenderer, orjson
+from users.serializers import PropertySerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _seed(count):
+    owner = User.objects.create_user('benchmark-owner', 'owner@benchmark.invalid')
+    properties = Property.objects.bulk_create(
+        Property(
+            owner=owner, title=f'Benchmark flat {i}', description='Two bedroom flat near the market. ' * 8,
+            property_type=Property.PropertyType.FLAT, address=f'{i} Benchmark Street', city='Lagos',
+            state='Lagos', latitude=Decimal('6.524379'), longitude=Decimal('3.379206'), bedrooms=2,
+            bathrooms=2, price=Decimal('850000.00'), status=Property.Status.ACTIVE,
+        )
+        for i in range(count)
+    )
+    PropertyImage.objects.bulk_create(
+        PropertyImage(property=prop, image=f'properties/benchmark/{prop.pk}-{n}.jpg', order=n)
+        for prop in properties
+        for n in range(3)
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare list serialization throughput of PropertySerializer + JSONRenderer '
+        'with PropertyReadSerializer + FastJSONRenderer.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[20, 100], help='Page sizes to measure.')
+        parser.add_argument('--iterations', type=int, default=50, help='Pages rendered per measurement.')
+        parser.add_argument(
+            '--seed', action='store_true',
+            help='Measure against generated listings (three images each) that are rolled back afterwards.',
+        )
+
+    def measure(self, build, renderer, iterations):
+        timings = []
+        for _ in range(iterations):
+            began = time.perf_counter()
+            content = renderer.render(build())
+            timings.append(time.perf_counter() - began)
+        return statistics.median(timings), content
+
+    def run(self, sizes, iterations):
+        queryset = Property.objects.order_by('-pk')
+        available = queryset.count()
+        if available < max(sizes):
+            raise CommandError(f'Only {available} listings in the database; use --seed to generate some.')
+
+        if orjson is None:
+            self.stdout.write('orjson is not installed; FastJSONRenderer uses the stdlib encoder.')
+        elif not settings.FAST_JSON:
+            self.stdout.write('FAST_JSON is off; FastJSONRenderer uses the stdlib encoder.')
+        self.stdout.write(f"{'page':>6}{'ModelSerializer':>18}{'read serializer':>18}{'pages/s before':>16}{'after':>10}{'speedup':>9}")
+        for size in sizes:
+            page = queryset[:size]
+            before, expected = self.measure(
+                lambda: PropertySerializer(page.select_related('owner', 'verified_by').prefetch_related('images'), many=True).data,
+                JSONRenderer(), iterations,
+            )
+            after, content = self.measure(lambda: PropertyReadSerializer(page).data, FastJSONRenderer(), iterations)
+            if json.loads(content) != json.loads(expected):
+                raise CommandError(f'Page size {size}: PropertyReadSerializer output differs from PropertySerializer.')
+            self.stdout.write(
+                f'{size:>6}{before * 1000:>15.2f} ms{after * 1000:>15.2f} ms'
+                f'{1 / before:>16.0f}{1 / after:>10.0f}{before / after:>8.1f}x'
+            )
+
+    def handle(self, *args, **options):
+        sizes, iterations = options['sizes'], max(options['iterations'], 1)
+        if not options['seed']:
+            self.run(sizes, iterations)
+            return
+        try:
+            with transaction.atomic():
+                _seed(max(sizes))
+                self.run(sizes, iterations)
+                raise _Rollback
+        except _Rollback:
+            pass
@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from inndoor_be.db_backends.sqlite3.base import DEFAULT_PRAGMAS, apply_pragmas
+
+SEED_ROWS = 10000
+
+
+def _seed(path):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE listings (id INTEGER PRIMARY KEY, city TEXT, price REAL, views INTEGER)')
+    conn.execute('CREATE INDEX listings_city ON listings (city)')
+    conn.executemany(
+        'INSERT INTO listings (city, price, views) VALUES (?, ?, 0)',
+        ((f'city-{i % 50}', random.uniform(100, 5000)) for i in range(SEED_ROWS)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _worker(path, tuned, seconds, write_ratio, results):
+    # Mirrors what Django does per connection: autocommit, explicit BEGIN for
+    # atomic blocks, 5s driver timeout.
+    conn = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+    if tuned:
+        apply_pragmas(conn, DEFAULT_PRAGMAS)
+    begin = 'BEGIN IMMEDIATE' if tuned else 'BEGIN'
+    reads = writes = locked = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        city = f'city-{random.randrange(50)}'
+        try:
+            if random.random() < write_ratio:
+                # read-then-write transaction, like a write_atomic() block
+                conn.execute(begin)
+                row = conn.execute('SELECT id FROM listings WHERE city = ? LIMIT 1', (city,)).fetchone()
+                conn.execute('UPDATE listings SET views = views + 1 WHERE id = ?', (row[0],))
+                conn.execute('COMMIT')
+                writes += 1
+            else:
+                conn.execute('SELECT id, price FROM listings WHERE city = ? ORDER BY price LIMIT 20', (city,)).fetchall()
+                reads += 1
+        except sqlite3.OperationalError as exc:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            if 'locked' not in str(exc):
+                raise
+            locked += 1
+    conn.close()
+    results.put((reads, writes, locked))
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent read/write throughput of stock vs tuned SQLite settings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent processes, like gunicorn workers.')
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--write-ratio', type=float, default=0.1)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'mode':<8} {'reads/s':>10} {'writes/s':>10} {'locked':>8}")
+        for tuned in (False, True):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.sqlite3')
+                _seed(path)
+                reads, writes, locked = self._run(path, tuned, options)
+            seconds = options['seconds']
+            self.stdout.write(
+                f"{'tuned' if tuned else 'stock':<8} {reads / seconds:>10.0f} {writes / seconds:>10.0f} {locked:>8}"
+            )
+
+    def _run(self, path, tuned, options):
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=_worker,
+                args=(path, tuned, options['seconds'], options['write_ratio'], results),
+            )
+            for _ in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        totals = [0, 0, 0]
+        for _ in processes:
+            for index, value in enumerate(results.get()):
+                totals[index] += value
+        for process in processes:
+            process.join()
+        return totals
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.agents import build_service_areas
+
+
+class Command(BaseCommand):
+    help = "Recompute agents' service areas and completed-inspection counts from their inspections and deals."
+
+    def handle(self, *args, **options):
+        areas = build_service_areas()
+        self.stdout.write(f'Built {areas} agent service areas.')
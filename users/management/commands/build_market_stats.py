@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from users.market_stats import refresh
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-city rent guides served at /api/user/market-stats/ and store them in the cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=None, help='Window of listing creation dates (default MARKET_STATS_MONTHS).')
+
+    def handle(self, *args, **options):
+        summary, _guides = refresh(months=options['months'])
+        listings = sum(row['listings'] for row in summary['cities'])
+        self.stdout.write(f"Built rent guides for {len(summary['cities'])} cities from {listings} listings.")
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from inndoor_be import schema
+
+
+class Command(BaseCommand):
+    help = 'Generate the OpenAPI spec once and store versioned JSON/YAML files in SCHEMA_DIR.'
+
+    def handle(self, *args, **options):
+        manifest = schema.write(schema.generate())
+        self.stdout.write(f"Wrote {manifest['json']} and {manifest['yaml']} to {settings.SCHEMA_DIR} (ETag {manifest['etag']}).")
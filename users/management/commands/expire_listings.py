@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from users.lifecycle import expire_listings
+
+
+class Command(BaseCommand):
+    help = 'Move ACTIVE listings past their expiry date to EXPIRED, in small batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches.')
+        parser.add_argument('--max-batches', type=int, default=None)
+        parser.add_argument('--force', action='store_true', help='Ignore the watermark and rescan.')
+
+    def handle(self, *args, **options):
+        expired = expire_listings(
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            max_batches=options['max_batches'],
+            force=options['force'],
+        )
+        self.stdout.write(f'Expired {expired} listings.')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from users.analytics import rollup
+
+
+class Command(BaseCommand):
+    help = 'Roll new listing events up into the hourly and daily analytics buckets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--max-batches', type=int, default=None)
+
+    def handle(self, *args, **options):
+        rolled = rollup(batch_size=options['batch_size'], max_batches=options['max_batches'])
+        self.stdout.write(f'Rolled up {rolled} listing events.')
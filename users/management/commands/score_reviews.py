@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from users.moderation import score_reviews
+
+
+class Command(BaseCommand):
+    help = 'Compute spam scores for new reviews in chunks, for the moderation queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-batches', type=int, default=None)
+
+    def handle(self, *args, **options):
+        scored = score_reviews(batch_size=options['batch_size'], max_batches=options['max_batches'])
+        self.stdout.write(f'Scored {scored} reviews.')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from users import dedup
+
+
+class Command(BaseCommand):
+    help = 'Compute near-duplicate signatures for existing listings in bulk and flag duplicate pairs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--all', action='store_true', help='Re-sign listings that already have a signature.')
+        parser.add_argument('--no-flag', action='store_true', help='Only sign; skip the duplicate-pair pass.')
+
+    def handle(self, *args, **options):
+        signed = dedup.sign_existing(batch_size=options['batch_size'], resign=options['all'])
+        self.stdout.write(f'Signed {signed} listings.')
+        if not options['no_flag']:
+            flagged = dedup.flag_all()
+            self.stdout.write(f'Flagged {flagged} new duplicate pairs.')
@@ -0,0 +1,211 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter under `python -X importtime`, so every module is
+# imported cold, and prints the phase timings as JSON on its last stdout line.
+BOOT_SCRIPT = r'''
+import io, json, sys, time
+
+start = time.perf_counter()
+import django
+from django.apps.config import AppConfig
+
+app_times = {}
+_create = AppConfig.create.__func__
+
+
+def _timed(label, hook, method):
+    def wrapper(*args, **kwargs):
+        began = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            app_times[label][hook] = time.perf_counter() - began
+    return wrapper
+
+
+def create(cls, entry):
+    began = time.perf_counter()
+    config = _create(cls, entry)
+    app_times[config.label] = {'import': time.perf_counter() - began}
+    config.import_models = _timed(config.label, 'models', config.import_models)
+    config.ready = _timed(config.label, 'ready', config.ready)
+    return config
+
+
+AppConfig.create = classmethod(create)
+
+phases = {}
+mark = time.perf_counter()
+from django.conf import settings
+settings.INSTALLED_APPS
+phases['settings'] = time.perf_counter() - mark
+
+mark = time.perf_counter()
+django.setup(set_prefix=False)
+phases['apps'] = time.perf_counter() - mark
+
+mark = time.perf_counter()
+from django.core.handlers.wsgi import WSGIHandler
+handler = WSGIHandler()
+phases['middleware'] = time.perf_counter() - mark
+
+mark = time.perf_counter()
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1], 'QUERY_STRING': '',
+    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+    'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr,
+}
+statuses = []
+body = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+b''.join(body)
+phases['first_request'] = time.perf_counter() - mark
+
+print(json.dumps({
+    'phases': phases,
+    'total': time.perf_counter() - start,
+    'apps': app_times,
+    'status': statuses[0],
+}))
+'''
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into [(module, self_us, cumulative_us)]."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        modules.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        'Boot the project in fresh interpreters and report time per import, per app '
+        '(import/models/ready) and per phase up to the first request.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/user/properties/', help='URL for the first request.')
+        parser.add_argument('--runs', type=int, default=5, help='Boots per mode; medians are reported.')
+        parser.add_argument('--top', type=int, default=20, help='Number of modules and packages to list.')
+        parser.add_argument(
+            '--compare', action='store_true',
+            help='Profile with LAZY_LOADING off and on and report the difference.',
+        )
+
+    def boot(self, path, lazy):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'inndoor_be.settings'))
+        env['LAZY_LOADING'] = 'True' if lazy else 'False'
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT, path],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f'Boot failed:\n{result.stderr[-2000:]}')
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        report['modules'] = parse_importtime(result.stderr)
+        return report
+
+    def profile(self, path, modes, runs):
+        """Boot ``runs`` times per mode, alternating modes so drift hits both alike."""
+        reports = {lazy: [] for lazy in modes}
+        for _ in range(runs):
+            for lazy in modes:
+                reports[lazy].append(self.boot(path, lazy))
+        return reports
+
+    def median(self, reports):
+        median = {
+            'phases': {
+                phase: statistics.median(report['phases'][phase] for report in reports)
+                for phase in reports[0]['phases']
+            },
+            'total': statistics.median(report['total'] for report in reports),
+            'totals': [report['total'] for report in reports],
+            'apps': {
+                label: {
+                    hook: statistics.median(report['apps'][label].get(hook, 0.0) for report in reports)
+                    for hook in ('import', 'models', 'ready')
+                }
+                for label in reports[0]['apps']
+            },
+            'status': reports[-1]['status'],
+        }
+        modules = defaultdict(list)
+        for report in reports:
+            for name, self_us, cumulative_us in report['modules']:
+                modules[name].append((self_us, cumulative_us))
+        median['modules'] = [
+            (name, statistics.median(s for s, _ in times), statistics.median(c for _, c in times))
+            for name, times in modules.items()
+        ]
+        return median
+
+    def write_report(self, title, report, top):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(f"  first request: {report['status']}")
+        for phase, seconds in report['phases'].items():
+            self.stdout.write(f'  {phase:<16}{seconds * 1000:9.1f} ms')
+        self.stdout.write(
+            f"  {'total':<16}{report['total'] * 1000:9.1f} ms "
+            f"(range {min(report['totals']) * 1000:.1f}-{max(report['totals']) * 1000:.1f})"
+        )
+
+        self.stdout.write('\n  Apps (ms)              import   models    ready')
+        for label, hooks in report['apps'].items():
+            self.stdout.write(
+                f"  {label:<20}{hooks['import'] * 1000:9.1f}{hooks['models'] * 1000:9.1f}{hooks['ready'] * 1000:9.1f}"
+            )
+
+        packages = defaultdict(float)
+        for name, self_us, _cumulative in report['modules']:
+            packages[name.split('.')[0]] += self_us
+        self.stdout.write(f'\n  Top {top} packages by import time (self, ms)')
+        for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f'  {package:<40}{self_us / 1000:9.1f}')
+
+        self.stdout.write(f'\n  Top {top} modules by cumulative import time (ms)')
+        for name, _self_us, cumulative_us in sorted(report['modules'], key=lambda item: -item[2])[:top]:
+            self.stdout.write(f'  {name:<40}{cumulative_us / 1000:9.1f}')
+        self.stdout.write('')
+
+    def handle(self, *args, **options):
+        path, runs, top = options['path'], max(options['runs'], 1), options['top']
+        if not options['compare']:
+            lazy = settings.LAZY_LOADING
+            report = self.median(self.profile(path, [lazy], runs)[lazy])
+            self.write_report(f"LAZY_LOADING={lazy} (median of {runs} boots)", report, top)
+            return
+
+        reports = self.profile(path, [False, True], runs)
+        eager, lazy = self.median(reports[False]), self.median(reports[True])
+        self.write_report(f'LAZY_LOADING=False (median of {runs} boots)', eager, top)
+        self.write_report(f'LAZY_LOADING=True (median of {runs} boots)', lazy, top)
+
+        eager_modules = {name for name, _s, _c in eager['modules']}
+        deferred = eager_modules - {name for name, _s, _c in lazy['modules']}
+        saved = eager['total'] - lazy['total']
+        self.stdout.write(self.style.MIGRATE_HEADING('Difference'))
+        self.stdout.write(f'  modules deferred  {len(deferred)} of {len(eager_modules)}')
+        for phase in eager['phases']:
+            delta = (eager['phases'][phase] - lazy['phases'][phase]) * 1000
+            self.stdout.write(f'  {phase:<16}{delta:9.1f} ms saved')
+        self.stdout.write(
+            f"  time to first request {eager['total'] * 1000:.1f} -> {lazy['total'] * 1000:.1f} ms "
+            f"({saved * 1000:.1f} ms, {saved / eager['total']:.0%} less)"
+        )
+        # Boots were taken in eager/lazy pairs; a gain that holds shows in most pairs.
+        faster = sum(e > z for e, z in zip(eager['totals'], lazy['totals']))
+        self.stdout.write(f'  lazy boot faster  in {faster} of {runs} pairs')
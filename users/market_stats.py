@@ -0,0 +1,299 @@
+"""
+Per-city rent guides: price percentiles, histograms and monthly trends.
+
+``refresh()`` (``manage.py build_market_stats``) reads the city, type,
+bedrooms, month and price of every published listing created in the last
+MARKET_STATS_MONTHS months, a chunk at a time, into NumPy arrays. Every
+statistic is then computed for all groups at once: the rows are sorted by
+(group, price) and each group's percentiles are read from its slice by
+index arithmetic, and the histograms of every city come from one
+``bincount``. There is no per-group query or Python loop over groups.
+
+Results are stored in the default cache, one entry per city plus a summary,
+and recomputed by the command from cron. A worker that finds them older
+than MARKET_STATS_REFRESH_SECONDS also recomputes them, on a background
+thread (one worker at a time); every request, its own included, keeps
+serving the previous results meanwhile. When the cache is empty (cold, flushed or evicted) there
+is nothing to serve meanwhile: one worker recomputes, and the others wait up
+to MARKET_STATS_WAIT_SECONDS for its results before giving up with
+StatsUnavailable, which the API answers with a 503.
+"""
+import datetime
+import logging
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, close_old_connections
+from django.db.models import F
+from django.db.models.functions import ExtractMonth, ExtractYear, Lower, Trim
+from django.utils import timezone
+
+from inndoor_be.workers import BackgroundExecutor
+
+from .models import Property
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'market_stats'
+REFRESH_LOCK = f'{CACHE_PREFIX}:refreshing'
+# Longer than a refresh takes; frees the lock if its holder dies.
+REFRESH_LOCK_SECONDS = 300
+# How often requests waiting on another worker's refresh check the cache.
+WAIT_POLL_SECONDS = 0.1
+LOAD_CHUNK_SIZE = 5000
+# Groups with fewer listings are left out: their percentiles say little.
+MIN_LISTINGS = 3
+# Bedroom counts from this one up are reported together, as this number.
+BEDROOMS_CAP = 5
+HISTOGRAM_BINS = 20
+QUARTILES = (0.25, 0.5, 0.75)
+# Histogram range per city; the few listings outside it go in the end bins.
+HISTOGRAM_RANGE = (0.01, 0.99)
+
+TYPES = Property.PropertyType.values
+# Listings that have been on the market; drafts never were.
+PUBLISHED = (Property.Status.ACTIVE, Property.Status.RENTED, Property.Status.EXPIRED)
+
+_executor = BackgroundExecutor(1, thread_name_prefix='market-stats')
+
+
+class StatsUnavailable(Exception):
+    """The cache is empty and another worker's refresh did not finish in time."""
+
+
+def _summary_key():
+    return f'{CACHE_PREFIX}:cities'
+
+
+def _city_key(key):
+    return f'{CACHE_PREFIX}:city:{key}'
+
+
+def first_month(months, now=None):
+    """Year and month of the first month in the window, as ``year * 12 + month - 1``."""
+    today = timezone.localdate(now)
+    return today.year * 12 + today.month - 1 - (months - 1)
+
+
+def _month_label(month):
+    return f'{month // 12:04d}-{month % 12 + 1:02d}'
+
+
+def _load(since_month):
+    """Column arrays for published listings created from ``since_month`` on, and the city labels."""
+    since = timezone.make_aware(datetime.datetime(since_month // 12, since_month % 12 + 1, 1))
+    rows = (
+        Property.objects.filter(status__in=PUBLISHED, created_at__gte=since)
+        .annotate(
+            city_key=Lower(Trim('city')),
+            month=ExtractYear('created_at') * 12 + ExtractMonth('created_at') - 1,
+        )
+        .exclude(city_key='')
+        .values_list('city_key', F('city'), 'property_type', 'bedrooms', 'month', 'price')
+    )
+    cities, labels = {}, []
+    type_codes = {value: code for code, value in enumerate(TYPES)}
+    columns = {'city': [], 'type': [], 'bedrooms': [], 'month': [], 'price': []}
+    chunk = []
+
+    def pack():
+        # One array per column per chunk; Python touches each row once.
+        columns['city'].append(np.fromiter((cities[row[0]] for row in chunk), np.int32, len(chunk)))
+        columns['type'].append(np.fromiter((type_codes[row[2]] for row in chunk), np.int32, len(chunk)))
+        columns['bedrooms'].append(np.fromiter((row[3] for row in chunk), np.int32, len(chunk)))
+        columns['month'].append(np.fromiter((row[4] for row in chunk), np.int32, len(chunk)))
+        columns['price'].append(np.fromiter((row[5] for row in chunk), np.float64, len(chunk)))
+        chunk.clear()
+
+    for row in rows.iterator(chunk_size=LOAD_CHUNK_SIZE):
+        if row[0] not in cities:
+            cities[row[0]] = len(labels)
+            labels.append((row[0], row[1].strip()))
+        chunk.append(row)
+        if len(chunk) == LOAD_CHUNK_SIZE:
+            pack()
+    if chunk:
+        pack()
+    arrays = {
+        name: np.concatenate(parts) if parts else np.zeros(0, np.float64 if name == 'price' else np.int32)
+        for name, parts in columns.items()
+    }
+    np.minimum(arrays['bedrooms'], BEDROOMS_CAP, out=arrays['bedrooms'])
+    arrays['month'] -= since_month
+    return arrays, labels
+
+
+def grouped_percentiles(groups, prices, quantiles):
+    """Percentiles of ``prices`` within each group, for every group at once.
+
+    Returns the distinct group ids, each group's size and a
+    ``(groups, len(quantiles))`` array, interpolated like ``np.percentile``.
+    """
+    order = np.lexsort((prices, groups))
+    groups, prices = groups[order], prices[order]
+    starts = np.flatnonzero(np.concatenate(([True], groups[1:] != groups[:-1])))
+    sizes = np.diff(np.append(starts, len(groups)))
+    positions = starts[:, None] + np.asarray(quantiles)[None, :] * (sizes[:, None] - 1)
+    below = np.floor(positions).astype(np.int64)
+    above = np.minimum(below + 1, starts[:, None] + sizes[:, None] - 1)
+    values = prices[below] + (prices[above] - prices[below]) * (positions - below)
+    return groups[starts], sizes, values
+
+
+def _histograms(city, prices, city_count):
+    """Log-spaced price bins per city, from one bincount over every listing."""
+    ids, _sizes, bounds = grouped_percentiles(city, prices, HISTOGRAM_RANGE)
+    low = np.zeros(city_count)
+    high = np.zeros(city_count)
+    low[ids], high[ids] = np.log1p(bounds[:, 0]), np.log1p(bounds[:, 1])
+    width = np.where(high > low, high - low, 1.0)
+    bins = np.floor((np.log1p(prices) - low[city]) / width[city] * HISTOGRAM_BINS)
+    bins = np.clip(bins, 0, HISTOGRAM_BINS - 1).astype(np.int64)
+    counts = np.bincount(city * HISTOGRAM_BINS + bins, minlength=city_count * HISTOGRAM_BINS)
+    steps = np.linspace(0.0, 1.0, HISTOGRAM_BINS + 1)
+    edges = np.expm1(low[:, None] + (high - low)[:, None] * steps[None, :])
+    return edges, counts.reshape(city_count, HISTOGRAM_BINS)
+
+
+def _money(value):
+    return round(float(value), 2)
+
+
+def _quartiles(size, values):
+    return {'listings': int(size), 'p25': _money(values[0]), 'median': _money(values[1]), 'p75': _money(values[2])}
+
+
+def compute(months=None, now=None):
+    """Rent guides for every city, as ``(summary, {city_key: guide})``."""
+    months = months or settings.MARKET_STATS_MONTHS
+    since_month = first_month(months, now)
+    data, labels = _load(since_month)
+    city, prices = data['city'], data['price']
+    city_count = len(labels)
+    guides = {
+        key: {
+            'city': label, 'listings': 0, 'p25': None, 'median': None, 'p75': None,
+            'histogram': None, 'groups': [], 'trend': [], 'trend_by_type': {},
+        }
+        for key, label in labels
+    }
+    if city_count:
+        ids, sizes, values = grouped_percentiles(city, prices, QUARTILES)
+        for code, size, row in zip(ids.tolist(), sizes, values):
+            guides[labels[code][0]].update(_quartiles(size, row))
+
+        edges, counts = _histograms(city, prices, city_count)
+        for code, (key, _label) in enumerate(labels):
+            guides[key]['histogram'] = {
+                'edges': [_money(edge) for edge in edges[code]], 'counts': counts[code].tolist(),
+            }
+
+        # Group ids pack (city, type, bedrooms) and (city, [type,] month)
+        # into one integer each, so a single sort covers every group.
+        type_count, bedroom_count = len(TYPES), BEDROOMS_CAP + 1
+        groups = (city * type_count + data['type']) * bedroom_count + data['bedrooms']
+        ids, sizes, values = grouped_percentiles(groups, prices, QUARTILES)
+        for group, size, row in zip(ids.tolist(), sizes, values):
+            if size >= MIN_LISTINGS:
+                code, rest = divmod(group, type_count * bedroom_count)
+                type_code, bedrooms = divmod(rest, bedroom_count)
+                guides[labels[code][0]]['groups'].append(
+                    {'property_type': TYPES[type_code], 'bedrooms': bedrooms, **_quartiles(size, row)}
+                )
+
+        groups = city * months + data['month']
+        ids, sizes, values = grouped_percentiles(groups, prices, QUARTILES)
+        for group, size, row in zip(ids.tolist(), sizes, values):
+            code, month = divmod(group, months)
+            guides[labels[code][0]]['trend'].append({'month': _month_label(since_month + month), **_quartiles(size, row)})
+
+        groups = (city * type_count + data['type']) * months + data['month']
+        ids, sizes, values = grouped_percentiles(groups, prices, QUARTILES)
+        for group, size, row in zip(ids.tolist(), sizes, values):
+            rest, month = divmod(group, months)
+            code, type_code = divmod(rest, type_count)
+            guides[labels[code][0]]['trend_by_type'].setdefault(TYPES[type_code], []).append(
+                {'month': _month_label(since_month + month), **_quartiles(size, row)}
+            )
+
+    summary = {
+        'computed_at': timezone.now(),
+        'months': months,
+        'cities': sorted(
+            (
+                {'city_key': key, **{field: guide[field] for field in ('city', 'listings', 'p25', 'median', 'p75')}}
+                for key, guide in guides.items()
+            ),
+            key=lambda row: (-row['listings'], row['city_key']),
+        ),
+    }
+    return summary, guides
+
+
+def refresh(months=None):
+    """Recompute every city's guide and store it in the cache; returns the summary and the guides."""
+    summary, guides = compute(months)
+    cache.set_many({_city_key(key): guide for key, guide in guides.items()}, timeout=None)
+    # Written last, so readers never see a summary for guides not yet stored.
+    cache.set(_summary_key(), summary, timeout=None)
+    return summary, guides
+
+
+def _read_cold(read, pick):
+    """``read()`` from an empty cache: one worker refreshes, the others wait for it.
+
+    The worker holding the lock returns ``pick(summary, guides)`` from its
+    refresh; the rest poll ``read()`` until MARKET_STATS_WAIT_SECONDS pass.
+    """
+    deadline = time.monotonic() + settings.MARKET_STATS_WAIT_SECONDS
+    while True:
+        if cache.add(REFRESH_LOCK, True, REFRESH_LOCK_SECONDS):
+            try:
+                # Another worker may have finished between our read and add.
+                value = read()
+                return value if value is not None else pick(*refresh())
+            finally:
+                cache.delete(REFRESH_LOCK)
+        if time.monotonic() >= deadline:
+            raise StatsUnavailable()
+        time.sleep(WAIT_POLL_SECONDS)
+        value = read()
+        if value is not None:
+            return value
+
+
+def _refresh_in_thread():
+    close_old_connections()
+    try:
+        refresh()
+    except DatabaseError:
+        logger.exception('Market stats refresh failed')
+    finally:
+        cache.delete(REFRESH_LOCK)
+        close_old_connections()
+
+
+def summary():
+    """Every city's listing count and quartiles, busiest first, refreshed when stale."""
+    current = cache.get(_summary_key())
+    if current is None:
+        return _read_cold(lambda: cache.get(_summary_key()), lambda summary, _guides: summary)
+    age = (timezone.now() - current['computed_at']).total_seconds()
+    # One worker refreshes, off the request path; the thread frees the lock.
+    if age >= settings.MARKET_STATS_REFRESH_SECONDS and cache.add(REFRESH_LOCK, True, REFRESH_LOCK_SECONDS):
+        _executor.submit(_refresh_in_thread)
+    return current
+
+
+def city_guide(city):
+    """The full guide for ``city`` (any case), or None if it has no listings."""
+    key = city.strip().lower()
+    if not any(row['city_key'] == key for row in summary()['cities']):
+        return None
+    guide = cache.get(_city_key(key))
+    if guide is None:
+        # Evicted from the cache since the last refresh.
+        guide = _read_cold(lambda: cache.get(_city_key(key)), lambda _summary, guides: guides.get(key))
+    return guide
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:48
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0002_alter_property_city_alter_property_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('INSPECTION_REQUEST', 'Inspection Request'), ('INSPECTION_CONFIRMED', 'Inspection Confirmed'), ('MESSAGE_RECEIVED', 'Message Received'), ('DEAL_INITIATED', 'Deal Initiated'), ('PAYMENT_RECEIVED', 'Payment Received'), ('REVIEW_RECEIVED', 'Review Received'), ('PROPERTY_VERIFIED', 'Property Verified'), ('SAVED_SEARCH_MATCH', 'Saved Search Match')], max_length=30),
+        ),
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('city', models.CharField(blank=True, help_text='Stored lower-cased so alert matching can use the index', max_length=100)),
+                ('property_type', models.CharField(blank=True, choices=[('APARTMENT', 'Apartment'), ('FLAT', 'Flat'), ('DUPLEX', 'Duplex'), ('ROOM', 'Room'), ('SELF_CONTAIN', 'Self-contain')], max_length=20)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, validators=[django.core.validators.MinValueValidator(0)])),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, validators=[django.core.validators.MinValueValidator(0)])),
+                ('min_bedrooms', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('is_furnished', models.BooleanField(default=False)),
+                ('has_parking', models.BooleanField(default=False)),
+                ('pets_allowed', models.BooleanField(default=False)),
+                ('is_active', models.BooleanField(default=True)),
+                ('last_notified_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'saved_searches',
+                'indexes': [models.Index(fields=['city', 'property_type', 'is_active'], name='saved_search_match_idx')],
+            },
+        ),
+    ]
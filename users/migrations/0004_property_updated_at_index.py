@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_saved_searches'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='property',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:51
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_expires_on(apps, schema_editor):
+    Property = apps.get_model('users', 'Property')
+    ttl = datetime.timedelta(days=settings.LISTING_TTL_DAYS)
+    rows = Property.objects.filter(expires_on__isnull=True).exclude(move_out_date__isnull=True, available_from__isnull=True)
+    batch = []
+    for pk, move_out_date, available_from in rows.values_list('pk', 'move_out_date', 'available_from').iterator(chunk_size=2000):
+        batch.append(Property(pk=pk, expires_on=move_out_date or available_from + ttl))
+        if len(batch) == 2000:
+            Property.objects.bulk_update(batch, ['expires_on'])
+            batch = []
+    Property.objects.bulk_update(batch, ['expires_on'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_property_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('value', models.CharField(blank=True, max_length=255)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'job_watermarks',
+            },
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='expires_on',
+            field=models.DateField(blank=True, editable=False, help_text='Derived from move_out_date, or available_from + LISTING_TTL_DAYS', null=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('INSPECTION_REQUEST', 'Inspection Request'), ('INSPECTION_CONFIRMED', 'Inspection Confirmed'), ('MESSAGE_RECEIVED', 'Message Received'), ('DEAL_INITIATED', 'Deal Initiated'), ('PAYMENT_RECEIVED', 'Payment Received'), ('REVIEW_RECEIVED', 'Review Received'), ('PROPERTY_VERIFIED', 'Property Verified'), ('SAVED_SEARCH_MATCH', 'Saved Search Match'), ('LISTING_EXPIRED', 'Listing Expired')], max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['status', 'expires_on'], name='property_status_expiry_idx'),
+        ),
+        migrations.RunPython(backfill_expires_on, migrations.RunPython.noop),
+    ]
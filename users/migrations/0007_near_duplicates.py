@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_archive_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertySignature',
+            fields=[
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='users.property')),
+                ('content_hash', models.CharField(help_text='Digest of the normalized text that was signed', max_length=32)),
+                ('minhash', models.BinaryField()),
+                ('simhash', models.BigIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'property_signatures',
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertySignatureBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signature_bands', to='users.property')),
+            ],
+            options={
+                'db_table': 'property_signature_bands',
+                'indexes': [models.Index(fields=['bucket'], name='signature_band_bucket_idx')],
+                'unique_together': {('property', 'band')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertyDuplicate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('similarity', models.FloatField(help_text='Estimated Jaccard similarity of the listing text')),
+                ('simhash_distance', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('duplicate_of', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.property')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_flags', to='users.property')),
+            ],
+            options={
+                'db_table': 'property_duplicates',
+                'ordering': ['-similarity'],
+                'unique_together': {('property', 'duplicate_of')},
+            },
+        ),
+    ]
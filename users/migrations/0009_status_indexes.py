@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_review_moderation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='deal',
+            name='status',
+            field=models.CharField(choices=[('INITIATED', 'Initiated'), ('PENDING_PAYMENT', 'Pending payment'), ('PAID', 'Paid'), ('COMPLETED', 'Completed'), ('CANCELLED', 'Cancelled')], db_index=True, default='INITIATED', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='inspection',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('COMPLETED', 'Completed'), ('CANCELLED', 'Cancelled'), ('NO_SHOW', 'No show')], db_index=True, default='PENDING', max_length=10),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_status_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('VIEW', 'View'), ('SAVE', 'Save'), ('INSPECTION_REQUEST', 'Inspection Request'), ('MESSAGE', 'Message')], max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('property', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='users.property')),
+            ],
+            options={
+                'db_table': 'listing_events',
+            },
+        ),
+        migrations.CreateModel(
+            name='ListingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('HOUR', 'Hour'), ('DAY', 'Day')], max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('saves', models.PositiveIntegerField(default=0)),
+                ('inspection_requests', models.PositiveIntegerField(default=0)),
+                ('messages', models.PositiveIntegerField(default=0)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='users.property')),
+            ],
+            options={
+                'verbose_name_plural': 'Listing stats',
+                'db_table': 'listing_stats',
+                'unique_together': {('property', 'granularity', 'bucket_start')},
+            },
+        ),
+    ]
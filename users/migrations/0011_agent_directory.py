@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0010_listing_analytics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentServiceArea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city_key', models.CharField(help_text='Lower-cased, trimmed city name', max_length=100)),
+                ('city', models.CharField(max_length=100)),
+                ('state', models.CharField(blank=True, max_length=100)),
+                ('latitude', models.FloatField(blank=True, help_text='Centre of the listings the agent handled here', null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('jobs', models.PositiveIntegerField(default=0, help_text='Inspections and deals handled in this city')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'agent_service_areas',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='inspection',
+            index=models.Index(fields=['agent', 'preferred_date'], name='inspection_agent_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['role', '-rating', '-total_inspections'], name='profile_agent_rank_idx'),
+        ),
+        migrations.AddField(
+            model_name='agentservicearea',
+            name='agent',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='service_areas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='agentservicearea',
+            index=models.Index(fields=['city_key'], name='agent_area_city_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agentservicearea',
+            index=models.Index(fields=['latitude', 'longitude'], name='agent_area_location_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='agentservicearea',
+            unique_together={('agent', 'city_key')},
+        ),
+    ]
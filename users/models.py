@@ -1,8 +1,11 @@
+import datetime
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import (MaxValueValidator, MinValueValidator,
                                     RegexValidator)
 from django.db import models
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -39,6 +42,7 @@ class UserProfile(models.Model):
 
 	class Meta:
 		db_table = 'user_profiles'
+		indexes = [models.Index(fields=['role', '-rating', '-total_inspections'], name='profile_agent_rank_idx')]
 
 	def __str__(self):
 		return f"{self.user.get_full_name() or self.user.username} ({self.role})"
@@ -85,16 +89,32 @@ class Property(models.Model):
 	verified_at = models.DateTimeField(blank=True, null=True)
 	verified_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='verified_properties', blank=True, null=True)
 	created_at = models.DateTimeField(auto_now_add=True)
-	updated_at = models.DateTimeField(auto_now=True)
+	updated_at = models.DateTimeField(auto_now=True, db_index=True)
+	expires_on = models.DateField(blank=True, null=True, editable=False, help_text='Derived from move_out_date, or available_from + LISTING_TTL_DAYS')
 
 	class Meta:
 		db_table = 'properties'
 		ordering = ['-created_at']
 		verbose_name_plural = 'Properties'
+		indexes = [models.Index(fields=['status', 'expires_on'], name='property_status_expiry_idx')]
 
 	def __str__(self):
 		return f"{self.title} - {self.city} ({self.status})"
 
+	def compute_expires_on(self):
+		if self.move_out_date:
+			return self.move_out_date
+		if self.available_from:
+			return self.available_from + datetime.timedelta(days=settings.LISTING_TTL_DAYS)
+		return None
+
+	def save(self, *args, **kwargs):
+		self.expires_on = self.compute_expires_on()
+		update_fields = kwargs.get('update_fields')
+		if update_fields is not None and {'move_out_date', 'available_from'} & set(update_fields):
+			kwargs['update_fields'] = {*update_fields, 'expires_on'}
+		super().save(*args, **kwargs)
+
 
 class PropertyImage(models.Model):
 	property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='images')
@@ -126,7 +146,7 @@ class Inspection(models.Model):
 	preferred_date = models.DateField()
 	preferred_time = models.TimeField()
 	confirmed_datetime = models.DateTimeField(blank=True, null=True)
-	status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+	status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING, db_index=True)
 	requester_notes = models.TextField(blank=True)
 	agent_notes = models.TextField(blank=True)
 	confirmed_by_tenant = models.BooleanField(default=False)
@@ -136,6 +156,7 @@ class Inspection(models.Model):
 
 	class Meta:
 		db_table = 'inspections'
+		indexes = [models.Index(fields=['agent', 'preferred_date'], name='inspection_agent_date_idx')]
 
 	def __str__(self):
 		return f"Inspection for {self.property.title} by {self.requester.username} on {self.preferred_date} {self.preferred_time}"
@@ -157,7 +178,7 @@ class Deal(models.Model):
 	commission_amount = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(0)])
 	owner_commission = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(0)])
 	agent_commission = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(0)])
-	status = models.CharField(max_length=20, choices=Status.choices, default=Status.INITIATED)
+	status = models.CharField(max_length=20, choices=Status.choices, default=Status.INITIATED, db_index=True)
 	lease_start_date = models.DateField(blank=True, null=True)
 	lease_end_date = models.DateField(blank=True, null=True)
 	payment_reference = models.CharField(max_length=255, blank=True)
@@ -177,6 +198,11 @@ class Review(models.Model):
 		PROPERTY = 'PROPERTY', 'Property'
 		USER = 'USER', 'User'
 
+	class ModerationStatus(models.TextChoices):
+		PENDING = 'PENDING', 'Pending'
+		APPROVED = 'APPROVED', 'Approved'
+		FLAGGED = 'FLAGGED', 'Flagged'
+
 	reviewer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='given_reviews')
 	review_type = models.CharField(max_length=10, choices=ReviewType.choices)
 	property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='reviews', blank=True, null=True)
@@ -187,11 +213,19 @@ class Review(models.Model):
 	is_verified_stay = models.BooleanField(default=False)
 	is_flagged = models.BooleanField(default=False)
 	flag_reason = models.TextField(blank=True)
+	moderation_status = models.CharField(max_length=10, choices=ModerationStatus.choices, default=ModerationStatus.PENDING)
+	spam_score = models.FloatField(blank=True, null=True, help_text='0-1, set in batches by `manage.py score_reviews`')
+	scored_at = models.DateTimeField(blank=True, null=True)
+	moderated_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='moderated_reviews', blank=True, null=True)
+	moderated_at = models.DateTimeField(blank=True, null=True)
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
 
 	class Meta:
 		db_table = 'reviews'
+		# The moderation queue (status = PENDING ordered by spam_score desc)
+		# is a range scan of this index.
+		indexes = [models.Index(fields=['moderation_status', '-spam_score', '-id'], name='review_moderation_queue_idx')]
 		constraints = [
 			models.UniqueConstraint(fields=['reviewer', 'property'], name='unique_reviewer_property', condition=models.Q(property__isnull=False)),
 			models.UniqueConstraint(fields=['reviewer', 'reviewed_user'], name='unique_reviewer_user', condition=models.Q(reviewed_user__isnull=False)),
@@ -214,6 +248,7 @@ class Message(models.Model):
 
 	class Meta:
 		db_table = 'messages'
+		indexes = [models.Index(fields=['created_at'], name='message_created_idx')]
 
 	def __str__(self):
 		return f"Message from {self.sender.username} to {self.recipient.username} ({'read' if self.is_read else 'unread'})"
@@ -228,6 +263,8 @@ class Notification(models.Model):
 		PAYMENT_RECEIVED = 'PAYMENT_RECEIVED', 'Payment Received'
 		REVIEW_RECEIVED = 'REVIEW_RECEIVED', 'Review Received'
 		PROPERTY_VERIFIED = 'PROPERTY_VERIFIED', 'Property Verified'
+		SAVED_SEARCH_MATCH = 'SAVED_SEARCH_MATCH', 'Saved Search Match'
+		LISTING_EXPIRED = 'LISTING_EXPIRED', 'Listing Expired'
 
 	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
 	notification_type = models.CharField(max_length=30, choices=NotificationType.choices)
@@ -242,6 +279,7 @@ class Notification(models.Model):
 
 	class Meta:
 		db_table = 'notifications'
+		indexes = [models.Index(fields=['is_read', 'created_at'], name='notification_read_created_idx')]
 
 	def __str__(self):
 		return f"Notification for {self.user.username}: {self.title}"
@@ -259,3 +297,208 @@ class SavedProperty(models.Model):
 	def __str__(self):
 		return f"{self.user.username} saved {self.property.title}"
 
+
+class SavedSearch(models.Model):
+	"""Search criteria a tenant wants alerts for when a matching listing goes ACTIVE.
+
+	Blank/null criteria match anything; amenity flags set to True are required.
+	"""
+	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_searches')
+	name = models.CharField(max_length=255, blank=True)
+	city = models.CharField(max_length=100, blank=True, help_text='Stored lower-cased so alert matching can use the index')
+	property_type = models.CharField(max_length=20, choices=Property.PropertyType.choices, blank=True)
+	min_price = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True, validators=[MinValueValidator(0)])
+	max_price = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True, validators=[MinValueValidator(0)])
+	min_bedrooms = models.PositiveSmallIntegerField(blank=True, null=True)
+	is_furnished = models.BooleanField(default=False)
+	has_parking = models.BooleanField(default=False)
+	pets_allowed = models.BooleanField(default=False)
+	is_active = models.BooleanField(default=True)
+	last_notified_at = models.DateTimeField(blank=True, null=True)
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		db_table = 'saved_searches'
+		indexes = [models.Index(fields=['city', 'property_type', 'is_active'], name='saved_search_match_idx')]
+
+	def save(self, *args, **kwargs):
+		self.city = self.city.strip().lower()
+		super().save(*args, **kwargs)
+
+	def __str__(self):
+		return self.name or f"Saved search {self.id}"
+
+
+class JobWatermark(models.Model):
+	"""Progress marker for incremental background jobs (one row per job)."""
+	name = models.CharField(max_length=100, unique=True)
+	value = models.CharField(max_length=255, blank=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		db_table = 'job_watermarks'
+
+	def __str__(self):
+		return f"{self.name}: {self.value}"
+
+
+class ArchivedMessage(models.Model):
+	"""Message moved out of the live ``messages`` table by the retention job.
+
+	Keeps the original id; the property is stored as a plain id because the
+	listing may since have been deleted.
+	"""
+	id = models.BigIntegerField(primary_key=True)
+	sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+	recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+	property_id = models.BigIntegerField(blank=True, null=True)
+	content = models.TextField()
+	attachment = models.FileField(upload_to='messages/attachments/%Y/%m/%d/', blank=True, null=True)
+	is_read = models.BooleanField(default=False)
+	read_at = models.DateTimeField(blank=True, null=True)
+	created_at = models.DateTimeField()
+	archived_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		db_table = 'messages_archive'
+		indexes = [
+			models.Index(fields=['sender', 'created_at'], name='message_archive_sender_idx'),
+			models.Index(fields=['recipient', 'created_at'], name='message_archive_recipient_idx'),
+		]
+
+	def __str__(self):
+		return f"Archived message {self.id}"
+
+
+class ArchivedNotification(models.Model):
+	"""Read notification moved out of the live ``notifications`` table."""
+	id = models.BigIntegerField(primary_key=True)
+	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+	notification_type = models.CharField(max_length=30, choices=Notification.NotificationType.choices)
+	title = models.CharField(max_length=255)
+	message = models.TextField()
+	related_property_id = models.BigIntegerField(blank=True, null=True)
+	related_inspection_id = models.BigIntegerField(blank=True, null=True)
+	related_deal_id = models.BigIntegerField(blank=True, null=True)
+	is_read = models.BooleanField(default=True)
+	read_at = models.DateTimeField(blank=True, null=True)
+	created_at = models.DateTimeField()
+	archived_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		db_table = 'notifications_archive'
+		indexes = [models.Index(fields=['user', 'created_at'], name='notification_archive_user_idx')]
+
+	def __str__(self):
+		return f"Archived notification {self.id}"
+
+
+class PropertySignature(models.Model):
+	"""MinHash and SimHash signatures of a listing's text, for near-duplicate detection."""
+	property = models.OneToOneField(Property, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+	content_hash = models.CharField(max_length=32, help_text='Digest of the normalized text that was signed')
+	minhash = models.BinaryField()
+	simhash = models.BigIntegerField()
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		db_table = 'property_signatures'
+
+	def __str__(self):
+		return f"Signature of property {self.property_id}"
+
+
+class PropertySignatureBand(models.Model):
+	"""One LSH band bucket of a listing's MinHash; listings sharing a bucket are candidates."""
+	property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='signature_bands')
+	band = models.PositiveSmallIntegerField()
+	bucket = models.BigIntegerField()
+
+	class Meta:
+		db_table = 'property_signature_bands'
+		unique_together = ['property', 'band']
+		indexes = [models.Index(fields=['bucket'], name='signature_band_bucket_idx')]
+
+
+class PropertyDuplicate(models.Model):
+	"""A listing flagged as a likely re-post of an earlier one."""
+	property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='duplicate_flags')
+	duplicate_of = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='+')
+	similarity = models.FloatField(help_text='Estimated Jaccard similarity of the listing text')
+	simhash_distance = models.PositiveSmallIntegerField()
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		db_table = 'property_duplicates'
+		unique_together = ['property', 'duplicate_of']
+		ordering = ['-similarity']
+
+	def __str__(self):
+		return f"{self.property_id} duplicates {self.duplicate_of_id} ({self.similarity:.2f})"
+
+
+class ListingEvent(models.Model):
+	"""Append-only log of listing activity, rolled up into ListingStats by ``rollup_analytics``."""
+	class EventType(models.TextChoices):
+		VIEW = 'VIEW', 'View'
+		SAVE = 'SAVE', 'Save'
+		INSPECTION_REQUEST = 'INSPECTION_REQUEST', 'Inspection Request'
+		MESSAGE = 'MESSAGE', 'Message'
+
+	# No constraint and no index: an insert only touches the primary key, and
+	# deleting a listing never has to visit its events.
+	property = models.ForeignKey(Property, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+')
+	event_type = models.CharField(max_length=20, choices=EventType.choices)
+	created_at = models.DateTimeField(default=timezone.now)
+
+	class Meta:
+		db_table = 'listing_events'
+
+	def __str__(self):
+		return f"{self.event_type} on property {self.property_id} at {self.created_at}"
+
+
+class ListingStats(models.Model):
+	"""Event counts for one listing over one hour or one day."""
+	class Granularity(models.TextChoices):
+		HOUR = 'HOUR', 'Hour'
+		DAY = 'DAY', 'Day'
+
+	property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='stats')
+	granularity = models.CharField(max_length=4, choices=Granularity.choices)
+	bucket_start = models.DateTimeField()
+	views = models.PositiveIntegerField(default=0)
+	saves = models.PositiveIntegerField(default=0)
+	inspection_requests = models.PositiveIntegerField(default=0)
+	messages = models.PositiveIntegerField(default=0)
+
+	class Meta:
+		db_table = 'listing_stats'
+		unique_together = ['property', 'granularity', 'bucket_start']
+		verbose_name_plural = 'Listing stats'
+
+	def __str__(self):
+		return f"Property {self.property_id} {self.granularity.lower()} from {self.bucket_start}"
+
+
+class AgentServiceArea(models.Model):
+	"""A city an agent works in, derived from their inspections and deals by ``build_agent_areas``."""
+	agent = models.ForeignKey(User, on_delete=models.CASCADE, related_name='service_areas')
+	city_key = models.CharField(max_length=100, help_text='Lower-cased, trimmed city name')
+	city = models.CharField(max_length=100)
+	state = models.CharField(max_length=100, blank=True)
+	latitude = models.FloatField(blank=True, null=True, help_text='Centre of the listings the agent handled here')
+	longitude = models.FloatField(blank=True, null=True)
+	jobs = models.PositiveIntegerField(default=0, help_text='Inspections and deals handled in this city')
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		db_table = 'agent_service_areas'
+		unique_together = ['agent', 'city_key']
+		indexes = [
+			models.Index(fields=['city_key'], name='agent_area_city_idx'),
+			models.Index(fields=['latitude', 'longitude'], name='agent_area_location_idx'),
+		]
+
+	def __str__(self):
+		return f"Agent {self.agent_id} in {self.city} ({self.jobs} jobs)"
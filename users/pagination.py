@@ -0,0 +1,71 @@
+"""
+Keyset pagination for lists ordered by a descending column with ties.
+
+DRF's CursorPagination positions its cursor on the first ordering column
+only and steps over rows that share that value with an offset, up to
+``offset_cutoff``. A moderation queue with thousands of reviews on the
+same spam score never gets past them. KeysetPagination positions on
+``(value, id)`` instead: each page asks for rows strictly after the last
+one, ``value < v OR (value = v AND id < i)``, which is one range scan of a
+``(column DESC, id DESC)`` index however many rows share a value.
+"""
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only pages ordered by ``('-<column>', '-id')``; the column must be non-null."""
+    page_size = 50
+    ordering = None
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        column = self.ordering[0].lstrip('-')
+        self.request = request
+        queryset = queryset.order_by(*self.ordering)
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            value, pk = self.decode_cursor(encoded)
+            queryset = queryset.filter(Q(**{f'{column}__lt': value}) | Q(**{column: value, 'pk__lt': pk}))
+        rows = list(queryset[:self.page_size + 1])
+        self.next_position = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            self.next_position = (getattr(rows[-1], column), rows[-1].pk)
+        return rows
+
+    def decode_cursor(self, encoded):
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            return value, int(pk)
+        except (binascii.Error, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,199 @@
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import Resolver404, resolve
+
+# In-memory, per-process profile store. Keyed by endpoint name such as
+# "PropertyViewSet.list".
+_lock = threading.Lock()
+_stats = {}
+_stacks = defaultdict(Counter)
+_requests = Counter()
+
+# cProfile can only have one active profiler at a time (on 3.12+ it is backed
+# by sys.monitoring, which is interpreter wide), so concurrent sampled requests
+# simply skip profiling rather than queueing behind each other.
+_cprofile_busy = threading.Lock()
+
+
+def record_cprofile(endpoint, profiler):
+    stats = pstats.Stats(profiler)
+    with _lock:
+        if endpoint in _stats:
+            _stats[endpoint].add(stats)
+        else:
+            _stats[endpoint] = stats
+        _requests[endpoint] += 1
+
+
+def endpoints():
+    with _lock:
+        # A sampled request can finish before the sampler catches a stack.
+        names = set(_stats) | set(_stacks) | set(_requests)
+        return [{'endpoint': name, 'requests': _requests[name]} for name in sorted(names)]
+
+
+def dump_pstats(endpoint):
+    """Serialize aggregated stats in the format read by ``pstats.Stats(path)``."""
+    with _lock:
+        stats = _stats.get(endpoint)
+        if stats is None:
+            return None
+        return marshal.dumps(stats.stats)
+
+
+def dump_collapsed(endpoint):
+    """Return folded stacks ("a;b;c count" per line) for flamegraph tools."""
+    with _lock:
+        stacks = _stacks.get(endpoint)
+        if stacks is None:
+            return None
+        return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+def dump_text(endpoint, limit=50):
+    with _lock:
+        stats = _stats.get(endpoint)
+        if stats is None:
+            return None
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats('cumulative').print_stats(limit)
+        stats.stream = sys.stdout
+        return out.getvalue()
+
+
+def reset(endpoint=None):
+    with _lock:
+        if endpoint is None:
+            _stats.clear()
+            _stacks.clear()
+            _requests.clear()
+        else:
+            _stats.pop(endpoint, None)
+            _stacks.pop(endpoint, None)
+            _requests.pop(endpoint, None)
+
+
+class StackSampler:
+    """Background thread that snapshots the stacks of registered threads.
+
+    Only threads currently serving a sampled request are registered, so idle
+    workers cost nothing beyond the sleeping thread.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.active = {}
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not self.active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, endpoint in list(self.active.items()):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stack = self._fold(frame)
+                    with _lock:
+                        _stacks[endpoint][stack] += 1
+
+    @staticmethod
+    def _fold(frame):
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f'{frame.f_globals.get("__name__", "?")}:{code.co_name}')
+            frame = frame.f_back
+        return ';'.join(reversed(parts))
+
+
+class SamplingProfilerMiddleware:
+    """Profile a random fraction of requests to the configured endpoints.
+
+    Enable with ``PROFILING_ENABLED``; when disabled the middleware removes
+    itself from the chain at startup so there is no per-request cost.
+    ``PROFILING_MODE`` selects ``cprofile`` (deterministic, pstats output) or
+    ``sample`` (statistical stack sampler, collapsed-stack output).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.rate = settings.PROFILING_SAMPLE_RATE
+        self.endpoints = set(settings.PROFILING_ENDPOINTS)
+        self.mode = settings.PROFILING_MODE
+        self.sampler = None
+        if self.mode == 'sample':
+            self.sampler = StackSampler(settings.PROFILING_SAMPLE_INTERVAL)
+
+    def __call__(self, request):
+        if random.random() >= self.rate:
+            return self.get_response(request)
+        endpoint = self._endpoint(request)
+        if endpoint is None:
+            return self.get_response(request)
+        if self.sampler is not None:
+            return self._sample(request, endpoint)
+        return self._cprofile(request, endpoint)
+
+    def _endpoint(self, request):
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        # ViewSet.as_view() exposes the viewset class and method->action map.
+        cls = getattr(match.func, 'cls', None)
+        actions = getattr(match.func, 'actions', None) or {}
+        action = actions.get(request.method.lower())
+        if cls is None or action is None:
+            return None
+        name = f'{cls.__name__}.{action}'
+        return name if name in self.endpoints else None
+
+    def _cprofile(self, request, endpoint):
+        if not _cprofile_busy.acquire(blocking=False):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        finally:
+            _cprofile_busy.release()
+        record_cprofile(endpoint, profiler)
+        return response
+
+    def _sample(self, request, endpoint):
+        self.sampler.ensure_started()
+        thread_id = threading.get_ident()
+        self.sampler.active[thread_id] = endpoint
+        try:
+            return self.get_response(request)
+        finally:
+            self.sampler.active.pop(thread_id, None)
+            with _lock:
+                _requests[endpoint] += 1
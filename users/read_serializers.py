@@ -0,0 +1,213 @@
+"""
+Read-only serializers that build response dicts from ``.values()`` rows.
+
+A ModelSerializer instantiates a model object per row, then runs every
+field's ``get_attribute``/``to_representation`` pair, and does the same
+again for each nested object. For list endpoints that is most of the
+response time. These classes reproduce a ModelSerializer's output with
+less work:
+
+- The layout (keys, order, nesting) is read once from ``serializer_class``,
+  so output is identical to the write serializer's and follows it when
+  fields change.
+- Rows come from one ``.values()`` query. Nested foreign keys (``owner``)
+  are joined into that query. Nested reverse relations (``images``) take
+  one extra query per relation, like ``prefetch_related``.
+- Only decimals, dates, datetimes and files are converted per value;
+  everything else is copied from the row as is.
+
+They only support reading: pass a queryset, read ``.data`` (or ``await
+.adata()`` in async views). To paginate, paginate ``rows(queryset)`` and
+pass the page of rows instead, so the page is read once, as rows.
+"""
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .serializers import (MessageSerializer, NotificationSerializer,
+                          PropertySerializer)
+
+# Fields whose representation is the database value itself.
+_AS_IS = (
+    serializers.BooleanField, serializers.CharField, serializers.ChoiceField, serializers.FloatField,
+    serializers.IntegerField, serializers.PrimaryKeyRelatedField, serializers.ReadOnlyField,
+)
+_CONVERTED = (
+    serializers.DateField, serializers.DateTimeField, serializers.DecimalField, serializers.DurationField,
+    serializers.TimeField,
+)
+
+_VALUE, _DATETIME, _FILE, _NESTED, _MANY = range(5)
+
+
+def _is_plain_datetime(field):
+    # DRF looks up the current timezone once per value; for ISO output in the
+    # current timezone the lookup is done once per page instead.
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    return (
+        isinstance(field, serializers.DateTimeField) and not hasattr(field, 'timezone')
+        and output_format is not None and output_format.lower() == ISO_8601
+    )
+
+
+def _iso_datetime(value, tz):
+    # DateTimeField.to_representation with ISO_8601 output.
+    if tz is None:
+        value = timezone.make_naive(value, datetime.timezone.utc) if timezone.is_aware(value) else value
+    else:
+        value = value.astimezone(tz) if timezone.is_aware(value) else timezone.make_aware(value, tz)
+    value = value.isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+class _Layout:
+    """Where each output key of a serializer comes from, for rows joined at ``prefix``.
+
+    ``entries`` holds one ``(key, kind, source, extra)`` per output key, in
+    output order.
+    """
+
+    def __init__(self, serializer, prefix=''):
+        self.model = serializer.Meta.model
+        self.pk = prefix + self.model._meta.pk.attname
+        self.lookups = [self.pk]
+        self.entries = []
+        self.many = []
+
+        for key, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                relation = self.model._meta.get_field(field.source)
+                child = _Layout(field.child)
+                if any(kind in (_NESTED, _MANY) for _key, kind, _source, _extra in child.entries):
+                    raise ImproperlyConfigured(f'{key}: relations below a many relation are not supported.')
+                fk = relation.field.attname
+                self.entries.append((key, _MANY, child, (self.pk, key)))
+                self.many.append((self.pk, key, child, fk))
+            elif isinstance(field, serializers.BaseSerializer):
+                child = _Layout(field, f'{prefix}{field.source}__')
+                self.entries.append((key, _NESTED, child, None))
+                self.lookups.extend(child.lookups)
+                self.many.extend(child.many)
+            elif isinstance(field, serializers.FileField):
+                storage = self.model._meta.get_field(field.source).storage
+                self.entries.append((key, _FILE, prefix + field.source, storage))
+                self.lookups.append(prefix + field.source)
+            elif _is_plain_datetime(field):
+                self.entries.append((key, _DATETIME, prefix + field.source, None))
+                self.lookups.append(prefix + field.source)
+            elif isinstance(field, _CONVERTED + _AS_IS):
+                converter = field.to_representation if isinstance(field, _CONVERTED) else None
+                self.entries.append((key, _VALUE, prefix + field.source, converter))
+                self.lookups.append(prefix + field.source)
+            else:
+                raise ImproperlyConfigured(f'{key}: {type(field).__name__} cannot be built from values() rows.')
+        self.lookups = list(dict.fromkeys(self.lookups))
+
+
+class ValuesSerializer:
+    """Builds ``serializer_class``'s output for a queryset from ``.values()`` rows."""
+    serializer_class = None
+    _layouts = {}
+
+    def __init__(self, queryset, context=None):
+        self.queryset = queryset
+        self.context = context or {}
+
+    @classmethod
+    def layout(cls):
+        if cls not in cls._layouts:
+            cls._layouts[cls] = _Layout(cls.serializer_class())
+        return cls._layouts[cls]
+
+    @classmethod
+    def rows(cls, queryset):
+        """The ``.values()`` queryset the output is built from."""
+        # select_related/prefetch_related are for model instances; the
+        # layout already joins what it needs.
+        return queryset.select_related(None).prefetch_related(None).values(*cls.layout().lookups)
+
+    def _rows(self):
+        # A list is a page already read from ``rows()``.
+        return self.queryset if isinstance(self.queryset, list) else self.rows(self.queryset)
+
+    @staticmethod
+    def _child_rows(child, fk, ids):
+        return child.model._default_manager.filter(**{f'{fk}__in': ids}).values(fk, *child.lookups)
+
+    @staticmethod
+    def _group(rows, fk):
+        grouped = defaultdict(list)
+        for row in rows:
+            grouped[row[fk]].append(row)
+        return grouped
+
+    @property
+    def data(self):
+        layout = self.layout()
+        rows = list(self._rows())
+        children = {}
+        for parent_pk, key, child, fk in layout.many:
+            ids = {row[parent_pk] for row in rows} - {None}
+            children[parent_pk, key] = self._group(self._child_rows(child, fk, ids) if ids else [], fk)
+        return self._build(layout, rows, children)
+
+    async def adata(self):
+        layout = self.layout()
+        rows = self._rows()
+        if not isinstance(rows, list):
+            rows = [row async for row in rows]
+        children = {}
+        for parent_pk, key, child, fk in layout.many:
+            ids = {row[parent_pk] for row in rows} - {None}
+            child_rows = [row async for row in self._child_rows(child, fk, ids)] if ids else []
+            children[parent_pk, key] = self._group(child_rows, fk)
+        return self._build(layout, rows, children)
+
+    def _build(self, layout, rows, children):
+        request = self.context.get('request')
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        return [self._represent(layout, row, children, request, tz) for row in rows]
+
+    def _represent(self, layout, row, children, request, tz):
+        out = {}
+        for key, kind, source, extra in layout.entries:
+            if kind == _VALUE:
+                value = row[source]
+                out[key] = extra(value) if extra is not None and value is not None else value
+            elif kind == _DATETIME:
+                value = row[source]
+                out[key] = None if value is None else _iso_datetime(value, tz)
+            elif kind == _FILE:
+                name = row[source]
+                if not name:
+                    out[key] = None
+                else:
+                    url = extra.url(name)
+                    out[key] = request.build_absolute_uri(url) if request is not None else url
+            elif kind == _NESTED:
+                out[key] = None if row[source.pk] is None else self._represent(source, row, children, request, tz)
+            else:
+                out[key] = [
+                    self._represent(source, child_row, children, request, tz)
+                    for child_row in children[extra].get(row[layout.pk], ())
+                ]
+        return out
+
+
+class PropertyReadSerializer(ValuesSerializer):
+    serializer_class = PropertySerializer
+
+
+class NotificationReadSerializer(ValuesSerializer):
+    serializer_class = NotificationSerializer
+
+
+class MessageReadSerializer(ValuesSerializer):
+    serializer_class = MessageSerializer
@@ -0,0 +1,60 @@
+"""
+Retention for the append-only messages and notifications tables.
+
+Read notifications older than NOTIFICATION_RETENTION_DAYS and messages older
+than MESSAGE_RETENTION_DAYS are copied into the archive tables and deleted
+from the live tables in chunks. Each chunk is one transaction, so the live
+table is never locked for long and a run can stop and resume at any point.
+"""
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from inndoor_be.db_backends.sqlite3.base import write_atomic
+
+from .models import ArchivedMessage, ArchivedNotification, Message, Notification
+
+# Rough per-row overhead (header, ids, timestamps, index entries) added to the
+# payload size when estimating bytes reclaimed.
+ROW_OVERHEAD_BYTES = 64
+
+
+def _row_bytes(row):
+    size = ROW_OVERHEAD_BYTES
+    for value in row.values():
+        if isinstance(value, str):
+            size += len(value.encode())
+    return size
+
+
+def _archive(queryset, archive_model, batch_size, max_batches):
+    attnames = [
+        field.attname for field in archive_model._meta.concrete_fields if field.name != 'archived_at'
+    ]
+    moved = reclaimed = batches = 0
+    while max_batches is None or batches < max_batches:
+        with write_atomic():
+            rows = list(
+                queryset.order_by('pk').select_for_update(skip_locked=True).values(*attnames)[:batch_size]
+            )
+            if not rows:
+                break
+            archive_model.objects.bulk_create([archive_model(**row) for row in rows])
+            queryset.model.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+        moved += len(rows)
+        reclaimed += sum(_row_bytes(row) for row in rows)
+        batches += 1
+    return {'rows': moved, 'bytes': reclaimed}
+
+
+def archive_notifications(batch_size=1000, max_batches=None, now=None):
+    cutoff = (now or timezone.now()) - datetime.timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    queryset = Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+    return _archive(queryset, ArchivedNotification, batch_size, max_batches)
+
+
+def archive_messages(batch_size=1000, max_batches=None, now=None):
+    cutoff = (now or timezone.now()) - datetime.timedelta(days=settings.MESSAGE_RETENTION_DAYS)
+    queryset = Message.objects.filter(created_at__lt=cutoff)
+    return _archive(queryset, ArchivedMessage, batch_size, max_batches)
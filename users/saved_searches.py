@@ -0,0 +1,114 @@
+"""
+Saved-search alerts.
+
+When a listing becomes ACTIVE we look up the saved searches it satisfies and
+notify their owners. Searches are indexed on (city, property_type), their
+most selective predicates, so each listing only checks the candidates for
+its own city/type (plus searches that leave those blank). The remaining
+predicates are checked in the same query.
+
+Alerts follow Property saves through a pre_save/post_save pair in
+users.signals, so listings activated from the admin or a script alert too.
+The fan-out runs on a background thread once the save has committed, not
+in the request that saved the listing.
+"""
+import logging
+
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from inndoor_be.workers import BackgroundExecutor
+
+from .models import Notification, Property, SavedSearch
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_BATCH_SIZE = 500
+
+# One thread: alerts in a process go out one listing at a time.
+_executor = BackgroundExecutor(1, thread_name_prefix='saved-search')
+
+
+def matching_searches(prop):
+    """Saved searches (excluding the lister's own) that ``prop`` satisfies."""
+    city = prop.city.strip().lower()
+    queryset = SavedSearch.objects.filter(
+        is_active=True,
+        city__in=[city, ''],
+        property_type__in=[prop.property_type, ''],
+    ).exclude(user_id=prop.owner_id)
+
+    queryset = queryset.filter(
+        Q(min_price__isnull=True) | Q(min_price__lte=prop.price),
+        Q(max_price__isnull=True) | Q(max_price__gte=prop.price),
+        Q(min_bedrooms__isnull=True) | Q(min_bedrooms__lte=prop.bedrooms),
+    )
+    for amenity in ('is_furnished', 'has_parking', 'pets_allowed'):
+        if not getattr(prop, amenity):
+            queryset = queryset.exclude(**{amenity: True})
+    return queryset
+
+
+def notify_matches(prop):
+    """Create SAVED_SEARCH_MATCH notifications for ``prop``; returns the count.
+
+    A user with several matching searches gets a single notification.
+    """
+    matches = matching_searches(prop).values_list('id', 'user_id')
+    search_ids, notifications, seen_users = [], [], set()
+    for search_id, user_id in matches.iterator():
+        search_ids.append(search_id)
+        if user_id in seen_users:
+            continue
+        seen_users.add(user_id)
+        notifications.append(Notification(
+            user_id=user_id,
+            notification_type=Notification.NotificationType.SAVED_SEARCH_MATCH,
+            title='New listing matches your saved search',
+            message=f"{prop.title} in {prop.city} is now available.",
+            related_property=prop,
+        ))
+
+    Notification.objects.bulk_create(notifications, batch_size=NOTIFICATION_BATCH_SIZE)
+    now = timezone.now()
+    for start in range(0, len(search_ids), NOTIFICATION_BATCH_SIZE):
+        SavedSearch.objects.filter(id__in=search_ids[start:start + NOTIFICATION_BATCH_SIZE]).update(last_notified_at=now)
+    return len(notifications)
+
+
+def _notify_in_thread(property_id):
+    close_old_connections()
+    try:
+        prop = Property.objects.filter(pk=property_id, status=Property.Status.ACTIVE).first()
+        return notify_matches(prop) if prop is not None else 0
+    except DatabaseError:
+        logger.exception('Could not send saved-search alerts for property %s', property_id)
+        return 0
+    finally:
+        close_old_connections()
+
+
+def notify_later(property_id):
+    """Alert the listing's saved searches on a background thread; returns the Future."""
+    return _executor.submit(_notify_in_thread, property_id)
+
+
+def stored_status(prop, update_fields=None):
+    """The status ``prop`` had before this save, for ``property_saved()``.
+
+    None for a new listing. The row is only read when the save can make the
+    listing ACTIVE; otherwise the status being saved is returned, which
+    never alerts.
+    """
+    if prop._state.adding:
+        return None
+    if prop.status != Property.Status.ACTIVE or (update_fields is not None and 'status' not in update_fields):
+        return prop.status
+    return Property.objects.filter(pk=prop.pk).values_list('status', flat=True).first()
+
+
+def property_saved(prop, previous_status):
+    """Alert saved searches, after commit, when ``prop`` has just become ACTIVE."""
+    if prop.status == Property.Status.ACTIVE and previous_status != Property.Status.ACTIVE:
+        transaction.on_commit(lambda: notify_later(prop.pk))
@@ -1,9 +1,12 @@
+from django.conf import settings
 from django.contrib.auth.models import User
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import RefreshToken, TokenError
 
-from .models import (Deal, Inspection, Message, Notification, Property,
-                     PropertyImage, Review, SavedProperty, UserProfile)
+from .models import (ArchivedMessage, ArchivedNotification, Deal, Inspection,
+                     Message, Notification, Property, PropertyDuplicate,
+                     PropertyImage, Review, SavedProperty, SavedSearch,
+                     UserProfile)
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -103,7 +106,24 @@ class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = '__all__'
-        read_only_fields = ['is_flagged', 'flag_reason']
+        read_only_fields = [
+            'is_flagged', 'flag_reason', 'moderation_status', 'spam_score', 'scored_at', 'moderated_by', 'moderated_at',
+        ]
+
+
+class ReviewModerationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Review
+        fields = [
+            'id', 'reviewer', 'review_type', 'property', 'reviewed_user', 'rating', 'title', 'comment',
+            'is_flagged', 'flag_reason', 'spam_score', 'moderation_status', 'created_at',
+        ]
+
+
+class ReviewBulkModerationSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    action = serializers.ChoiceField(choices=['approve', 'flag'])
+    reason = serializers.CharField(required=False, allow_blank=True, default='')
 
 
 class MessageSerializer(serializers.ModelSerializer):
@@ -130,4 +150,95 @@ class SavedPropertySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = SavedProperty
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class SavedSearchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SavedSearch
+        exclude = ['user']
+        read_only_fields = ['last_notified_at']
+
+    def validate(self, attrs):
+        min_price = attrs.get('min_price', getattr(self.instance, 'min_price', None))
+        max_price = attrs.get('max_price', getattr(self.instance, 'max_price', None))
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise serializers.ValidationError({'max_price': 'Must be greater than or equal to min_price.'})
+        return attrs
+
+
+class ArchivedMessageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedMessage
+        fields = '__all__'
+
+
+class ArchivedNotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedNotification
+        fields = '__all__'
+
+
+class PropertyDuplicateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PropertyDuplicate
+        fields = ['property', 'duplicate_of', 'similarity', 'simhash_distance', 'created_at']
+
+
+class BatchSubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])
+    path = serializers.CharField(max_length=512)
+    query = serializers.DictField(required=False)
+    body = serializers.JSONField(required=False, allow_null=True)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchSubRequestSerializer(many=True, allow_empty=False, max_length=settings.BATCH_MAX_REQUESTS)
+
+
+class PropertyAutocompleteQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=100, help_text='What has been typed so far.')
+    kind = serializers.ChoiceField(choices=['city', 'state', 'landmark'], required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=10)
+
+
+class ListingAnalyticsQuerySerializer(serializers.Serializer):
+    granularity = serializers.ChoiceField(choices=['hour', 'day'], default='day')
+    periods = serializers.IntegerField(min_value=1, max_value=366, default=30, help_text='Number of hours or days, up to now.')
+    property = serializers.IntegerField(required=False, help_text='Limit to one of your listings.')
+
+
+class AgentDirectoryQuerySerializer(serializers.Serializer):
+    property = serializers.IntegerField(required=False, help_text='Rank by distance to this listing.')
+    city = serializers.CharField(required=False)
+    latitude = serializers.FloatField(required=False, min_value=-90, max_value=90)
+    longitude = serializers.FloatField(required=False, min_value=-180, max_value=180)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=20)
+
+    def validate(self, attrs):
+        if ('latitude' in attrs) != ('longitude' in attrs):
+            raise serializers.ValidationError('Give both latitude and longitude.')
+        return attrs
+
+
+class MarketStatsQuerySerializer(serializers.Serializer):
+    city = serializers.CharField(required=False, help_text='Full guide for this city; omit for the list of cities.')
+    property_type = serializers.ChoiceField(choices=Property.PropertyType.choices, required=False)
+    bedrooms = serializers.IntegerField(min_value=0, required=False, help_text='5 covers five or more.')
+
+
+class AgentDirectorySerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='agent_id')
+    username = serializers.CharField()
+    rating = serializers.DecimalField(max_digits=3, decimal_places=2)
+    total_inspections = serializers.IntegerField()
+    is_verified = serializers.BooleanField()
+    distance_km = serializers.FloatField(allow_null=True)
+    score = serializers.FloatField()
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if data['distance_km'] is not None:
+            data['distance_km'] = round(data['distance_km'], 1)
+        data['score'] = round(data['score'], 3)
+        return data
@@ -0,0 +1,59 @@
+import sys
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import agents, analytics, saved_searches
+from .models import Inspection, ListingEvent, Message, Property, SavedProperty
+
+
+def _loaded_indexes():
+    # An index only exists once its module has been imported (by the first
+    # request that needs it); until then there is nothing to keep current,
+    # and importing users.similarity here would load numpy at boot.
+    for name in ('users.similarity', 'users.autocomplete'):
+        module = sys.modules.get(name)
+        if module is not None:
+            yield module.index
+
+
+@receiver(pre_save, sender=Property)
+def property_saving(sender, instance, raw, update_fields, **kwargs):
+    if not raw:
+        instance._previous_status = saved_searches.stored_status(instance, update_fields)
+
+
+@receiver(post_save, sender=Property)
+def property_saved(sender, instance, raw, **kwargs):
+    for index in _loaded_indexes():
+        index.upsert(instance)
+    if not raw:
+        saved_searches.property_saved(instance, instance.__dict__.pop('_previous_status', None))
+
+
+@receiver(post_delete, sender=Property)
+def property_deleted(sender, instance, **kwargs):
+    for index in _loaded_indexes():
+        index.remove(instance.pk)
+
+
+@receiver(post_save, sender=SavedProperty)
+def property_saved_by_user(sender, instance, created, **kwargs):
+    if created:
+        analytics.record(instance.property_id, ListingEvent.EventType.SAVE)
+
+
+@receiver(post_save, sender=Inspection)
+def inspection_requested(sender, instance, created, **kwargs):
+    if created:
+        analytics.record(instance.property_id, ListingEvent.EventType.INSPECTION_REQUEST)
+        if settings.INSPECTION_AUTO_ASSIGN and instance.agent_id is None:
+            transaction.on_commit(lambda: agents.assign_later(instance.pk))
+
+
+@receiver(post_save, sender=Message)
+def message_sent(sender, instance, created, **kwargs):
+    if created:
+        analytics.record(instance.property_id, ListingEvent.EventType.MESSAGE)
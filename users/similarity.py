@@ -0,0 +1,187 @@
+"""
+In-memory feature index for the "similar properties" endpoint.
+
+Active listings are packed into NumPy column arrays so a query is a single
+vectorized distance computation plus an argpartition top-k, instead of
+scoring rows one by one in Python. Building, background refreshes and
+signal updates are ``users.indexes.PropertyIndex``'s; a rebuild loads into
+fresh arrays and swaps them in.
+"""
+import math
+
+import numpy as np
+
+from inndoor_be.workers import reset_after_fork
+
+from .indexes import PropertyIndex
+from .models import Property
+
+# Relative weights of each term in the (squared) distance.
+WEIGHT_PRICE = 4.0
+WEIGHT_BEDROOMS = 1.0
+WEIGHT_BATHROOMS = 0.5
+WEIGHT_TYPE = 1.5
+WEIGHT_AMENITY = 0.25
+WEIGHT_GEO = 2.0
+# Distance at which the geo term equals WEIGHT_GEO, and the penalty used when
+# either listing has no coordinates.
+GEO_SCALE_KM = 10.0
+GEO_MISSING = 1.0
+EARTH_RADIUS_KM = 6371.0
+
+TYPE_CODES = {value: code for code, value in enumerate(Property.PropertyType.values)}
+AMENITIES = ('is_furnished', 'has_parking', 'pets_allowed')
+# penalty for each amenity bitmask difference (its popcount times the weight)
+_AMENITY_PENALTY = np.array(
+    [WEIGHT_AMENITY * bin(mask).count('1') for mask in range(1 << len(AMENITIES))], dtype=np.float32
+)
+
+FIELDS = ('id', 'price', 'bedrooms', 'bathrooms', 'property_type', 'latitude', 'longitude', *AMENITIES, 'status', 'updated_at')
+
+
+def _features(price, bedrooms, bathrooms, property_type, latitude, longitude, *amenities):
+    mask = 0
+    for bit, flag in enumerate(amenities):
+        if flag:
+            mask |= 1 << bit
+    return (
+        math.log1p(float(price)),
+        float(bedrooms),
+        float(bathrooms),
+        TYPE_CODES.get(property_type, -1),
+        mask,
+        math.radians(float(latitude)) if latitude is not None else math.nan,
+        math.radians(float(longitude)) if longitude is not None else math.nan,
+    )
+
+
+class SimilarityIndex(PropertyIndex):
+    name = 'similarity'
+    FIELDS = FIELDS
+    _columns = (
+        ('ids', np.int64),
+        ('log_price', np.float32),
+        ('bedrooms', np.float32),
+        ('bathrooms', np.float32),
+        ('type_code', np.int8),
+        ('amenities', np.uint8),
+        ('lat', np.float32),
+        ('lon', np.float32),
+        ('active', np.bool_),
+    )
+
+    # Swapped in as a whole by build().
+    _state = (*(name for name, _dtype in _columns), 'size', 'rows', 'watermark', 'price_scale')
+
+    def _reset(self):
+        super()._reset()
+        for name, dtype in self._columns:
+            setattr(self, name, np.zeros(0, dtype=dtype))
+        self.size = 0
+        self.rows = {}
+        self.price_scale = 1.0
+
+    def load(self, rows):
+        super().load(rows)
+        self._update_price_scale()
+
+    def apply_changes(self, rows):
+        super().apply_changes(rows)
+        self._update_price_scale()
+
+    def _discard(self, pk):
+        row = self.rows.get(pk)
+        if row is not None:
+            self.active[row] = False
+
+    def _upsert_row(self, row):
+        pk, status = row[0], row[-2]
+        index = self.rows.get(pk)
+        if index is None:
+            if status != Property.Status.ACTIVE:
+                return
+            if self.size == len(self.ids):
+                self._grow()
+            index = self.rows[pk] = self.size
+            self.size += 1
+        values = (pk, *_features(*row[1:-2]), status == Property.Status.ACTIVE)
+        for (name, _dtype), value in zip(self._columns, values):
+            getattr(self, name)[index] = value
+
+    def _update_price_scale(self):
+        # Spread of log prices normalises the price term; recomputed on
+        # build/refresh rather than per query.
+        active = self.log_price[:self.size][self.active[:self.size]]
+        self.price_scale = max(float(active.std()), 0.1) if len(active) else 1.0
+
+    def _grow(self):
+        capacity = max(len(self.ids) * 2, 1024)
+        for name, dtype in self._columns:
+            column = np.zeros(capacity, dtype=dtype)
+            column[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, column)
+
+    def similar(self, prop, limit):
+        """Return up to ``limit`` active property ids ranked by similarity to ``prop``."""
+        self.ensure_fresh()
+        with self._lock:
+            n = self.size
+            columns = {name: getattr(self, name)[:n] for name, _dtype in self._columns}
+            price_scale = self.price_scale
+            own_row = self.rows.get(prop.pk)
+        if n == 0:
+            return []
+
+        log_price, bedrooms, bathrooms, type_code, amenities, lat, lon = _features(
+            *(getattr(prop, field) for field in FIELDS[1:-2])
+        )
+
+        # float32 throughout, accumulating in place to avoid temporaries.
+        distance = np.subtract(columns['log_price'], np.float32(log_price))
+        distance *= np.float32(math.sqrt(WEIGHT_PRICE) / price_scale)
+        np.square(distance, out=distance)
+        term = np.empty_like(distance)
+        for name, value, weight in (('bedrooms', bedrooms, WEIGHT_BEDROOMS), ('bathrooms', bathrooms, WEIGHT_BATHROOMS)):
+            np.subtract(columns[name], np.float32(value), out=term)
+            np.square(term, out=term)
+            term *= np.float32(weight)
+            distance += term
+        distance += (columns['type_code'] != type_code) * np.float32(WEIGHT_TYPE)
+        distance += _AMENITY_PENALTY[columns['amenities'] ^ np.uint8(amenities)]
+
+        if not math.isnan(lat) and not math.isnan(lon):
+            # Equirectangular approximation around the query point; accurate
+            # enough at city scale.
+            scale_per_radian = np.float32(EARTH_RADIUS_KM / GEO_SCALE_KM)
+            x = np.subtract(columns['lon'], np.float32(lon))
+            x *= np.float32(math.cos(lat)) * scale_per_radian
+            np.square(x, out=x)
+            np.subtract(columns['lat'], np.float32(lat), out=term)
+            term *= scale_per_radian
+            np.square(term, out=term)
+            x += term
+            x *= np.float32(WEIGHT_GEO)
+            # NaN coordinates propagate into x; charge them a flat penalty.
+            np.copyto(x, np.float32(WEIGHT_GEO * GEO_MISSING), where=np.isnan(x))
+            distance += x
+        else:
+            distance += np.float32(WEIGHT_GEO * GEO_MISSING)
+
+        distance[~columns['active']] = np.inf
+        if own_row is not None and own_row < n:
+            distance[own_row] = np.inf
+
+        k = min(limit, n)
+        nearest = np.argpartition(distance, k - 1)[:k]
+        nearest = nearest[np.argsort(distance[nearest])]
+        return [int(pk) for pk in columns['ids'][nearest[np.isfinite(distance[nearest])]]]
+
+
+index = SimilarityIndex()
+
+
+@reset_after_fork
+def _reset_after_fork():
+    # The refresh thread does not survive fork; the child builds its own.
+    global index
+    index = SimilarityIndex()
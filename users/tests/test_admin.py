@@ -0,0 +1,121 @@
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from users.admin import EstimatedCountPaginator, ReadOnlyAdmin, estimated_count
+from users.models import Inspection, Property, PropertyImage, Review
+
+from .utils import make_property, make_user
+
+
+class EstimatedCountTests(TestCase):
+
+    def test_sqlite_reads_max_rowid(self):
+        owner = make_user('owner')
+        listings = [make_property(owner) for _ in range(3)]
+        listings[1].delete()
+        # Deleted rows below the highest id still count.
+        self.assertEqual(estimated_count(Property, 'default'), listings[-1].pk)
+
+    def test_no_estimate_without_integer_key(self):
+        self.assertIsNone(estimated_count(Session, 'default'))
+
+
+class EstimatedCountPaginatorTests(TestCase):
+
+    def setUp(self):
+        owner = make_user('owner')
+        self.listings = [make_property(owner, city=city) for city in ('Lagos', 'Lagos', 'Abuja')]
+        self.listings[0].delete()
+
+    def test_exact_below_threshold(self):
+        self.assertEqual(EstimatedCountPaginator(Property.objects.all(), 50).count, 2)
+
+    def test_estimate_for_unfiltered_tables_only(self):
+        with mock.patch.object(EstimatedCountPaginator, 'EXACT_BELOW', 2):
+            self.assertEqual(EstimatedCountPaginator(Property.objects.all(), 50).count, self.listings[-1].pk)
+            self.assertEqual(EstimatedCountPaginator(Property.objects.filter(city='Lagos'), 50).count, 1)
+
+
+class ChangelistTests(TestCase):
+
+    def setUp(self):
+        self.staff = make_user('staff', is_staff=True, is_superuser=True)
+        self.client.force_login(self.staff)
+        listing = make_property(make_user('landlord'))
+        Review.objects.bulk_create(
+            Review(property=listing, reviewer=make_user(f'tenant{n}'), rating=4, comment='Quiet street.')
+            for n in range(5)
+        )
+
+    def url(self, model, action='changelist'):
+        return f'/admin/users/{model._meta.model_name}/{"add/" if action == "add" else ""}'
+
+    def test_every_changelist_renders(self):
+        for model in admin.site._registry:
+            if model._meta.app_label != 'users':
+                continue
+            with self.subTest(model=model.__name__):
+                self.assertEqual(self.client.get(self.url(model)).status_code, 200)
+
+    def test_large_changelist_skips_count_and_per_row_queries(self):
+        with mock.patch.object(EstimatedCountPaginator, 'EXACT_BELOW', 1):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url(Review))
+        self.assertEqual(response.status_code, 200)
+        sql = [query['sql'] for query in queries.captured_queries]
+        self.assertFalse([statement for statement in sql if 'COUNT(' in statement.upper()], sql)
+        # Session, user, estimate and page, whatever the number of rows shown.
+        self.assertEqual(len(sql), 4, sql)
+
+    def test_read_only_admins_refuse_add(self):
+        for model, model_admin in admin.site._registry.items():
+            if not isinstance(model_admin, ReadOnlyAdmin):
+                continue
+            with self.subTest(model=model.__name__):
+                self.assertEqual(self.client.get(self.url(model, 'add')).status_code, 403)
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        self.owner = make_user('landlord')
+        self.lagos = make_property(self.owner, city='Lagos')
+        self.lower = make_property(self.owner, city='lagos')
+        self.lafia = make_property(make_user('other'), city='Lafia')
+
+    def search(self, model, term):
+        model_admin = admin.site._registry[model]
+        request = RequestFactory().get('/')
+        queryset, may_have_duplicates = model_admin.get_search_results(request, model.objects.all(), term)
+        self.assertFalse(may_have_duplicates)
+        with CaptureQueriesContext(connection) as queries:
+            pks = set(queryset.values_list('pk', flat=True))
+        for query in queries.captured_queries:
+            self.assertNotIn('LIKE', query['sql'].upper())
+            self.assertNotIn('UPPER(', query['sql'].upper())
+        return pks
+
+    def test_prefix_is_a_case_sensitive_range(self):
+        self.assertEqual(self.search(Property, 'La'), {self.lagos.pk, self.lafia.pk})
+        self.assertEqual(self.search(Property, 'Lag'), {self.lagos.pk})
+        self.assertEqual(self.search(Property, '"la"'), {self.lower.pk})
+
+    def test_numbers_match_ids_and_words_match_names(self):
+        self.assertEqual(self.search(Property, str(self.lafia.pk)), {self.lafia.pk})
+        self.assertEqual(self.search(Property, 'landlord'), {self.lagos.pk, self.lower.pk})
+        self.assertEqual(self.search(Property, 'landlord Lag'), {self.lagos.pk})
+        self.assertEqual(self.search(Property, 'Landlord'), set())
+
+    def test_word_no_field_can_hold_matches_nothing(self):
+        inspection = Inspection.objects.create(
+            property=self.lagos, requester=make_user('tenant'), preferred_date='2026-11-02', preferred_time='10:00',
+        )
+        self.assertEqual(self.search(Inspection, str(self.lagos.pk)), {inspection.pk})
+        self.assertEqual(self.search(Inspection, '99999999999999999999'), set())
+        self.assertEqual(self.search(PropertyImage, 'abc'), set())
+
@@ -0,0 +1,118 @@
+import datetime
+import threading
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from users import agents, analytics, saved_searches
+from users.models import AgentServiceArea, Inspection, Notification, UserProfile
+
+from .utils import client_for, drain, make_property, make_user
+
+DAY, TEN = datetime.date(2026, 11, 2), datetime.time(10, 0)
+
+
+class AgentFixtures:
+
+    def setUp(self):
+        self.owner = make_user('owner')
+        self.tenant = make_user('tenant')
+        self.listing = make_property(self.owner)
+        self.best = self.make_agent('best', rating=5)
+        self.second = self.make_agent('second', rating=3)
+
+    def make_agent(self, username, rating):
+        agent = make_user(username)
+        UserProfile.objects.create(user=agent, role=UserProfile.Roles.AGENT, rating=rating)
+        AgentServiceArea.objects.create(agent=agent, city_key='lagos', city='Lagos', state='Lagos', jobs=1)
+        return agent
+
+    def request_inspection(self, **fields):
+        defaults = {'property': self.listing, 'requester': self.tenant, 'preferred_date': DAY, 'preferred_time': TEN}
+        return Inspection.objects.create(**{**defaults, **fields})
+
+
+@override_settings(INSPECTION_AUTO_ASSIGN=False)
+class AssignTests(AgentFixtures, TestCase):
+
+    def test_assigns_best_agent(self):
+        inspection = self.request_inspection()
+        self.assertEqual(agents.assign(inspection), self.best.pk)
+        self.assertEqual(Inspection.objects.get(pk=inspection.pk).agent_id, self.best.pk)
+        self.assertTrue(Notification.objects.filter(user=self.best, related_inspection=inspection).exists())
+
+    def test_skips_booked_and_full_agents(self):
+        self.request_inspection(agent=self.best)
+        self.assertEqual(agents.assign(self.request_inspection()), self.second.pk)
+        with override_settings(AGENT_MAX_DAILY_INSPECTIONS=1):
+            inspection = self.request_inspection(preferred_time=datetime.time(15, 0))
+            self.assertIsNone(agents.assign(inspection))
+
+    def test_rechecks_slot_under_lock(self):
+        # The ranking saw the best agent free; another assignment took the
+        # slot before this one locked the agent.
+        self.request_inspection(agent=self.best)
+        inspection = self.request_inspection()
+        with mock.patch.object(agents, 'best_available_agent', side_effect=[self.best.pk, self.second.pk]) as best:
+            self.assertEqual(agents.assign(inspection), self.second.pk)
+        self.assertEqual(best.call_args.kwargs['exclude'], {self.best.pk})
+        self.assertFalse(Notification.objects.filter(user=self.best).exists())
+
+    def test_owner_assigns_from_inspection(self):
+        inspection = self.request_inspection()
+        response = client_for(self.owner).post(f'/api/user/inspections/{inspection.pk}/assign_agent/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['agent']['username'], 'best')
+        response = client_for(self.owner).post(f'/api/user/inspections/{inspection.pk}/assign_agent/')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(INSPECTION_AUTO_ASSIGN=False)
+class DirectoryTests(AgentFixtures, TestCase):
+
+    def usernames(self, **params):
+        response = client_for(self.tenant).get('/api/user/agents/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['username'] for row in response.json()]
+
+    def test_build_service_areas(self):
+        abuja = make_property(self.owner, city=' Abuja', state='FCT', latitude=9.05, longitude=7.49)
+        self.request_inspection(property=abuja, agent=self.second, status=Inspection.Status.COMPLETED)
+        self.assertEqual(agents.build_service_areas(), 1)
+        area = AgentServiceArea.objects.get()
+        self.assertEqual((area.agent, area.city_key, area.city, area.jobs), (self.second, 'abuja', 'Abuja', 1))
+        self.assertEqual((area.latitude, area.longitude), (9.05, 7.49))
+        self.assertEqual(UserProfile.objects.get(user=self.second).total_inspections, 1)
+
+    def test_ranks_by_rating_and_proximity(self):
+        self.assertEqual(self.usernames(city='LAGOS'), ['best', 'second'])
+        self.assertEqual(self.usernames(), ['best', 'second'])
+        nearby = self.make_agent('nearby', rating=1)
+        AgentServiceArea.objects.filter(agent=nearby).update(city_key='ikeja', city='Ikeja', latitude=6.6, longitude=3.35)
+        self.assertEqual(self.usernames(latitude=6.6, longitude=3.35), ['nearby'])
+        self.assertEqual(self.usernames(city='Kano'), [])
+
+    def test_rejects_half_a_location(self):
+        response = client_for(self.tenant).get('/api/user/agents/', {'latitude': 6.5})
+        self.assertEqual(response.status_code, 400)
+
+
+class AssignLaterTests(AgentFixtures, TransactionTestCase):
+
+    def test_new_inspection_assigned_off_the_request_thread(self):
+        threads, real_assign = [], agents.assign
+
+        def assign(inspection):
+            threads.append(threading.current_thread())
+            return real_assign(inspection)
+
+        # Write the INSPECTION_REQUEST event, and send the listing's
+        # saved-search alerts, before the test database goes.
+        self.addCleanup(analytics.buffer.flush)
+        self.addCleanup(drain, saved_searches._executor)
+        with mock.patch.object(agents, 'assign', side_effect=assign):
+            inspection = self.request_inspection()
+            drain(agents._executor)
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+        self.assertEqual(Inspection.objects.get(pk=inspection.pk).agent_id, self.best.pk)
@@ -0,0 +1,167 @@
+import datetime
+import threading
+import time
+from unittest import mock
+
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from users import analytics, saved_searches
+from users.analytics import EventBuffer
+from users.models import JobWatermark, ListingEvent, ListingStats
+
+from .utils import client_for, drain, make_property, make_user
+
+VIEW, SAVE = ListingEvent.EventType.VIEW, ListingEvent.EventType.SAVE
+
+
+class RollupTests(TestCase):
+
+    def setUp(self):
+        self.owner = make_user('owner')
+        self.listing = make_property(self.owner)
+        self.at = timezone.now().replace(minute=30, second=0, microsecond=0)
+
+    def log(self, pk, event_type=VIEW, property_id=None):
+        return ListingEvent.objects.create(
+            pk=pk, property_id=property_id or self.listing.pk, event_type=event_type, created_at=self.at,
+        )
+
+    def stats(self, granularity=ListingStats.Granularity.HOUR):
+        return list(ListingStats.objects.filter(granularity=granularity).values_list('views', 'saves'))
+
+    def test_counts_each_event_once(self):
+        self.log(1), self.log(2), self.log(3, SAVE)
+        self.assertEqual(analytics.rollup(batch_size=2), 3)
+        self.log(4)
+        self.assertEqual(analytics.rollup(), 1)
+        self.assertEqual(analytics.rollup(), 0)
+        self.assertEqual(self.stats(), [(3, 1)])
+        self.assertEqual(self.stats(ListingStats.Granularity.DAY), [(3, 1)])
+
+    def test_skips_deleted_listings(self):
+        self.log(1), self.log(2, property_id=self.listing.pk + 100)
+        self.assertEqual(analytics.rollup(), 2)
+        self.assertEqual(self.stats(), [(1, 0)])
+
+    def test_waits_at_gap(self):
+        self.log(1), self.log(2), self.log(4)
+        self.assertEqual(analytics.rollup(), 2)
+        self.assertEqual(JobWatermark.objects.get(name=analytics.ROLLUP_JOB).value, '2')
+        # The insert holding id 3 commits after the rollup saw id 4.
+        self.log(3)
+        self.assertEqual(analytics.rollup(), 2)
+        self.assertEqual(self.stats(), [(4, 0)])
+
+    def test_steps_over_gap_that_stays(self):
+        self.log(1), self.log(3)
+        self.assertEqual(analytics.rollup(), 1)
+        self.assertEqual(analytics.rollup(), 0)
+        JobWatermark.objects.filter(name=analytics.GAP_JOB).update(
+            updated_at=timezone.now() - datetime.timedelta(seconds=121),
+        )
+        with override_settings(ANALYTICS_ROLLUP_GAP_SECONDS=120):
+            self.assertEqual(analytics.rollup(), 1)
+        self.assertEqual(self.stats(), [(2, 0)])
+
+    def test_upsert_without_conflict_target(self):
+        self.log(1)
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False), \
+                mock.patch.object(ListingStats.objects, 'bulk_create') as bulk_create:
+            analytics.rollup()
+        self.assertEqual(bulk_create.call_count, 2)
+        self.assertNotIn('unique_fields', bulk_create.call_args.kwargs)
+
+
+class DashboardTests(TestCase):
+
+    def test_owner_sees_rolled_up_counts(self):
+        owner = make_user('owner')
+        listing = make_property(owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            analytics.record(listing.pk, VIEW)
+        analytics.buffer.flush()
+        # Start from this event, wherever the id sequence is.
+        JobWatermark.objects.create(name=analytics.ROLLUP_JOB, value=str(ListingEvent.objects.get().pk - 1))
+        analytics.rollup()
+        response = client_for(owner).get('/api/user/analytics/', {'periods': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['totals']['views'], 1)
+        self.assertEqual(client_for(make_user('tenant')).get('/api/user/analytics/').json()['properties'], [])
+
+
+class EventBufferTests(SimpleTestCase):
+
+    def event(self):
+        return ListingEvent(property_id=1, event_type=VIEW, created_at=timezone.now())
+
+    @override_settings(ANALYTICS_BUFFER_SIZE=100)
+    def test_failed_flush_keeps_events_for_a_later_retry(self):
+        buffer = EventBuffer()
+        first, second = self.event(), self.event()
+        buffer._events, buffer._oldest = [first], time.monotonic()
+        with mock.patch.object(ListingEvent.objects, 'bulk_create', side_effect=[DatabaseError, None]) as bulk_create, \
+                self.assertLogs(analytics.logger, 'ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+            buffer._events.append(second)
+            self.assertGreater(buffer._due_in(), 5)
+            self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(bulk_create.call_args.args[0], [first, second])
+
+    @override_settings(ANALYTICS_BUFFER_SIZE=2)
+    def test_retries_keep_a_bounded_number_of_events(self):
+        buffer = EventBuffer()
+        events = [self.event() for _ in range(5)]
+        buffer._events, buffer._oldest = list(events), time.monotonic()
+        with mock.patch.object(analytics, 'MAX_BUFFERED_BATCHES', 2), \
+                mock.patch.object(ListingEvent.objects, 'bulk_create', side_effect=DatabaseError), \
+                self.assertLogs(analytics.logger, 'ERROR') as logs:
+            buffer.flush()
+        self.assertEqual(buffer._events, events[1:])
+        self.assertIn('Dropped 1 listing events', logs.output[-1])
+
+
+# The flusher thread writes on its own connection, which only sees committed rows.
+class BackgroundFlushTests(TransactionTestCase):
+
+    def setUp(self):
+        self.addCleanup(drain, saved_searches._executor)
+        self.listing = make_property(make_user('owner'))
+        self.buffer = EventBuffer()
+        patcher = mock.patch.object(analytics, 'buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.flushed_by = []
+        self.written = threading.Event()
+        real_flush = self.buffer.flush
+
+        def flush():
+            self.flushed_by.append(threading.current_thread())
+            written = real_flush()
+            if written:
+                self.written.set()
+            return written
+
+        # Waiting on the flush rather than polling listing_events: SQLite
+        # refuses a read of a table another connection is writing.
+        patcher = mock.patch.object(self.buffer, 'flush', side_effect=flush)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(ANALYTICS_FLUSH_SECONDS=0.2)
+    def test_flushes_when_the_oldest_event_is_due(self):
+        analytics.record(self.listing.pk, VIEW)
+        self.assertEqual(self.buffer.pending(), 1)
+        self.assertTrue(self.written.wait(5))
+        self.assertEqual(ListingEvent.objects.count(), 1)
+        self.assertEqual(self.buffer.pending(), 0)
+        self.assertEqual(self.buffer._flusher.name, 'analytics-flush')
+
+    @override_settings(ANALYTICS_FLUSH_SECONDS=60, ANALYTICS_BUFFER_SIZE=2)
+    def test_flushes_a_full_buffer_off_the_request_thread(self):
+        analytics.record(self.listing.pk, VIEW)
+        analytics.record(self.listing.pk, SAVE)
+        self.assertTrue(self.written.wait(5))
+        self.assertEqual(ListingEvent.objects.count(), 2)
+        self.assertEqual(self.flushed_by, [self.buffer._flusher])
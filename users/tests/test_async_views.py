@@ -0,0 +1,91 @@
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import Message, Notification, Property, PropertyImage
+
+from .utils import make_property, make_user
+
+
+def bearer(user):
+    return {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+
+class AsyncPropertyTests(TestCase):
+
+    def setUp(self):
+        owner = make_user('owner')
+        make_property(owner, title='Lagos flat')
+        make_property(owner, title='Lagos duplex', property_type=Property.PropertyType.DUPLEX)
+        abuja = make_property(owner, title='Abuja flat', city='Abuja')
+        PropertyImage.objects.create(property=abuja, image='properties/abuja.jpg', caption='Front')
+        make_property(owner, title='Draft', status=Property.Status.DRAFT)
+
+    async def test_list_counts_facets_and_page(self):
+        response = await self.async_client.get('/api/user/async/properties/', {'city': 'Lagos', 'status': 'ACTIVE', 'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['count'], 2)
+        self.assertEqual(body['facets'], {'property_type': {'FLAT': 1, 'DUPLEX': 1}})
+        self.assertEqual(len(body['results']), 1)
+
+    async def test_bad_paging(self):
+        response = await self.async_client.get('/api/user/async/properties/', {'limit': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_detail(self):
+        prop = await Property.objects.aget(title='Abuja flat')
+        response = await self.async_client.get(f'/api/user/async/properties/{prop.pk}/')
+        self.assertEqual(response.json()['title'], 'Abuja flat')
+        self.assertEqual((await self.async_client.get('/api/user/async/properties/0/')).status_code, 404)
+
+    async def test_matches_sync_responses(self):
+        prop = await Property.objects.aget(title='Abuja flat')
+        for sync_path, async_path in (
+            (f'/api/user/properties/{prop.pk}/', f'/api/user/async/properties/{prop.pk}/'),
+            ('/api/user/properties/?city=Abuja', '/api/user/async/properties/?city=Abuja'),
+        ):
+            with self.subTest(path=async_path):
+                expected = (await sync_to_async(self.client.get)(sync_path)).json()
+                body = (await self.async_client.get(async_path)).json()
+                self.assertEqual(body.get('results', body), expected)
+        self.assertTrue(body['results'][0]['images'][0]['image'].startswith('http://testserver/'))
+
+    async def test_get_only(self):
+        response = await self.async_client.post('/api/user/async/properties/')
+        self.assertEqual(response.status_code, 405)
+
+
+class AsyncInboxTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user('tenant')
+        # Issuing a token writes to the database, so it cannot happen in the async tests.
+        self.auth = bearer(self.user)
+        other = make_user('owner')
+        for is_read in (True, False, False):
+            Notification.objects.create(
+                user=self.user, notification_type=Notification.NotificationType.MESSAGE_RECEIVED,
+                title='t', message='m', is_read=is_read,
+            )
+        Notification.objects.create(
+            user=other, notification_type=Notification.NotificationType.MESSAGE_RECEIVED, title='t', message='m',
+        )
+        Message.objects.create(sender=other, recipient=self.user, content='Is it available?')
+        Message.objects.create(sender=self.user, recipient=other, content='Yes', is_read=True)
+
+    async def test_notifications(self):
+        response = await self.async_client.get('/api/user/async/notifications/', headers=self.auth)
+        body = response.json()
+        self.assertEqual((body['count'], body['unread'], len(body['results'])), (3, 2, 3))
+
+    async def test_messages(self):
+        response = await self.async_client.get('/api/user/async/messages/', {'limit': 1}, headers=self.auth)
+        body = response.json()
+        self.assertEqual((body['count'], body['unread']), (2, 1))
+        self.assertEqual([row['content'] for row in body['results']], ['Yes'])
+
+    async def test_login_required(self):
+        self.assertEqual((await self.async_client.get('/api/user/async/messages/')).status_code, 401)
+        response = await self.async_client.get('/api/user/async/messages/', headers={'Authorization': 'Bearer junk'})
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,117 @@
+import datetime
+import threading
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from users import autocomplete, saved_searches
+from users.autocomplete import AutocompleteIndex
+from users.models import Property
+
+from .utils import client_for, drain, make_property, make_user
+
+
+class AutocompleteTests(TestCase):
+
+    def setUp(self):
+        self.owner = make_user('owner')
+        self.lekki = make_property(self.owner, city='Lagos', landmark='Lekki  Phase 1')
+        make_property(self.owner, city='Lagos', landmark='Lekki Phase 1')
+        make_property(self.owner, city='Lagos')
+        make_property(self.owner, city='lagos ')
+        make_property(self.owner, city='Lafia', state='Nasarawa')
+        make_property(self.owner, city='Lokoja', status=Property.Status.DRAFT)
+        self.index = AutocompleteIndex()
+        self.index.build()
+
+    def values(self, prefix, kind=None):
+        return [(match['value'], match['count']) for match in self.index.complete(prefix, kind)]
+
+    def test_ranks_active_locations_by_listings(self):
+        self.assertEqual(self.values('la'), [('Lagos', 4), ('Lagos', 4), ('Lafia', 1)])
+        self.assertEqual(self.values('la', 'city'), [('Lagos', 4), ('Lafia', 1)])
+        self.assertEqual(self.values('lekki p'), [('Lekki Phase 1', 2)])
+        self.assertEqual(self.values('lo'), [])
+
+    def test_endpoint(self):
+        with mock.patch.object(autocomplete, 'index', AutocompleteIndex()):
+            response = client_for().get('/api/user/properties/autocomplete/', {'q': 'na', 'limit': 1})
+        self.assertEqual(response.json(), [{'kind': 'state', 'value': 'Nasarawa', 'count': 1}])
+
+    def test_unrelated_saves_keep_cached_answers(self):
+        self.values('la')
+        self.lekki.views_count += 1
+        self.lekki.save()
+        self.index.upsert(self.lekki)
+        self.assertIn(('la', None), self.index.results)
+
+        self.lekki.city = 'Abuja'
+        self.index.upsert(self.lekki)
+        self.assertEqual(self.index.results, {})
+        self.assertEqual(self.values('la', 'city'), [('Lagos', 3), ('Lafia', 1)])
+
+        self.lekki.status = Property.Status.RENTED
+        self.index.upsert(self.lekki)
+        self.assertEqual(self.values('ab'), [])
+
+    def test_local_saves_do_not_advance_the_watermark(self):
+        watermark = self.index.watermark
+        # Another worker's change, stamped before this worker's save below.
+        elsewhere = make_property(self.owner, city='Abeokuta')
+        Property.objects.filter(pk=elsewhere.pk).update(updated_at=watermark + datetime.timedelta(seconds=1))
+        self.lekki.updated_at = timezone.now() + datetime.timedelta(minutes=5)
+        self.index.upsert(self.lekki)
+        self.assertEqual(self.index.watermark, watermark)
+
+        self.index.refresh()
+        self.assertEqual(self.values('abe'), [('Abeokuta', 1)])
+
+    def test_rebuild_drops_listings_deleted_elsewhere(self):
+        Property.objects.filter(city='Lafia').delete()
+        self.index.refresh()
+        self.assertEqual(self.values('laf'), [('Lafia', 1)])
+        self.index.build()
+        self.assertEqual(self.values('laf'), [])
+
+
+class BackgroundRefreshTests(TransactionTestCase):
+
+    def setUp(self):
+        # Active listings alert saved searches on a background thread; let
+        # that finish before the tables are flushed.
+        self.addCleanup(drain, saved_searches._executor)
+        self.owner = make_user('owner')
+        make_property(self.owner, city='Lagos')
+        self.index = AutocompleteIndex()
+
+    def test_first_build_runs_once(self):
+        builds = []
+        build = self.index.build
+
+        def counted_build():
+            builds.append(threading.get_ident())
+            build()
+
+        self.index.build = counted_build
+        threads = [threading.Thread(target=self.index.ensure_fresh) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(builds), 1)
+        self.assertTrue(self.index.built)
+
+    def test_catches_up_off_the_request_path(self):
+        self.index.ensure_fresh()
+        added = make_property(self.owner, city='Abuja')
+        self.index.last_refresh = 0.0
+        self.index.ensure_fresh()
+        self.index._worker.join()
+        self.assertEqual(self.index.complete('ab', 'city'), [{'kind': 'city', 'value': 'Abuja', 'count': 1}])
+
+        Property.objects.filter(pk=added.pk).delete()
+        self.index.last_refresh = self.index.last_build = 0.0
+        self.index.ensure_fresh()
+        self.index._worker.join()
+        self.assertEqual(self.index.complete('ab', 'city'), [])
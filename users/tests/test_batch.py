@@ -0,0 +1,112 @@
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+
+from inndoor_be.workers import BackgroundExecutor
+from users import batch as batch_module
+from users import saved_searches
+from users.models import Property
+
+from .test_db_router import TwoFileReplicaTestCase
+from .utils import client_for, drain, make_property, make_user
+
+NEW_LISTING = {
+    'title': 'Just listed', 'description': 'New flat', 'property_type': 'FLAT', 'address': '2 Market Road',
+    'city': 'Lagos', 'state': 'Lagos', 'price': '400000.00', 'status': 'ACTIVE',
+}
+
+
+def batch(client, *requests):
+    response = client.post('/api/user/batch/', {'requests': list(requests)}, format='json')
+    assert response.status_code == 200, response.content
+    return response.json()['responses']
+
+
+# Sub-request GETs run on pool threads with their own connections, which
+# only see committed rows.
+class BatchTests(TransactionTestCase):
+
+    def setUp(self):
+        # Active listings alert saved searches on a background thread; let
+        # that finish before the tables are flushed.
+        self.addCleanup(drain, saved_searches._executor)
+        self.user = make_user('tenant')
+        self.client = client_for(self.user)
+        make_property(make_user('owner'))
+
+    def test_responses_in_order(self):
+        responses = batch(
+            self.client,
+            {'method': 'GET', 'path': '/api/user/me/'},
+            {'method': 'GET', 'path': 'properties/', 'query': {'city': 'Lagos'}},
+            {'method': 'GET', 'path': 'properties/0/'},
+            {'method': 'GET', 'path': 'nowhere/'},
+        )
+        self.assertEqual([row['status'] for row in responses], [200, 200, 404, 404])
+        self.assertEqual(responses[0]['body']['username'], 'tenant')
+        self.assertEqual(len(responses[1]['body']), 1)
+
+    @override_settings(BATCH_WORKERS=3)
+    def test_gets_share_one_pool_sized_by_settings(self):
+        # A fresh pool, so that it starts under this test's settings.
+        executor = BackgroundExecutor(batch_module._executor.max_workers, thread_name_prefix='batch')
+        with mock.patch.object(batch_module, '_executor', executor):
+            batch(self.client, {'method': 'GET', 'path': 'me/'}, {'method': 'GET', 'path': 'me/'})
+            pool = executor._executor
+            batch(self.client, {'method': 'GET', 'path': 'me/'}, {'method': 'GET', 'path': 'me/'})
+        self.addCleanup(pool.shutdown)
+        self.assertIs(executor._executor, pool)
+        self.assertEqual(pool._max_workers, 3)
+
+    def test_write_is_visible_to_later_reads(self):
+        owner = client_for(make_user('lister'))
+        responses = batch(
+            owner,
+            {'method': 'POST', 'path': 'properties/', 'body': NEW_LISTING},
+            {'method': 'GET', 'path': 'properties/', 'query': {'search': 'Just listed'}},
+        )
+        self.assertEqual(responses[0]['status'], 201)
+        self.assertEqual([row['title'] for row in responses[1]['body']], ['Just listed'])
+
+    def test_anonymous_and_nested(self):
+        responses = batch(
+            client_for(),
+            {'method': 'GET', 'path': 'me/'},
+            {'method': 'POST', 'path': 'batch/', 'body': {'requests': []}},
+        )
+        self.assertEqual([row['status'] for row in responses], [401, 400])
+
+    @override_settings(BATCH_MAX_RESPONSE_BYTES=10)
+    def test_oversized_response(self):
+        self.assertEqual(batch(self.client, {'method': 'GET', 'path': 'properties/'})[0]['status'], 413)
+
+
+class BatchReplicaRoutingTests(TwoFileReplicaTestCase):
+
+    def titles(self, body):
+        return {row['title'] for row in body}
+
+    def test_get_only_batch_reads_replica_without_pinning(self):
+        tenant = self.replicated_user('tenant')
+        client = client_for(tenant)
+        responses = batch(
+            client,
+            {'method': 'GET', 'path': 'properties/'},
+            {'method': 'GET', 'path': 'properties/', 'query': {'city': 'Lagos'}},
+        )
+        self.assertEqual([self.titles(row['body']) for row in responses], [{'Replica only'}] * 2)
+        self.assertEqual(self.titles(client.get('/api/user/properties/').json()), {'Replica only'})
+
+    def test_batch_that_wrote_reads_primary_and_pins(self):
+        client = client_for(self.owner)
+        responses = batch(
+            client,
+            {'method': 'GET', 'path': 'properties/'},
+            {'method': 'POST', 'path': 'properties/', 'body': NEW_LISTING},
+            {'method': 'GET', 'path': 'properties/'},
+        )
+        self.assertEqual(self.titles(responses[0]['body']), {'Replica only'})
+        self.assertEqual(responses[1]['status'], 201)
+        self.assertEqual(self.titles(responses[2]['body']), {'Just listed'})
+        self.assertTrue(Property.objects.using('default').filter(title='Just listed').exists())
+        self.assertEqual(self.titles(client.get('/api/user/properties/').json()), {'Just listed'})
@@ -0,0 +1,128 @@
+import os
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from inndoor_be import settings as project_settings
+from inndoor_be.db_backends import pool as pool_module
+from inndoor_be.db_backends.pool import ConnectionPool, PoolTimeout, pool_stats
+from inndoor_be import workers
+from inndoor_be.workers import BackgroundExecutor, reset_after_fork
+
+from .utils import client_for, make_user
+
+
+class DatabaseUrlTests(SimpleTestCase):
+
+    def test_mysql_integer_options(self):
+        database = project_settings._database_from_url(
+            'mysql://u:p@db:3306/inndoor?connect_timeout=5&read_timeout=30&charset=utf8mb4'
+        )
+        self.assertEqual(database['ENGINE'], 'django.db.backends.mysql')
+        self.assertEqual(database['OPTIONS'], {'connect_timeout': 5, 'read_timeout': 30, 'charset': 'utf8mb4'})
+
+    def test_pool_parameters_are_not_driver_options(self):
+        database = project_settings._database_from_url(
+            'postgres://u:p@db/inndoor?pool=true&pool_size=4&pool_timeout=2&sslmode=require'
+        )
+        self.assertEqual(database['ENGINE'], 'inndoor_be.db_backends.postgresql')
+        self.assertEqual(database['POOL'], {'SIZE': '4', 'TIMEOUT': '2'})
+        self.assertEqual(database['OPTIONS'], {'sslmode': 'require'})
+        self.assertEqual(database['CONN_MAX_AGE'], 0)
+
+
+class FakeConnection:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+        self.closed = False
+
+    def cursor(self):
+        if not self.healthy:
+            raise OSError('server has gone away')
+        return mock.Mock()
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**options):
+    config = {'size': 2, 'timeout': 0.05, 'max_lifetime': 60.0, 'health_check_after': 30.0, **options}
+    return ConnectionPool('test', **config)
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def test_reuses_returned_connection(self):
+        pool = make_pool()
+        connection = pool.checkout(FakeConnection)
+        self.assertTrue(pool.checkin(connection))
+        self.assertIs(pool.checkout(FakeConnection), connection)
+        snapshot = pool.snapshot()
+        self.assertEqual((snapshot['created'], snapshot['checkouts'], snapshot['in_use']), (1, 2, 1))
+
+    def test_times_out_when_exhausted(self):
+        pool = make_pool(size=1)
+        pool.checkout(FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            pool.checkout(FakeConnection)
+        self.assertEqual(pool.snapshot()['timeouts'], 1)
+
+    def test_waiter_gets_connection_checked_in(self):
+        pool = make_pool(size=1, timeout=5)
+        held = pool.checkout(FakeConnection)
+        threading.Timer(0.05, pool.checkin, [held]).start()
+        self.assertIs(pool.checkout(FakeConnection), held)
+        self.assertEqual(pool.snapshot()['waits'], 1)
+
+    def test_discards_expired_and_unhealthy_connections(self):
+        pool = make_pool(max_lifetime=0.0)
+        expired = pool.checkout(FakeConnection)
+        pool.checkin(expired)
+        self.assertTrue(expired.closed)
+
+        pool = make_pool(health_check_after=0.0)
+        broken = pool.checkout(lambda: FakeConnection(healthy=False))
+        pool.checkin(broken)
+        fresh = pool.checkout(FakeConnection)
+        self.assertIsNot(fresh, broken)
+        self.assertTrue(broken.closed)
+
+    def test_forget_frees_the_slot(self):
+        pool = make_pool(size=1)
+        pool.forget(pool.checkout(FakeConnection))
+        pool.checkout(FakeConnection)
+        self.assertEqual(pool.snapshot()['discarded'], 1)
+
+
+class PoolStatsViewTests(TestCase):
+
+    def test_staff_only(self):
+        with mock.patch.dict(pool_module._pools, {'default': make_pool()}, clear=True):
+            self.assertEqual(client_for(make_user('tenant')).get('/api/user/db-pool/').status_code, 403)
+            response = client_for(make_user('staff', is_staff=True)).get('/api/user/db-pool/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['alias'], 'test')
+
+
+class ResetAfterForkTests(SimpleTestCase):
+
+    def test_child_starts_without_pools(self):
+        with mock.patch.object(os, 'register_at_fork') as register:
+            reset = reset_after_fork(mock.Mock())
+        register.assert_called_once_with(after_in_child=reset)
+
+        with mock.patch.dict(pool_module._pools, {'default': make_pool()}):
+            pool_module._reset_after_fork()
+            self.assertEqual(pool_stats(), [])
+
+    def test_child_starts_its_own_executor_threads(self):
+        executor = BackgroundExecutor(lambda: 1, thread_name_prefix='test')
+        self.assertEqual(executor.submit(threading.current_thread).result(timeout=5).name, 'test_0')
+        parent_pool = executor._executor
+        self.addCleanup(parent_pool.shutdown)
+        workers._reset_background_executors()
+        self.assertIsNone(executor._executor)
+        executor.submit(lambda: None).result(timeout=5)
+        self.assertIsNot(executor._executor, parent_pool)
+        self.addCleanup(executor._executor.shutdown)
@@ -0,0 +1,128 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from inndoor_be.db_router import ReplicaRoutingMiddleware
+from users import saved_searches
+from users.models import Property
+
+from .utils import client_for, drain, make_property, make_user
+
+REPLICA = 'replica_test'
+NEW_LISTING = {
+    'title': 'Just listed', 'description': 'New flat', 'property_type': 'FLAT',
+    'address': '2 Market Road', 'city': 'Lagos', 'state': 'Lagos', 'price': '400000.00',
+    'status': 'ACTIVE',
+}
+
+
+class TwoFileReplicaTestCase(TransactionTestCase):
+    """The primary is the test database; the replica is a second SQLite file.
+
+    Nothing copies rows between them, so the replica stands in for one that
+    lags: a row written only to it shows where a read was routed. The alias
+    only exists while the class runs, so other test modules never see it.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # Declared here rather than on the class: the test runner would look
+        # the alias up before any class has created it.
+        cls.databases = {'default', REPLICA}
+        cls.directory = Path(tempfile.mkdtemp())
+        replica_file = str(cls.directory / 'replica.sqlite3')
+        connections.settings[REPLICA] = connections.configure_settings({
+            **settings.DATABASES,
+            REPLICA: {'ENGINE': settings.SQLITE_ENGINE, 'NAME': replica_file, 'TEST': {'NAME': replica_file}},
+        })[REPLICA]
+        connections[REPLICA].creation.create_test_db(verbosity=0, autoclobber=True)
+        cls.settings_override = override_settings(
+            DATABASE_REPLICAS=[REPLICA],
+            DATABASE_ROUTERS=['inndoor_be.db_router.PrimaryReplicaRouter'],
+            CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': str(cls.directory / 'cache'),
+            }},
+        )
+        cls.settings_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings_override.disable()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        # Active listings alert saved searches on a background thread; let
+        # that finish before the tables are flushed.
+        self.addCleanup(drain, saved_searches._executor)
+        self.owner = self.replicated_user('owner')
+        # Only on the replica: visible in a response only if the read was routed there.
+        Property.objects.using(REPLICA).bulk_create([
+            Property(
+                owner_id=self.owner.pk, title='Replica only', description='d', property_type='FLAT',
+                address='a', city='Lagos', state='Lagos', price=1, status=Property.Status.ACTIVE,
+            ),
+        ])
+
+    @staticmethod
+    def replicated_user(username):
+        # Authentication reads the user, so it has to be on both databases.
+        user = make_user(username)
+        User.objects.using(REPLICA).create(pk=user.pk, username=username)
+        return user
+
+    def titles(self, client):
+        response = client.get('/api/user/properties/')
+        self.assertEqual(response.status_code, 200)
+        return {row['title'] for row in response.json()}
+
+
+class ReplicaRoutingTests(TwoFileReplicaTestCase):
+
+    def test_anonymous_reads_go_to_replica(self):
+        make_property(self.owner, title='Primary only')
+        self.assertEqual(self.titles(client_for()), {'Replica only'})
+
+    def test_writer_is_pinned_to_primary(self):
+        writer = client_for(self.owner)
+        response = writer.post('/api/user/properties/', NEW_LISTING)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Property.objects.using('default').filter(title='Just listed').exists())
+        # Their next request reads their own write from the primary ...
+        self.assertEqual(self.titles(writer), {'Just listed'})
+        # ... while everyone else keeps reading the replica.
+        self.assertEqual(self.titles(client_for(self.replicated_user('tenant'))), {'Replica only'})
+
+    def test_pin_expires(self):
+        writer = client_for(self.owner)
+        with override_settings(DATABASE_REPLICA_PIN_SECONDS=0):
+            response = writer.post('/api/user/properties/', NEW_LISTING)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.titles(writer), {'Replica only'})
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class SharedCacheRequiredTests(TransactionTestCase):
+    locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+    def test_refuses_process_local_cache(self):
+        with override_settings(CACHES=self.locmem, DEBUG=False):
+            with self.assertRaises(ImproperlyConfigured):
+                ReplicaRoutingMiddleware(lambda request: None)
+
+    def test_warns_in_debug(self):
+        with override_settings(CACHES=self.locmem, DEBUG=True):
+            with self.assertLogs('inndoor_be.db_router', 'WARNING'):
+                middleware = ReplicaRoutingMiddleware(lambda request: 'ok')
+        self.assertEqual(middleware(RequestFactory().get('/')), 'ok')
@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from users import dedup
+from users.models import PropertyDuplicate, PropertySignature
+
+from .utils import client_for, make_property, make_user
+
+DESCRIPTION = 'Spacious two bedroom flat with a fitted kitchen, prepaid meter and running water, close to the market.'
+
+
+class DedupTests(TestCase):
+
+    def setUp(self):
+        self.owner = make_user('owner')
+
+    def listing(self, **fields):
+        prop = make_property(self.owner, **{'description': DESCRIPTION, **fields})
+        return prop, dedup.sign_and_flag(prop)
+
+    def test_signature_ignores_address_spelling(self):
+        first = dedup.sign('Flat', DESCRIPTION, '1 Market Road')
+        second = dedup.sign('Flat', DESCRIPTION, '1  market rd.')
+        self.assertEqual(first.content_hash, second.content_hash)
+
+    def test_flags_repost(self):
+        original, flags = self.listing(title='Two bedroom flat in Yaba')
+        self.assertEqual(flags, [])
+        repost, flags = self.listing(title='2 bedroom flat in Yaba!!')
+        self.assertEqual([(flag.property_id, flag.duplicate_of_id) for flag in flags], [(repost.pk, original.pk)])
+        self.assertEqual(PropertyDuplicate.objects.count(), 1)
+        _other, flags = self.listing(title='Shop space', description='Ground floor shop on a busy road.')
+        self.assertEqual(flags, [])
+
+    def test_resigning_unchanged_text_is_a_no_op(self):
+        prop, _flags = self.listing()
+        with self.assertNumQueries(1):
+            self.assertEqual(dedup.sign_and_flag(prop), [])
+
+    def test_skips_crowded_buckets(self):
+        self.listing()
+        with mock.patch.object(dedup, 'MAX_BUCKET_SIZE', 1):
+            # Each of its buckets holds one other listing: still checked.
+            self.assertEqual(len(self.listing()[1]), 1)
+            # Now two: every bucket is skipped, like boilerplate text.
+            self.assertEqual(self.listing()[1], [])
+
+    def test_backfill(self):
+        first = make_property(self.owner, description=DESCRIPTION)
+        second = make_property(self.owner, description=DESCRIPTION)
+        self.assertEqual(dedup.sign_existing(batch_size=1), 2)
+        self.assertEqual(PropertySignature.objects.count(), 2)
+        self.assertEqual(dedup.flag_all(), 1)
+        self.assertEqual(dedup.flag_all(), 0)
+        flag = PropertyDuplicate.objects.get()
+        self.assertEqual({flag.property_id, flag.duplicate_of_id}, {first.pk, second.pk})
+
+    def test_duplicates_endpoint_is_for_the_owner(self):
+        original, _flags = self.listing()
+        self.listing()
+        url = f'/api/user/properties/{original.pk}/duplicates/'
+        self.assertEqual(client_for(make_user('tenant')).get(url).status_code, 403)
+        self.assertEqual(len(client_for(self.owner).get(url).json()), 1)
@@ -0,0 +1,81 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from users import hashing
+from users.hashing import HashingUnavailable, HashPool
+
+from .utils import make_user
+
+
+class HashPoolTests(SimpleTestCase):
+
+    def test_runs_on_the_pool(self):
+        pool = HashPool(workers=1, max_queue=0, timeout=1)
+        self.assertTrue(pool.run(threading.current_thread).name.startswith('password-hash'))
+        self.assertEqual(pool.snapshot()['completed'], 1)
+
+    def test_rejects_when_full(self):
+        pool = HashPool(workers=1, max_queue=0, timeout=1)
+        release = threading.Event()
+        busy = threading.Thread(target=pool.run, args=(release.wait,))
+        busy.start()
+        self.addCleanup(busy.join)
+        self.addCleanup(release.set)
+        while pool.snapshot()['pending'] == 0:
+            pass
+        self.assertEqual(pool.load(), 1.0)
+        with self.assertRaises(HashingUnavailable):
+            pool.run(str)
+        self.assertEqual(pool.snapshot()['rejected'], 1)
+
+    def test_gives_up_after_timeout(self):
+        pool = HashPool(workers=1, max_queue=1, timeout=0.01)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        with self.assertRaises(HashingUnavailable):
+            pool.run(release.wait)
+
+    def test_catches_the_futures_timeout(self):
+        # concurrent.futures.TimeoutError is its own class before Python 3.11.
+        class FuturesTimeout(Exception):
+            pass
+
+        pool = HashPool(workers=1, max_queue=1, timeout=0.01)
+        future = mock.Mock(**{'result.side_effect': FuturesTimeout})
+        pool._executor = mock.Mock(**{'submit.return_value': future})
+        with mock.patch('concurrent.futures.TimeoutError', FuturesTimeout), self.assertRaises(HashingUnavailable):
+            pool.run(str)
+        future.cancel.assert_called_once_with()
+
+
+class LoginUnderLoadTests(TestCase):
+
+    def setUp(self):
+        make_user('tenant')
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def login(self):
+        return self.client.post('/api/user/login/', {'username': 'tenant', 'password': 'Pass-word-123'})
+
+    def test_login(self):
+        self.assertEqual(self.login().status_code, 200)
+
+    def test_saturated_pool_answers_503(self):
+        with mock.patch.object(hashing.pool, 'run', side_effect=HashingUnavailable):
+            response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(response.json()['detail'], 'Too many sign-in requests are being processed, try again shortly.')
+
+    def test_hashing_load_slows_the_buckets(self):
+        # 5/min per username: a full bucket allows five attempts at no load ...
+        self.assertEqual([self.login().status_code for _ in range(5)], [200] * 5)
+        self.assertEqual(self.login().status_code, 429)
+        cache.clear()
+        # ... and one when the pool is saturated, where each costs up to the whole bucket.
+        with mock.patch.object(hashing.pool, 'load', return_value=1.0):
+            self.assertEqual([self.login().status_code for _ in range(2)], [200, 429])
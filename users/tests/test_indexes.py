@@ -0,0 +1,72 @@
+import datetime
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase
+from django.utils import timezone
+
+from users import indexes
+from users.indexes import PropertyIndex
+from users.models import Property
+
+from .utils import make_property, make_user
+
+
+class ActiveIds(PropertyIndex):
+    name = 'active-ids'
+    _state = ('ids', 'watermark')
+
+    def _reset(self):
+        super()._reset()
+        self.ids = set()
+
+    def _upsert_row(self, row):
+        pk, status, _updated_at = row
+        if status == Property.Status.ACTIVE:
+            self.ids.add(pk)
+        else:
+            self.ids.discard(pk)
+
+    def _discard(self, pk):
+        self.ids.discard(pk)
+
+
+class PropertyIndexTests(TestCase):
+
+    def setUp(self):
+        self.owner = make_user('owner')
+        self.listing = make_property(self.owner)
+        make_property(self.owner, status=Property.Status.DRAFT)
+        self.index = ActiveIds()
+        self.index.build()
+
+    def test_build_loads_active_listings_and_notes_the_watermark(self):
+        self.assertEqual(self.index.ids, {self.listing.pk})
+        self.assertEqual(self.index.watermark, Property.objects.get(pk=self.listing.pk).updated_at)
+
+    def test_refresh_applies_changes_since_the_watermark(self):
+        added = make_property(self.owner)
+        Property.objects.filter(pk=self.listing.pk).update(
+            status=Property.Status.RENTED, updated_at=timezone.now() + datetime.timedelta(seconds=1),
+        )
+        with mock.patch.object(self.index, 'apply_changes', wraps=self.index.apply_changes) as apply_changes:
+            self.index.refresh()
+        apply_changes.assert_called_once()
+        self.assertEqual(self.index.ids, {added.pk})
+
+    def test_signal_updates_wait_for_the_first_build(self):
+        index = ActiveIds()
+        index.upsert(self.listing)
+        index.remove(self.listing.pk)
+        self.assertFalse(index.built)
+        self.index.remove(self.listing.pk)
+        self.assertEqual(self.index.ids, set())
+
+    def test_failed_catch_up_is_logged(self):
+        # _catch_up() closes the thread's connection, which here is the test's.
+        with mock.patch.object(self.index, 'refresh', side_effect=DatabaseError), \
+                mock.patch.object(indexes, 'connection') as connection, \
+                self.assertLogs(indexes.logger, 'ERROR') as logs:
+            self.index._catch_up()
+        connection.close.assert_called_once_with()
+        self.assertIn('Refreshing the active-ids index failed', logs.output[0])
@@ -0,0 +1,66 @@
+import datetime
+import json
+from unittest import mock
+
+from django.db.models import QuerySet
+from django.test import TestCase
+
+from users.lifecycle import EXPIRE_JOB, expire_listings
+from users.models import JobWatermark, Notification, Property
+
+from .utils import make_property, make_user
+
+TODAY = datetime.date(2026, 6, 1)
+
+
+class ExpireListingsTests(TestCase):
+
+    def setUp(self):
+        self.owner = make_user('owner')
+        # available_from 2026-01-01 plus the 90 day default TTL.
+        self.due = [make_property(self.owner, title=f'Due {n}') for n in range(3)]
+        self.current = make_property(self.owner, move_out_date=datetime.date(2026, 12, 1))
+
+    def statuses(self):
+        return dict(Property.objects.values_list('title', 'status'))
+
+    def test_expires_due_listings_in_batches(self):
+        self.assertEqual(expire_listings(batch_size=2, today=TODAY), 3)
+        self.assertEqual(Property.objects.filter(status=Property.Status.EXPIRED).count(), 3)
+        self.assertEqual(self.statuses()[self.current.title], Property.Status.ACTIVE)
+        self.assertEqual(Notification.objects.filter(user=self.owner, notification_type='LISTING_EXPIRED').count(), 3)
+        state = json.loads(JobWatermark.objects.get(name=EXPIRE_JOB).value)
+        self.assertEqual(state['cutoff'], TODAY.isoformat())
+
+    def test_rerun_with_nothing_new_is_two_probes(self):
+        expire_listings(today=TODAY)
+        with self.assertNumQueries(2):
+            self.assertEqual(expire_listings(today=TODAY), 0)
+
+    def test_rerun_sees_reactivated_listing(self):
+        expire_listings(today=TODAY)
+        relisted = self.due[0]
+        relisted.refresh_from_db()
+        relisted.status = Property.Status.ACTIVE
+        relisted.save()
+        self.assertEqual(expire_listings(today=TODAY), 1)
+
+    def test_max_batches_leaves_the_watermark(self):
+        self.assertEqual(expire_listings(batch_size=1, today=TODAY, max_batches=1), 1)
+        self.assertFalse(JobWatermark.objects.get(name=EXPIRE_JOB).value)
+        self.assertEqual(expire_listings(today=TODAY), 2)
+
+    def test_run_that_skipped_locked_rows_is_not_complete(self):
+        locked = self.due[0]
+        select_for_update = QuerySet.select_for_update
+
+        def skipping_locked(queryset, **kwargs):
+            # What skip_locked does while another transaction holds the row.
+            return select_for_update(queryset.exclude(pk=locked.pk), **kwargs)
+
+        with mock.patch.object(QuerySet, 'select_for_update', skipping_locked):
+            self.assertEqual(expire_listings(today=TODAY), 2)
+        self.assertFalse(JobWatermark.objects.get(name=EXPIRE_JOB).value)
+        # Unchanged since the first run started, yet the next run expires it.
+        self.assertEqual(expire_listings(today=TODAY), 1)
+        self.assertEqual(self.statuses()[locked.title], Property.Status.EXPIRED)
@@ -0,0 +1,108 @@
+import datetime
+import threading
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from users import market_stats
+
+from .utils import client_for, drain, make_property, make_user
+
+
+class GroupedPercentilesTests(SimpleTestCase):
+
+    def test_matches_numpy_per_group(self):
+        rng = np.random.default_rng(7)
+        groups = rng.integers(0, 5, 200)
+        prices = rng.uniform(1e5, 1e6, 200)
+        ids, sizes, values = market_stats.grouped_percentiles(groups, prices, market_stats.QUARTILES)
+        for group, size, row in zip(ids, sizes, values):
+            members = prices[groups == group]
+            self.assertEqual(size, len(members))
+            np.testing.assert_allclose(row, np.percentile(members, [25, 50, 75]))
+
+
+class MarketStatsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        owner = make_user('owner')
+        for price in (300000, 400000, 500000, 600000):
+            make_property(owner, price=Decimal(price))
+        make_property(owner, city=' abuja', price=Decimal(900000))
+
+    def test_summary_and_guide(self):
+        response = client_for().get('/api/user/market-stats/')
+        self.assertEqual(response.status_code, 200)
+        lagos, abuja = response.json()['cities']
+        self.assertEqual((lagos['city_key'], lagos['listings'], lagos['median']), ('lagos', 4, 450000.0))
+        self.assertEqual((abuja['city'], abuja['listings']), ('abuja', 1))
+
+        guide = client_for().get('/api/user/market-stats/', {'city': 'LAGOS', 'bedrooms': 2}).json()
+        self.assertEqual(guide['groups'], [
+            {'property_type': 'FLAT', 'bedrooms': 2, 'listings': 4, 'p25': 375000.0, 'median': 450000.0, 'p75': 525000.0},
+        ])
+        self.assertEqual(sum(guide['histogram']['counts']), 4)
+        self.assertEqual(client_for().get('/api/user/market-stats/', {'city': 'Kano'}).status_code, 404)
+
+    def test_cold_cache_refreshes_once(self):
+        with mock.patch.object(market_stats, 'refresh', wraps=market_stats.refresh) as refresh:
+            market_stats.summary()
+            market_stats.summary()
+        self.assertEqual(refresh.call_count, 1)
+        self.assertIsNone(cache.get(market_stats.REFRESH_LOCK))
+
+    def test_stale_summary_is_served_while_a_thread_refreshes(self):
+        stale = {'computed_at': timezone.now() - datetime.timedelta(days=1), 'months': 12, 'cities': []}
+        cache.set(market_stats._summary_key(), stale)
+        threads, release = [], threading.Event()
+
+        def slow_refresh():
+            threads.append(threading.current_thread())
+            release.wait(5)
+            return {'computed_at': timezone.now(), 'months': 12, 'cities': []}, {}
+
+        with mock.patch.object(market_stats, 'refresh', side_effect=slow_refresh):
+            self.assertEqual(market_stats.summary(), stale)
+            # The lock is held until the refresh ends: no second one starts.
+            self.assertEqual(market_stats.summary(), stale)
+            release.set()
+            drain(market_stats._executor)
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+        self.assertIsNone(cache.get(market_stats.REFRESH_LOCK))
+
+    def test_evicted_guide_is_recomputed_under_the_lock(self):
+        market_stats.refresh()
+        cache.delete(market_stats._city_key('lagos'))
+        with mock.patch.object(market_stats.cache, 'add', wraps=market_stats.cache.add) as add:
+            self.assertEqual(market_stats.city_guide('Lagos')['listings'], 4)
+        add.assert_called_once_with(market_stats.REFRESH_LOCK, True, market_stats.REFRESH_LOCK_SECONDS)
+
+    @override_settings(MARKET_STATS_WAIT_SECONDS=5)
+    def test_cold_cache_waits_for_the_refreshing_worker(self):
+        cache.add(market_stats.REFRESH_LOCK, True)
+        stored = {'computed_at': timezone.now(), 'months': 12, 'cities': []}
+
+        def other_worker_finishes():
+            cache.set(market_stats._summary_key(), stored)
+            cache.delete(market_stats.REFRESH_LOCK)
+
+        threading.Timer(0.2, other_worker_finishes).start()
+        with mock.patch.object(market_stats, 'refresh') as refresh:
+            self.assertEqual(market_stats.summary(), stored)
+        refresh.assert_not_called()
+
+    @override_settings(MARKET_STATS_WAIT_SECONDS=0.2)
+    def test_cold_cache_busy_is_503(self):
+        cache.add(market_stats.REFRESH_LOCK, True)
+        with mock.patch.object(market_stats, 'refresh') as refresh:
+            response = client_for().get('/api/user/market-stats/')
+        refresh.assert_not_called()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
@@ -0,0 +1,107 @@
+from django.test import TestCase
+
+from users import moderation
+from users.models import Review, UserProfile
+
+from .utils import client_for, make_user
+
+QUEUE = '/api/user/moderation/reviews/'
+
+
+def make_review(reviewer, **fields):
+    defaults = {'review_type': Review.ReviewType.USER, 'rating': 4, 'title': 'Good landlord', 'comment': 'Fixed things quickly.'}
+    return Review.objects.create(reviewer=reviewer, **{**defaults, **fields})
+
+
+class ModerationQueueTests(TestCase):
+
+    def setUp(self):
+        self.staff = client_for(make_user('staff', is_staff=True))
+        self.reviewer = make_user('tenant')
+
+    def walk(self, url):
+        ids = []
+        while url:
+            page = self.staff.get(url).json()
+            ids.extend(row['id'] for row in page['results'])
+            url = page['next']
+        return ids
+
+    def test_pages_through_more_than_a_thousand_tied_scores(self):
+        Review.objects.bulk_create([
+            Review(reviewer=self.reviewer, review_type='USER', rating=3, comment=f'ok {n}', spam_score=0.02)
+            for n in range(1100)
+        ])
+        top = make_review(self.reviewer, spam_score=0.9)
+        make_review(self.reviewer, spam_score=None)
+        make_review(self.reviewer, spam_score=0.5, moderation_status=Review.ModerationStatus.APPROVED)
+        expected = list(
+            Review.objects.filter(moderation_status='PENDING', spam_score__isnull=False)
+            .order_by('-spam_score', '-id').values_list('id', flat=True)
+        )
+        ids = self.walk(QUEUE)
+        self.assertEqual(len(ids), 1101)
+        self.assertEqual(ids, expected)
+        self.assertEqual(ids[0], top.pk)
+
+    def test_past_decisions_and_bad_cursor(self):
+        approved = make_review(self.reviewer, spam_score=0.5, moderation_status=Review.ModerationStatus.APPROVED)
+        self.assertEqual(self.walk(f'{QUEUE}?status=APPROVED'), [approved.pk])
+        self.assertEqual(self.staff.get(QUEUE, {'cursor': 'not-a-cursor'}).status_code, 404)
+
+    def test_staff_only(self):
+        self.assertEqual(client_for(self.reviewer).get(QUEUE).status_code, 403)
+
+    def test_bulk_decision_updates_rating(self):
+        landlord = make_user('landlord')
+        UserProfile.objects.create(user=landlord)
+        good = make_review(self.reviewer, reviewed_user=landlord, rating=5)
+        spam = make_review(make_user('spammer'), reviewed_user=landlord, rating=1, comment='Visit my site www.x.com')
+        response = self.staff.post(f'{QUEUE}bulk/', {'ids': [spam.pk], 'action': 'flag', 'reason': 'spam'}, format='json')
+        self.assertEqual(response.json(), {'updated': 1})
+        landlord.profile.refresh_from_db()
+        self.assertEqual(float(landlord.profile.rating), 5.0)
+        self.staff.post(f'{QUEUE}bulk/', {'ids': [good.pk, spam.pk], 'action': 'approve'}, format='json')
+        landlord.profile.refresh_from_db()
+        self.assertEqual(float(landlord.profile.rating), 3.0)
+
+
+class ScoringTests(TestCase):
+
+    def test_spam_scores_higher(self):
+        reviewer = make_user('tenant')
+        ordinary = make_review(reviewer, property=None)
+        spam = make_review(make_user('spammer'), comment='CHEAP LOANS!!! whatsapp +234 801 234 5678 now')
+        self.assertEqual(moderation.score_reviews(), 2)
+        ordinary.refresh_from_db()
+        spam.refresh_from_db()
+        self.assertLess(ordinary.spam_score, 0.1)
+        self.assertGreater(spam.spam_score, 0.9)
+
+
+class ReportTests(TestCase):
+
+    def setUp(self):
+        self.client = client_for(make_user('reader'))
+        self.reviewer = make_user('tenant')
+
+    def flag(self, review):
+        response = self.client.post(f'/api/user/reviews/{review.pk}/flag/', {'reason': 'fake'})
+        self.assertEqual(response.status_code, 200)
+        review.refresh_from_db()
+
+    def test_report_moves_an_undecided_review_up_the_queue(self):
+        review = make_review(self.reviewer, spam_score=0.1)
+        self.flag(review)
+        self.assertEqual((review.is_flagged, review.flag_reason, review.moderation_status), (True, 'fake', 'PENDING'))
+        self.assertGreater(review.spam_score, 0.4)
+        raised = review.spam_score
+        self.flag(review)
+        self.assertEqual(review.spam_score, raised)
+
+    def test_report_keeps_a_staff_decision(self):
+        review = make_review(self.reviewer, spam_score=0.1)
+        moderation.moderate([review.pk], approve=True, moderator=make_user('staff', is_staff=True))
+        self.flag(review)
+        self.assertTrue(review.is_flagged)
+        self.assertEqual((review.moderation_status, review.spam_score), ('APPROVED', 0.1))
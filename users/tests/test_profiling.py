@@ -0,0 +1,57 @@
+import marshal
+
+from django.test import TestCase, override_settings
+
+from users import profiling
+
+from .utils import client_for, make_property, make_user
+
+
+@override_settings(
+    PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0, PROFILING_MODE='cprofile',
+    PROFILING_ENDPOINTS=['PropertyViewSet.list'],
+)
+class SamplingProfilerTests(TestCase):
+    def setUp(self):
+        profiling.reset()
+        self.addCleanup(profiling.reset)
+        self.staff = make_user('staff', is_staff=True)
+        self.listing = make_property(make_user('owner'))
+
+    def test_profiles_configured_endpoint_only(self):
+        client = client_for()
+        self.assertEqual(client.get('/api/user/properties/').status_code, 200)
+        self.assertEqual(client.get(f'/api/user/properties/{self.listing.pk}/').status_code, 200)
+        self.assertEqual(profiling.endpoints(), [{'endpoint': 'PropertyViewSet.list', 'requests': 1}])
+
+    def test_staff_downloads_pstats(self):
+        client_for().get('/api/user/properties/')
+        response = client_for(self.staff).get('/api/user/profiling/PropertyViewSet.list/')
+        self.assertEqual(response.status_code, 200)
+        stats = marshal.loads(response.content)
+        self.assertTrue(any(function == 'list' for _file, _line, function in stats))
+
+    def test_unknown_endpoint_is_404_and_delete_clears(self):
+        client_for().get('/api/user/properties/')
+        staff = client_for(self.staff)
+        self.assertEqual(staff.get('/api/user/profiling/Nope.list/').status_code, 404)
+        self.assertEqual(staff.delete('/api/user/profiling/').status_code, 204)
+        self.assertEqual(profiling.endpoints(), [])
+
+    def test_requires_staff(self):
+        self.assertEqual(client_for(make_user('tenant')).get('/api/user/profiling/').status_code, 403)
+
+
+@override_settings(
+    PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0, PROFILING_MODE='sample',
+    PROFILING_SAMPLE_INTERVAL=0.001, PROFILING_ENDPOINTS=['PropertyViewSet.list'],
+)
+class StackSamplerTests(TestCase):
+    def setUp(self):
+        profiling.reset()
+        self.addCleanup(profiling.reset)
+
+    def test_counts_sampled_requests(self):
+        make_property(make_user('owner'))
+        client_for().get('/api/user/properties/')
+        self.assertEqual(profiling.endpoints(), [{'endpoint': 'PropertyViewSet.list', 'requests': 1}])
@@ -0,0 +1,53 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import PageNumberPagination
+
+from users.models import Property, PropertyImage
+from users.read_serializers import PropertyReadSerializer
+from users.serializers import PropertySerializer
+from users.views import PropertyViewSet
+
+from .utils import client_for, make_property, make_user
+
+
+class TwoPerPage(PageNumberPagination):
+    page_size = 2
+
+
+class PropertyReadSerializerTests(TestCase):
+
+    def setUp(self):
+        owner = make_user('owner')
+        self.listings = [make_property(owner, title=f'Flat {n}') for n in range(5)]
+        for listing in self.listings[:2]:
+            PropertyImage.objects.create(property=listing, image='properties/flat.jpg', caption='Front')
+        self.request = RequestFactory().get('/')
+
+    def test_matches_model_serializer(self):
+        queryset = Property.objects.order_by('-pk')
+        context = {'request': self.request}
+        self.assertEqual(
+            PropertyReadSerializer(queryset, context=context).data,
+            PropertySerializer(queryset, many=True, context=context).data,
+        )
+
+    def test_page_of_rows_matches_queryset(self):
+        queryset = Property.objects.order_by('-pk')
+        page = list(PropertyReadSerializer.rows(queryset)[1:3])
+        self.assertEqual(PropertyReadSerializer(page).data, PropertyReadSerializer(queryset[1:3]).data)
+
+    def test_paginated_list_reads_page_once(self):
+        with mock.patch.object(PropertyViewSet, 'pagination_class', TwoPerPage):
+            with CaptureQueriesContext(connection) as queries:
+                response = client_for().get('/api/user/properties/', {'page': 2})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['count'], 5)
+        expected = [listing.title for listing in Property.objects.all()[2:4]]
+        self.assertEqual([row['title'] for row in body['results']], expected)
+        # COUNT, the page of rows and its images; no second read of the page by pk.
+        sql = [query['sql'] for query in queries.captured_queries]
+        self.assertEqual(len(sql), 3, sql)
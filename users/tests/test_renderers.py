@@ -0,0 +1,42 @@
+import datetime
+import uuid
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from users import renderers
+from users.renderers import FastJSONRenderer
+
+SAMPLE = {
+    'id': 7, 'price': Decimal('500000.00'), 'ratio': 0.25, 'title': 'Flat in Lekki Phase 1 — ₦\u2028',
+    'created_at': datetime.datetime(2026, 3, 1, 9, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+    'available_from': datetime.date(2026, 4, 1), 'token': uuid.UUID(int=1),
+    'tags': ['pets', None, True], 'nested': {1: 'int key'},
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def assertSameAsDrf(self, data, media_type=None, context=None):
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type, context), JSONRenderer().render(data, media_type, context),
+        )
+
+    def test_matches_drf_byte_for_byte(self):
+        self.assertSameAsDrf(SAMPLE)
+        self.assertSameAsDrf([SAMPLE, {'local': timezone.localtime(SAMPLE['created_at'])}])
+        self.assertSameAsDrf(None)
+
+    def test_falls_back_for_big_integers_and_indent(self):
+        self.assertSameAsDrf({'big': 2 ** 70})
+        self.assertSameAsDrf(SAMPLE, 'application/json; indent=4')
+
+    def test_uses_orjson_unless_disabled(self):
+        with mock.patch.object(renderers.orjson, 'dumps', wraps=renderers.orjson.dumps) as dumps:
+            renderers.dumps(SAMPLE)
+            with override_settings(FAST_JSON=False):
+                self.assertEqual(renderers.dumps(SAMPLE), JSONRenderer().render(SAMPLE))
+        self.assertEqual(dumps.call_count, 1)
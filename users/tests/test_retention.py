@@ -0,0 +1,75 @@
+import datetime
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from users import retention
+from users.models import ArchivedMessage, ArchivedNotification, Message, Notification
+
+from .utils import client_for, make_user
+
+NOW = timezone.now()
+OLD = NOW - datetime.timedelta(days=365)
+
+
+class RetentionTests(TestCase):
+
+    def setUp(self):
+        self.tenant = make_user('tenant')
+        self.owner = make_user('owner')
+
+    def notification(self, is_read, created_at):
+        notification = Notification.objects.create(
+            user=self.tenant, notification_type=Notification.NotificationType.MESSAGE_RECEIVED,
+            title='New message', message='Is it available?', is_read=is_read,
+        )
+        Notification.objects.filter(pk=notification.pk).update(created_at=created_at)
+        return notification
+
+    def message(self, created_at):
+        message = Message.objects.create(sender=self.tenant, recipient=self.owner, content='Is it available?')
+        Message.objects.filter(pk=message.pk).update(created_at=created_at)
+        return message
+
+    def test_archives_old_read_notifications(self):
+        archived = [self.notification(True, OLD) for _ in range(3)]
+        unread = self.notification(False, OLD)
+        recent = self.notification(True, NOW)
+        result = retention.archive_notifications(batch_size=2, now=NOW)
+        self.assertEqual(result['rows'], 3)
+        self.assertGreater(result['bytes'], 3 * retention.ROW_OVERHEAD_BYTES)
+        self.assertEqual(set(Notification.objects.values_list('pk', flat=True)), {unread.pk, recent.pk})
+        self.assertEqual(
+            set(ArchivedNotification.objects.values_list('pk', flat=True)), {row.pk for row in archived},
+        )
+        self.assertEqual(ArchivedNotification.objects.get(pk=archived[0].pk).created_at, OLD)
+
+    def test_max_batches_stops_early(self):
+        old = [self.message(OLD) for _ in range(3)]
+        self.message(NOW)
+        self.assertEqual(retention.archive_messages(batch_size=2, max_batches=1, now=NOW)['rows'], 2)
+        self.assertEqual(retention.archive_messages(batch_size=2, now=NOW)['rows'], 1)
+        self.assertEqual(set(ArchivedMessage.objects.values_list('pk', flat=True)), {row.pk for row in old})
+        self.assertEqual(Message.objects.count(), 1)
+
+    def test_command(self):
+        self.message(OLD)
+        out = io.StringIO()
+        call_command('archive_history', stdout=out)
+        self.assertIn('Archived 1 messages', out.getvalue())
+
+    def test_archive_endpoints_are_per_user(self):
+        self.message(OLD)
+        self.notification(True, OLD)
+        retention.archive_messages(now=NOW)
+        retention.archive_notifications(now=NOW)
+        stranger = client_for(make_user('stranger'))
+        self.assertEqual(stranger.get('/api/user/archived-messages/').json()['results'], [])
+        page = client_for(self.owner).get('/api/user/archived-messages/').json()
+        self.assertEqual([row['content'] for row in page['results']], ['Is it available?'])
+        self.assertIn('next', page)
+        page = client_for(self.tenant).get('/api/user/archived-notifications/').json()
+        self.assertEqual(len(page['results']), 1)
+        self.assertEqual(client_for(self.owner).get('/api/user/archived-notifications/').json()['results'], [])
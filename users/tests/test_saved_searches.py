@@ -0,0 +1,142 @@
+import threading
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase
+
+from users import saved_searches
+from users.models import Notification, Property, SavedSearch
+
+from .utils import client_for, drain, make_property, make_user
+
+
+class MatchingTests(TestCase):
+
+    def setUp(self):
+        self.owner = make_user('owner')
+        self.tenant = make_user('tenant')
+        self.prop = make_property(self.owner, city=' LAGOS ', price=Decimal('500000.00'), has_parking=True)
+
+    def search(self, user=None, **criteria):
+        return SavedSearch.objects.create(user=user or self.tenant, **criteria)
+
+    def matches(self):
+        return set(saved_searches.matching_searches(self.prop).values_list('pk', flat=True))
+
+    def test_criteria(self):
+        anything = self.search()
+        city = self.search(city='Lagos', property_type=Property.PropertyType.FLAT)
+        priced = self.search(min_price=Decimal('400000'), max_price=Decimal('500000'))
+        parking = self.search(has_parking=True)
+        self.search(city='Abuja')
+        self.search(property_type=Property.PropertyType.DUPLEX)
+        self.search(max_price=Decimal('499999'))
+        self.search(min_bedrooms=3)
+        self.search(is_furnished=True)
+        self.assertEqual(self.matches(), {anything.pk, city.pk, priced.pk, parking.pk})
+
+    def test_skips_inactive_and_own_searches(self):
+        self.search(is_active=False)
+        self.search(user=self.owner)
+        self.assertEqual(self.matches(), set())
+
+    def test_one_notification_per_user(self):
+        first, second = self.search(), self.search(city='lagos')
+        self.search(user=make_user('other'))
+        self.assertEqual(saved_searches.notify_matches(self.prop), 2)
+        self.assertEqual(
+            Notification.objects.filter(notification_type=Notification.NotificationType.SAVED_SEARCH_MATCH).count(), 2,
+        )
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertIsNotNone(first.last_notified_at)
+        self.assertIsNotNone(second.last_notified_at)
+
+
+class StatusTransitionTests(TestCase):
+
+    def setUp(self):
+        self.owner = make_user('owner')
+
+    def alerted(self, prop, save):
+        with mock.patch.object(saved_searches, 'notify_later') as notify_later, \
+                self.captureOnCommitCallbacks(execute=True):
+            save(prop)
+        return [call.args for call in notify_later.call_args_list] == [(prop.pk,)]
+
+    def test_alerts_only_on_transition_to_active(self):
+        prop = make_property(self.owner, status=Property.Status.DRAFT)
+        self.assertFalse(self.alerted(prop, lambda prop: prop.save()))
+        prop.status = Property.Status.ACTIVE
+        self.assertTrue(self.alerted(prop, lambda prop: prop.save()))
+        self.assertFalse(self.alerted(prop, lambda prop: prop.save()))
+        # A stale instance saved after another writer activated the row.
+        stale = Property.objects.get(pk=prop.pk)
+        Property.objects.filter(pk=prop.pk).update(status=Property.Status.DRAFT)
+        self.assertTrue(self.alerted(stale, lambda prop: prop.save()))
+
+    def test_new_active_listing_alerts(self):
+        with mock.patch.object(saved_searches, 'notify_later') as notify_later, \
+                self.captureOnCommitCallbacks(execute=True):
+            prop = make_property(self.owner)
+        notify_later.assert_called_once_with(prop.pk)
+
+    def test_saves_that_cannot_activate_skip_the_lookup(self):
+        prop = make_property(self.owner, status=Property.Status.DRAFT)
+        with self.assertNumQueries(1):
+            prop.save()
+        prop.status = Property.Status.ACTIVE
+        with self.assertNumQueries(1):
+            prop.save(update_fields=['views_count'])
+
+
+class SavedSearchApiTests(TransactionTestCase):
+
+    def setUp(self):
+        self.tenant = make_user('tenant')
+        self.client = client_for(self.tenant)
+
+    def alerts(self):
+        drain(saved_searches._executor)
+        return Notification.objects.filter(user=self.tenant, notification_type='SAVED_SEARCH_MATCH').count()
+
+    def test_alerts_when_listing_becomes_active(self):
+        # JSON, since form data reads an omitted is_active as False.
+        response = self.client.post('/api/user/saved-searches/', {'city': 'Lagos'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['city'], 'lagos')
+
+        owner = client_for(make_user('owner'))
+        response = owner.post('/api/user/properties/', {
+            'title': 'Draft flat', 'description': 'd', 'property_type': 'FLAT', 'address': 'a',
+            'city': 'Lagos', 'state': 'Lagos', 'price': '400000.00', 'status': 'DRAFT',
+        })
+        self.assertEqual(self.alerts(), 0)
+        owner.patch(f"/api/user/properties/{response.json()['id']}/", {'status': 'ACTIVE'})
+        self.assertEqual(self.alerts(), 1)
+        # Saving an already active listing does not alert again.
+        owner.patch(f"/api/user/properties/{response.json()['id']}/", {'title': 'Renamed'})
+        self.assertEqual(self.alerts(), 1)
+
+    def test_fan_out_runs_off_the_request_thread(self):
+        SavedSearch.objects.create(user=self.tenant)
+        threads, real_notify = [], saved_searches.notify_matches
+
+        def notify_matches(prop):
+            threads.append(threading.current_thread())
+            return real_notify(prop)
+
+        with mock.patch.object(saved_searches, 'notify_matches', side_effect=notify_matches):
+            make_property(make_user('owner'))
+            self.assertEqual(self.alerts(), 1)
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    def test_price_range_validated(self):
+        response = self.client.post('/api/user/saved-searches/', {'min_price': '10', 'max_price': '5'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_only_own_searches_listed(self):
+        SavedSearch.objects.create(user=make_user('other'), city='abuja')
+        SavedSearch.objects.create(user=self.tenant, city='lagos')
+        self.assertEqual([row['city'] for row in self.client.get('/api/user/saved-searches/').json()], ['lagos'])
@@ -0,0 +1,64 @@
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from inndoor_be import schema
+
+
+class StoredSchemaTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory)
+        self.schema_dir = directory / 'schema'
+        override = override_settings(SCHEMA_DIR=self.schema_dir, DEBUG=False)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.reset()
+        self.addCleanup(self.reset)
+
+    @staticmethod
+    def reset():
+        schema._stored = None
+
+    def manifest(self):
+        return json.loads((self.schema_dir / 'manifest.json').read_text())
+
+    def test_first_request_writes_the_spec(self):
+        response = self.client.get('/docs.json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['info']['title'], 'Inndoor Backend API')
+        manifest = self.manifest()
+        self.assertEqual(response['ETag'], f'"{manifest["etag"]}"')
+        self.assertEqual(manifest['fingerprint'], schema.fingerprint())
+        revalidated = self.client.get('/docs.yaml', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_reuses_spec_from_the_same_code(self):
+        schema.write({'etag': 'cafe', 'json': b'{}', 'yaml': b'{}\n'})
+        with mock.patch.object(schema, 'generate') as generate:
+            self.assertEqual(schema.stored()['etag'], 'cafe')
+        generate.assert_not_called()
+
+    def test_regenerates_spec_from_other_code(self):
+        with mock.patch.object(schema, 'fingerprint', return_value='previous-deploy'):
+            schema.write({'etag': 'cafe', 'json': b'{}', 'yaml': b'{}\n'})
+        self.assertNotEqual(schema.stored()['etag'], 'cafe')
+        self.assertEqual(self.manifest()['fingerprint'], schema.fingerprint())
+
+    def test_fingerprint_follows_the_source(self):
+        base_dir = self.schema_dir.parent
+        views = base_dir / 'users' / 'views.py'
+        views.parent.mkdir()
+        views.write_text('a = 1\n')
+        (base_dir / 'users' / 'tests').mkdir()
+        with override_settings(BASE_DIR=base_dir):
+            before = schema.fingerprint()
+            (base_dir / 'users' / 'tests' / 'test_views.py').write_text('b = 2\n')
+            self.assertEqual(schema.fingerprint(), before)
+            views.write_text('a = 2\n')
+            self.assertNotEqual(schema.fingerprint(), before)
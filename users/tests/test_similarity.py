@@ -0,0 +1,97 @@
+import datetime
+import threading
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from users import saved_searches, similarity
+from users.models import Property
+from users.similarity import SimilarityIndex
+
+from .utils import client_for, drain, make_property, make_user
+
+
+class SimilarityTests(TestCase):
+
+    def setUp(self):
+        owner = make_user('owner')
+        self.query = make_property(owner, title='Query', price=Decimal('500000'), bedrooms=2)
+        self.close = make_property(owner, title='Close', price=Decimal('510000'), bedrooms=2)
+        self.far = make_property(owner, title='Far', price=Decimal('5000000'), bedrooms=5)
+        self.draft = make_property(owner, title='Draft', price=Decimal('500000'), status=Property.Status.DRAFT)
+        self.index = SimilarityIndex()
+        self.index.build()
+
+    def test_ranks_active_listings_and_skips_itself(self):
+        self.assertEqual(self.index.similar(self.query, 10), [self.close.pk, self.far.pk])
+        self.assertEqual(self.index.similar(self.query, 1), [self.close.pk])
+
+    def test_endpoint(self):
+        with mock.patch.object(similarity, 'index', SimilarityIndex()):
+            response = client_for().get(f'/api/user/properties/{self.query.pk}/similar/', {'limit': 1})
+        self.assertEqual([row['title'] for row in response.json()], ['Close'])
+
+    def test_local_saves_do_not_advance_the_watermark(self):
+        watermark = self.index.watermark
+        # Another worker's change, stamped before this worker's save below.
+        Property.objects.filter(pk=self.far.pk).update(
+            price=Decimal('505000'), bedrooms=2, updated_at=watermark + datetime.timedelta(seconds=1),
+        )
+        self.close.price = Decimal('900000')
+        self.close.updated_at = timezone.now() + datetime.timedelta(minutes=5)
+        self.index.upsert(self.close)
+        self.assertEqual(self.index.watermark, watermark)
+
+        self.index.refresh()
+        self.assertEqual(self.index.similar(self.query, 1), [self.far.pk])
+
+    def test_rebuild_drops_listings_deleted_elsewhere(self):
+        Property.objects.filter(pk=self.close.pk).delete()
+        self.index.refresh()
+        self.assertIn(self.close.pk, self.index.similar(self.query, 10))
+        self.index.build()
+        self.assertEqual(self.index.similar(self.query, 10), [self.far.pk])
+
+
+class BackgroundRefreshTests(TransactionTestCase):
+
+    def setUp(self):
+        # Active listings alert saved searches on a background thread; let
+        # that finish before the tables are flushed.
+        self.addCleanup(drain, saved_searches._executor)
+        self.owner = make_user('owner')
+        self.query = make_property(self.owner, title='Query')
+        self.index = SimilarityIndex()
+
+    def test_first_build_runs_once(self):
+        builds = []
+        build = self.index.build
+
+        def counted_build():
+            builds.append(threading.get_ident())
+            build()
+
+        self.index.build = counted_build
+        threads = [threading.Thread(target=self.index.ensure_fresh) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(builds), 1)
+        self.assertTrue(self.index.built)
+
+    def test_catches_up_off_the_request_path(self):
+        self.index.ensure_fresh()
+        added = make_property(self.owner, title='Added elsewhere')
+        self.index.last_refresh = 0.0
+        self.index.ensure_fresh()
+        self.index._worker.join()
+        self.assertEqual(self.index.similar(self.query, 10), [added.pk])
+
+        Property.objects.filter(pk=added.pk).delete()
+        self.index.last_refresh = self.index.last_build = 0.0
+        self.index.ensure_fresh()
+        self.index._worker.join()
+        self.assertEqual(self.index.similar(self.query, 10), [])
@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from inndoor_be.db_backends.sqlite3.base import DatabaseWrapper, write_atomic
+
+
+class TransactionStartTests(TransactionTestCase):
+
+    def setUp(self):
+        if not isinstance(connections['default'], DatabaseWrapper):
+            self.skipTest('tuned SQLite backend only')
+
+    def begins(self, block):
+        with CaptureQueriesContext(connections['default']) as queries:
+            with block:
+                User.objects.filter(username='x').exists()
+        return [query['sql'] for query in queries if query['sql'].startswith('BEGIN')]
+
+    def test_atomic_starts_deferred(self):
+        self.assertEqual(self.begins(transaction.atomic()), ['BEGIN'])
+
+    def test_write_atomic_starts_immediate(self):
+        self.assertEqual(self.begins(write_atomic()), ['BEGIN IMMEDIATE'])
+        # The flag applies to that one BEGIN only.
+        self.assertEqual(self.begins(transaction.atomic()), ['BEGIN'])
+
+    def test_nested_write_atomic_is_a_savepoint(self):
+        with transaction.atomic():
+            self.assertEqual(self.begins(write_atomic()), [])
+
+    def test_rolls_back_like_atomic(self):
+        with self.assertRaises(ValueError):
+            with write_atomic():
+                User.objects.create(username='x')
+                raise ValueError
+        self.assertFalse(User.objects.exists())
@@ -0,0 +1,63 @@
+import io
+import re
+import sys
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from users import signals
+from users.management.commands.startup_profile import Command, parse_importtime
+
+from .utils import make_property, make_user
+
+
+class ParseImporttimeTests(SimpleTestCase):
+
+    def test_skips_header_and_other_lines(self):
+        stderr = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   _io\n'
+            'import time:      2100 |       5400 | django.conf\n'
+            'Traceback (most recent call last):\n'
+        )
+        self.assertEqual(parse_importtime(stderr), [('_io', 120, 120), ('django.conf', 2100, 5400)])
+
+
+class StartupProfileTests(SimpleTestCase):
+
+    def test_compare_boots_both_modes(self):
+        out = io.StringIO()
+        # A 404 path, so the boots never open the database.
+        call_command('startup_profile', '--compare', '--runs=2', '--top=3', '--path=/api/user/missing/', stdout=out)
+        report = out.getvalue()
+        self.assertEqual(report.count('first request: 404'), 2)
+        self.assertEqual(report.count('(median of 2 boots)'), 2)
+        deferred = re.search(r'modules deferred\s+(\d+) of (\d+)', report)
+        self.assertGreater(int(deferred[1]), 0)
+        self.assertIn('time to first request', report)
+        self.assertRegex(report, r'lazy boot faster\s+in [0-2] of 2 pairs')
+
+    def test_modes_alternate_and_medians_are_reported(self):
+        command, modes = Command(), []
+
+        def boot(path, lazy):
+            modes.append(lazy)
+            total = 0.5 if lazy else 0.6 + len(modes) / 100
+            return {'phases': {'apps': total}, 'total': total, 'apps': {}, 'status': '200 OK', 'modules': []}
+
+        with mock.patch.object(command, 'boot', side_effect=boot):
+            reports = command.profile('/', [False, True], 3)
+        self.assertEqual(modes, [False, True, False, True, False, True])
+        self.assertAlmostEqual(command.median(reports[False])['total'], 0.63)
+
+
+class LazyIndexTests(TestCase):
+
+    def test_saving_a_listing_does_not_load_the_indexes(self):
+        with mock.patch.dict(sys.modules):
+            sys.modules.pop('users.similarity', None)
+            sys.modules.pop('users.autocomplete', None)
+            make_property(make_user('owner'))
+            self.assertNotIn('users.similarity', sys.modules)
+            self.assertEqual(list(signals._loaded_indexes()), [])
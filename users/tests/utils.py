@@ -0,0 +1,35 @@
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import Property
+
+
+def make_user(username, **fields):
+    return User.objects.create_user(username, f'{username}@example.com', 'Pass-word-123', **fields)
+
+
+def make_property(owner, **fields):
+    defaults = {
+        'title': 'Two bedroom flat', 'description': 'Bright flat near the market.',
+        'property_type': Property.PropertyType.FLAT, 'address': '1 Market Road', 'city': 'Lagos',
+        'state': 'Lagos', 'bedrooms': 2, 'bathrooms': 1, 'price': Decimal('500000.00'),
+        'status': Property.Status.ACTIVE, 'available_from': datetime.date(2026, 1, 1),
+    }
+    return Property.objects.create(owner=owner, **{**defaults, **fields})
+
+
+def drain(executor):
+    """Wait for the tasks queued so far on a one-thread ``BackgroundExecutor``."""
+    executor.submit(lambda: None).result(timeout=5)
+
+
+def client_for(user=None):
+    """An APIClient sending ``user``'s JWT, like the mobile app does."""
+    client = APIClient()
+    if user is not None:
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
@@ -0,0 +1,70 @@
+"""
+Token-bucket throttles for the login and register endpoints.
+
+Each bucket holds up to N tokens for a rate of "N/period" and refills at N
+per period, so a client gets a burst of N followed by a steady trickle. This
+differs from DRF's sliding window, which locks a client out for the whole
+window. Buckets live in the default cache, which is shared by all workers
+when REDIS_URL is set. As with DRF's own throttles, the read-modify-write
+is not atomic, so concurrent requests can occasionally overspend a token.
+
+The cost of a request grows with the load on the password hash pool
+(see users/hashing.py). When hashing saturates, every client's effective
+rate drops, up to MAX_BACKOFF times slower, until the queue drains.
+"""
+import hashlib
+
+from rest_framework.throttling import SimpleRateThrottle
+
+from . import hashing
+
+MAX_BACKOFF = 8.0
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    cache_format = 'throttle_bucket_%(scope)s_%(ident)s'
+
+    def cost(self):
+        backoff = min(1.0 / max(1.0 - hashing.pool.load(), 1.0 / MAX_BACKOFF), MAX_BACKOFF)
+        # Never more than a full bucket, so a waiting client always gets in.
+        return min(backoff, self.num_requests)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        tokens, stamp = self.cache.get(self.key, (self.num_requests, self.now))
+        self.tokens = min(self.num_requests, tokens + (self.now - stamp) * self.num_requests / self.duration)
+        self.spend = self.cost()
+        allowed = self.tokens >= self.spend
+        if allowed:
+            self.tokens -= self.spend
+        # An untouched bucket is full again after one period.
+        self.cache.set(self.key, (self.tokens, self.now), self.duration)
+        return allowed
+
+    def wait(self):
+        return (self.spend - self.tokens) * self.duration / self.num_requests
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    scope = 'auth_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class AuthUsernameThrottle(TokenBucketThrottle):
+    """Limits attempts against one account, however many IPs they come from."""
+    scope = 'auth_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not isinstance(username, str) or not username:
+            return None
+        ident = hashlib.sha256(username.strip().lower().encode()).hexdigest()[:32]
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
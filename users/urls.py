@@ -1,14 +1,18 @@
-from django.urls import include, path, re_path
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
-from rest_framework import permissions
+from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 
-from .views import (DealViewSet, InspectionViewSet, LoginView, LogoutView,
-                    MessageViewSet, NotificationViewSet, PropertyImageViewSet,
-                    PropertyViewSet, RegisterView, ReviewViewSet,
-                    SavedPropertyViewSet, UserProfileViewSet, UserView)
+from . import async_views
+from .batch import BatchView
+from .views import (AgentDirectoryView, ArchivedMessageViewSet,
+                    ArchivedNotificationViewSet, DatabasePoolStatsView,
+                    DealViewSet, InspectionViewSet, ListingAnalyticsView,
+                    LoginView, LogoutView, MarketStatsView, MessageViewSet,
+                    NotificationViewSet, ProfilingStatsView,
+                    PropertyImageViewSet, PropertyViewSet, RegisterView,
+                    ReviewModerationViewSet, ReviewViewSet,
+                    SavedPropertyViewSet, SavedSearchViewSet,
+                    UserProfileViewSet, UserView)
 
 router = DefaultRouter()
 router.register(r'profiles', UserProfileViewSet)
@@ -20,18 +24,10 @@ router.register(r'reviews', ReviewViewSet)
 router.register(r'messages', MessageViewSet)
 router.register(r'notifications', NotificationViewSet)
 router.register(r'saved-properties', SavedPropertyViewSet)
-
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Inndoor Backend API",
-      default_version='v1',
-      description="API documentation for Inndoor platform",
-      contact=openapi.Contact(email="support@inndoor.co"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
-
+router.register(r'saved-searches', SavedSearchViewSet)
+router.register(r'archived-messages', ArchivedMessageViewSet)
+router.register(r'archived-notifications', ArchivedNotificationViewSet)
+router.register(r'moderation/reviews', ReviewModerationViewSet, basename='review-moderation')
 
 urlpatterns = [
     # DRF Router URLs
@@ -41,8 +37,16 @@ urlpatterns = [
     path('refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('me/', UserView.as_view(), name='me'),
-
-    re_path(r'^docs(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('analytics/', ListingAnalyticsView.as_view(), name='listing-analytics'),
+    path('agents/', AgentDirectoryView.as_view(), name='agent-directory'),
+    path('market-stats/', MarketStatsView.as_view(), name='market-stats'),
+    path('profiling/', ProfilingStatsView.as_view(), name='profiling'),
+    path('profiling/<str:endpoint>/', ProfilingStatsView.as_view(), name='profiling-endpoint'),
+    # async read endpoints for the ASGI deployment
+    path('async/properties/', async_views.property_list, name='async-property-list'),
+    path('async/properties/<int:pk>/', async_views.property_detail, name='async-property-detail'),
+    path('async/notifications/', async_views.notification_list, name='async-notification-list'),
+    path('async/messages/', async_views.message_list, name='async-message-list'),
+    path('db-pool/', DatabasePoolStatsView.as_view(), name='db-pool'),
 ]
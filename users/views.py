@@ -1,29 +1,54 @@
+from django.db import models
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
+from inndoor_be.db_backends.pool import pool_stats
 from rest_framework import filters, generics, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 
-from .models import (Deal, Inspection, Message, Notification, Property,
-                     PropertyImage, Review, SavedProperty, UserProfile)
-from .serializers import (DealSerializer, InspectionSerializer,
-                          LoginSerializer, LogoutSerializer, MessageSerializer,
-                          NotificationSerializer, PropertyImageSerializer,
-                          PropertySerializer, RegisterSerializer,
-                          ReviewSerializer, SavedPropertySerializer,
-                          UserProfileSerializer, UserSerializer)
+from . import agents, analytics, autocomplete, moderation, profiling
+from .exceptions import ServiceBusy
+from .models import (ArchivedMessage, ArchivedNotification, Deal, Inspection,
+                     ListingEvent, Message, Notification, Property,
+                     PropertyDuplicate, PropertyImage, Review, SavedProperty,
+                     SavedSearch, UserProfile)
+from .pagination import KeysetPagination
+from .read_serializers import (MessageReadSerializer,
+                               NotificationReadSerializer,
+                               PropertyReadSerializer)
+from .serializers import (AgentDirectoryQuerySerializer,
+                          AgentDirectorySerializer, ArchivedMessageSerializer,
+                          ArchivedNotificationSerializer, DealSerializer,
+                          InspectionSerializer,
+                          ListingAnalyticsQuerySerializer, LoginSerializer,
+                          LogoutSerializer, MarketStatsQuerySerializer,
+                          MessageSerializer,
+                          NotificationSerializer, PropertyDuplicateSerializer,
+                          PropertyAutocompleteQuerySerializer,
+                          PropertyImageSerializer, PropertySerializer,
+                          RegisterSerializer,
+                          ReviewBulkModerationSerializer,
+                          ReviewModerationSerializer, ReviewSerializer,
+                          SavedPropertySerializer,
+                          SavedSearchSerializer, UserProfileSerializer,
+                          UserSerializer)
+from .throttling import AuthIPThrottle, AuthUsernameThrottle
 
 
 class RegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [AuthIPThrottle, AuthUsernameThrottle]
 
 class LoginView(TokenObtainPairView):
     serializer_class = TokenObtainPairSerializer
+    throttle_classes = [AuthIPThrottle, AuthUsernameThrottle]
 
 class LogoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -41,6 +66,19 @@ class UserView(APIView):
         serializer = UserSerializer(request.user)
         return Response(serializer.data)
 
+class ValuesListMixin:
+    """Serves ``list`` with ``read_serializer_class``, built from ``.values()`` rows."""
+    read_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        context = self.get_serializer_context()
+        # Paginators slice whatever they are given, so the page is read once, as rows.
+        page = self.paginate_queryset(self.read_serializer_class.rows(queryset))
+        if page is not None:
+            return self.get_paginated_response(self.read_serializer_class(list(page), context=context).data)
+        return Response(self.read_serializer_class(queryset, context=context).data)
+
 class UserProfileViewSet(viewsets.ModelViewSet):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
@@ -50,34 +88,84 @@ class UserProfileViewSet(viewsets.ModelViewSet):
     search_fields = ['user__username', 'user__email', 'bio']
 
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            # schema generation runs without a real request/user
+            return self.queryset.none()
         if self.action == 'list' and not self.request.user.is_staff:
             return UserProfile.objects.filter(user=self.request.user)
         return super().get_queryset()
 
-class PropertyViewSet(viewsets.ModelViewSet):
+class PropertyViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = Property.objects.all()
     serializer_class = PropertySerializer
+    read_serializer_class = PropertyReadSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['property_type', 'city', 'state', 'status', 'is_verified', 'is_furnished', 'has_parking', 'pets_allowed']
     search_fields = ['title', 'description', 'address', 'landmark']
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        from . import dedup  # imports numpy, like users.similarity
+
+        property = serializer.save(owner=self.request.user)
+        dedup.sign_and_flag(property)
+
+    def perform_update(self, serializer):
+        from . import dedup
+
+        property = serializer.save()
+        dedup.sign_and_flag(property)
+
+    @action(detail=True, methods=['get'])
+    def duplicates(self, request, pk=None):
+        property = self.get_object()
+        if not (request.user.is_staff or property.owner_id == request.user.id):
+            return Response({'detail': 'Only the owner can see duplicate flags.'}, status=status.HTTP_403_FORBIDDEN)
+        flags = PropertyDuplicate.objects.filter(models.Q(property=property) | models.Q(duplicate_of=property))
+        return Response(PropertyDuplicateSerializer(flags, many=True).data)
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        query = PropertyAutocompleteQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        return Response(autocomplete.index.complete(params['q'], params.get('kind'), params['limit']))
 
     @action(detail=True, methods=['post'])
     def increment_views(self, request, pk=None):
         property = self.get_object()
         property.views_count += 1
         property.save()
+        analytics.record(property.pk, ListingEvent.EventType.VIEW)
         return Response({'views_count': property.views_count})
 
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        property = self.get_object()
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            return Response({'limit': 'Must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        from . import similarity  # imports numpy; only needed by this action
+
+        ids = similarity.index.similar(property, limit)
+        matches = (
+            Property.objects.filter(status=Property.Status.ACTIVE)
+            .select_related('owner', 'verified_by')
+            .prefetch_related('images')
+            .in_bulk(ids)
+        )
+        ranked = [matches[pk] for pk in ids if pk in matches]
+        return Response(self.get_serializer(ranked, many=True).data)
+
 class PropertyImageViewSet(viewsets.ModelViewSet):
     queryset = PropertyImage.objects.all()
     serializer_class = PropertyImageSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return self.queryset.none()
         return PropertyImage.objects.filter(property__owner=self.request.user)
 
 class InspectionViewSet(viewsets.ModelViewSet):
@@ -88,6 +176,8 @@ class InspectionViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status', 'property', 'agent', 'preferred_date']
 
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return self.queryset.none()
         user = self.request.user
         return Inspection.objects.filter(
             models.Q(requester=user) | 
@@ -111,6 +201,18 @@ class InspectionViewSet(viewsets.ModelViewSet):
         inspection.save()
         return Response(InspectionSerializer(inspection).data)
 
+    @action(detail=True, methods=['post'])
+    def assign_agent(self, request, pk=None):
+        inspection = self.get_object()
+        if not (request.user.is_staff or inspection.property.owner_id == request.user.id):
+            return Response({'detail': 'Only the owner can assign an agent.'}, status=status.HTTP_403_FORBIDDEN)
+        if inspection.agent_id is not None:
+            return Response({'detail': 'An agent is already assigned.'}, status=status.HTTP_400_BAD_REQUEST)
+        if agents.assign(inspection) is None:
+            return Response({'detail': 'No agent is available for this date and time.'}, status=status.HTTP_409_CONFLICT)
+        inspection.refresh_from_db()
+        return Response(InspectionSerializer(inspection).data)
+
 class DealViewSet(viewsets.ModelViewSet):
     queryset = Deal.objects.all()
     serializer_class = DealSerializer
@@ -119,6 +221,8 @@ class DealViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status', 'property', 'tenant', 'owner', 'agent']
 
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return self.queryset.none()
         user = self.request.user
         return Deal.objects.filter(
             models.Q(tenant=user) | 
@@ -133,23 +237,33 @@ class ReviewViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['review_type', 'property', 'reviewed_user', 'is_verified_stay']
 
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return self.queryset.none()
+        queryset = super().get_queryset()
+        if not self.request.user.is_staff:
+            queryset = queryset.exclude(moderation_status=Review.ModerationStatus.FLAGGED)
+        return queryset
+
     def perform_create(self, serializer):
-        serializer.save(reviewer=self.request.user)
+        review = serializer.save(reviewer=self.request.user)
+        moderation.refresh_user_ratings([review.reviewed_user_id])
 
     @action(detail=True, methods=['post'])
     def flag(self, request, pk=None):
         review = self.get_object()
-        review.is_flagged = True
-        review.flag_reason = request.data.get('reason', '')
-        review.save()
+        moderation.report(review, request.data.get('reason', ''))
         return Response({'status': 'review flagged'})
 
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = Message.objects.all()
     serializer_class = MessageSerializer
+    read_serializer_class = MessageReadSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return self.queryset.none()
         user = self.request.user
         return Message.objects.filter(
             models.Q(sender=user) | 
@@ -167,12 +281,15 @@ class MessageViewSet(viewsets.ModelViewSet):
             message.save()
         return Response({'status': 'message marked as read'})
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
+    read_serializer_class = NotificationReadSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return self.queryset.none()
         return Notification.objects.filter(user=self.request.user)
 
     @action(detail=True, methods=['post'])
@@ -188,7 +305,201 @@ class SavedPropertyViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return self.queryset.none()
         return SavedProperty.objects.filter(user=self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+class SavedSearchViewSet(viewsets.ModelViewSet):
+    queryset = SavedSearch.objects.all()
+    serializer_class = SavedSearchSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return self.queryset.none()
+        return SavedSearch.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+class ArchivePagination(CursorPagination):
+    # cursor paging stays a single index range scan however deep the history
+    ordering = '-created_at'
+    page_size = 50
+
+class ArchivedMessageViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ArchivedMessage.objects.all()
+    serializer_class = ArchivedMessageSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ArchivePagination
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return self.queryset.none()
+        user = self.request.user
+        return ArchivedMessage.objects.filter(
+            models.Q(sender=user) |
+            models.Q(recipient=user)
+        )
+
+class ArchivedNotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ArchivedNotification.objects.all()
+    serializer_class = ArchivedNotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ArchivePagination
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return self.queryset.none()
+        return ArchivedNotification.objects.filter(user=self.request.user)
+
+class ModerationQueuePagination(KeysetPagination):
+    # many reviews share a score, so the cursor carries (spam_score, id)
+    page_size = 50
+    ordering = ('-spam_score', '-id')
+
+
+class ReviewModerationViewSet(viewsets.ReadOnlyModelViewSet):
+    """Staff moderation queue: PENDING reviews, most likely spam first.
+
+    ``?status=APPROVED|FLAGGED`` lists past decisions instead.
+    """
+    queryset = Review.objects.all()
+    serializer_class = ReviewModerationSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = ModerationQueuePagination
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return self.queryset.none()
+        moderation_status = self.request.query_params.get('status', Review.ModerationStatus.PENDING)
+        return Review.objects.filter(moderation_status=moderation_status, spam_score__isnull=False)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        serializer = ReviewBulkModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = moderation.moderate(
+            serializer.validated_data['ids'],
+            approve=serializer.validated_data['action'] == 'approve',
+            moderator=request.user,
+            reason=serializer.validated_data['reason'],
+        )
+        return Response({'updated': updated})
+
+
+class ProfilingStatsView(APIView):
+    """Staff-only access to the in-memory sampling profiler results.
+
+    ``GET profiling/`` lists profiled endpoints; ``GET profiling/<endpoint>/``
+    downloads them with ``?output=pstats`` (default), ``collapsed`` or
+    ``text``; ``DELETE`` clears the aggregated stats.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, endpoint=None):
+        if endpoint is None:
+            return Response(profiling.endpoints())
+
+        output = request.query_params.get('output', 'pstats')
+        if output == 'collapsed':
+            data, content_type, ext = profiling.dump_collapsed(endpoint), 'text/plain', 'folded'
+        elif output == 'text':
+            data, content_type, ext = profiling.dump_text(endpoint), 'text/plain', 'txt'
+        else:
+            data, content_type, ext = profiling.dump_pstats(endpoint), 'application/octet-stream', 'pstats'
+        if data is None:
+            raise Http404
+        response = HttpResponse(data, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{endpoint}.{ext}"'
+        return response
+
+    def delete(self, request, endpoint=None):
+        profiling.reset(endpoint)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class AgentDirectoryView(APIView):
+    """Agents ranked by rating, completed inspections and proximity.
+
+    Near a listing (``?property=``), a city and/or coordinates; without a
+    location, by rating then completed inspections.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = AgentDirectoryQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        city, latitude, longitude = params.get('city'), params.get('latitude'), params.get('longitude')
+        if 'property' in params:
+            location = Property.objects.filter(pk=params['property']).values('city', 'latitude', 'longitude').first()
+            if location is None:
+                return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+            city, latitude, longitude = location['city'], location['latitude'], location['longitude']
+        rows = agents.directory(city, latitude, longitude, limit=params['limit'])
+        return Response(AgentDirectorySerializer(rows, many=True).data)
+
+
+class MarketStatsView(APIView):
+    """Rent guides: price quartiles by city, property type and bedrooms, with monthly trends.
+
+    Without ``?city=``, lists every city with its overall quartiles.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        query = MarketStatsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        from . import market_stats  # imports numpy; cached reads still go through it
+
+        try:
+            if 'city' not in params:
+                return Response(market_stats.summary())
+            guide = market_stats.city_guide(params['city'])
+        except market_stats.StatsUnavailable:
+            raise ServiceBusy('Market statistics are being computed, try again shortly.', 'market_stats_unavailable')
+        if guide is None:
+            return Response({'detail': 'No listings in this city.'}, status=status.HTTP_404_NOT_FOUND)
+        groups = guide['groups']
+        if 'property_type' in params:
+            groups = [group for group in groups if group['property_type'] == params['property_type']]
+        if 'bedrooms' in params:
+            bedrooms = min(params['bedrooms'], market_stats.BEDROOMS_CAP)
+            groups = [group for group in groups if group['bedrooms'] == bedrooms]
+        return Response({**guide, 'groups': groups})
+
+
+class ListingAnalyticsView(APIView):
+    """Owner dashboard: views, saves, inspection requests and messages per listing.
+
+    Served from the hourly/daily rollups only; events reach them when
+    ``rollup_analytics`` next runs.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = ListingAnalyticsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        properties = Property.objects.filter(owner=request.user)
+        if 'property' in params:
+            if request.user.is_staff:
+                properties = Property.objects.all()
+            properties = properties.filter(pk=params['property'])
+            if not properties.exists():
+                return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        granularity = params['granularity'].upper()
+        since = analytics.window_start(granularity, params['periods'])
+        return Response(analytics.dashboard(properties, granularity, since))
+
+
+class DatabasePoolStatsView(APIView):
+    """Staff-only connection pool metrics for the worker serving the request."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(pool_stats())